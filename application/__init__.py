@@ -1 +1,102 @@
+from flask import Flask
+from flask_cors import CORS
+from application.extensions import db, jwt
+from application.cache import configure_caches
+from application.engine import configure_engines
+from application.metrics import configure_metrics
+from application.query_budget import configure_query_budget
+import importlib
+import os
 
+# Repository root, which holds static/ and instance/
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Blueprints by name: (module, attribute). Modules are imported only when enabled.
+BLUEPRINTS = {
+    "swagger": ("application.routes.swagger_routes", "swagger_ui_bp"),
+    "payment": ("application.routes.payment_routes", "payment_bp"),
+    "institution": ("application.routes.institution_routes", "institution_bp"),
+    "iot_device": ("application.routes.iot_device_routes", "iot_device_bp"),
+    "api_access": ("application.routes.api_access_routes", "api_access_bp"),
+    "observations": ("application.routes.observation_routes", "observations_bp"),
+}
+
+# Named sets of blueprints a worker can serve
+BLUEPRINT_PROFILES = {
+    "full": tuple(BLUEPRINTS),
+    "ingest": ("iot_device", "observations"),
+}
+
+
+def create_app(config=None, blueprints=None):
+    """
+    Build and configure a Flask application.
+    Args:
+        config (object, optional): Config class or object. Defaults to config.Config.
+        blueprints (iterable, optional): Blueprint names to enable. Defaults to the
+            APP_PROFILE profile from the config.
+    Returns:
+        Flask: The configured application.
+    """
+    if config is None:
+        from config import Config
+        config = Config
+
+    app = Flask(
+        "app",
+        root_path=ROOT_PATH,
+        static_folder=os.path.join(ROOT_PATH, "static"),
+        instance_path=os.path.join(ROOT_PATH, "instance"),
+    )
+    app.config.from_object(config)
+
+    # Enable CORS for all routes
+    CORS(app)
+
+    # Initialize extensions
+    db.init_app(app)
+    configure_engines(app)
+    jwt.init_app(app)
+
+    # Process-local or cross-worker caches, per CACHE_BACKEND
+    configure_caches(app)
+
+    # Request latency, SQL and serialization metrics, and the slow-request profiler
+    configure_metrics(app)
+    configure_query_budget(app)
+
+    if blueprints is None:
+        profile = app.config.get("APP_PROFILE", "full")
+        if profile not in BLUEPRINT_PROFILES:
+            raise ValueError(f"Unknown APP_PROFILE: {profile}")
+        blueprints = BLUEPRINT_PROFILES[profile]
+    for name in blueprints:
+        module_name, attribute = BLUEPRINTS[name]
+        blueprint = getattr(importlib.import_module(module_name), attribute)
+        app.register_blueprint(blueprint)
+
+    from application.cli import db_cli
+    app.cli.add_command(db_cli)
+
+    @app.route("/")
+    def home():
+        return {"message": "Welcome to Flask Authentication API"}
+
+    # Bootstrap the schema once at startup rather than on every request
+    if app.config.get("AUTO_UPGRADE_SCHEMA"):
+        from application.schema import upgrade_schema
+        with app.app_context():
+            upgrade_schema()
+
+    # Load the device registry so the first readings skip the device lookup.
+    # A database without the schema yet (e.g. before `flask db upgrade`) is
+    # skipped; the registry then loads on the first reading instead.
+    if app.config.get("WARM_DEVICE_REGISTRY") and "observations" in blueprints:
+        from sqlalchemy import inspect
+        from application.device_registry import get_device_registry
+        from application.models import IoTDevice
+        with app.app_context():
+            if inspect(db.engine).has_table(IoTDevice.__tablename__):
+                get_device_registry().warm()
+
+    return app
@@ -0,0 +1,182 @@
+from application.models import Observation, ObservationRollup, db
+from application.rollups import ROLLUP_RESOLUTIONS
+from sqlalchemy import BigInteger, Integer, cast, func, select
+from datetime import datetime, timedelta, timezone
+import re
+
+# Numeric observation fields that can be aggregated
+AGGREGATE_FIELDS = ("temperature", "humidity", "windSpeed", "precipitation")
+
+# Supported aggregate functions
+AGGREGATES = {
+    "avg": func.avg,
+    "min": func.min,
+    "max": func.max,
+    "sum": func.sum,
+    "count": func.count,
+}
+
+# Bucket size units, in seconds
+BUCKET_UNITS = {"m": 60, "h": 3600, "d": 86400}
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def parse_bucket(value):
+    """
+    Parse a bucket size such as "15m", "1h" or "1d".
+    Args:
+        value (str): Bucket size.
+    Returns:
+        int: Bucket size in seconds.
+    Raises:
+        ValueError: If the bucket size is malformed.
+    """
+    match = re.fullmatch(r"(\d+)([mhd])", value or "")
+    if not match or int(match.group(1)) == 0:
+        raise ValueError("Invalid bucket")
+    return int(match.group(1)) * BUCKET_UNITS[match.group(2)]
+
+
+def parse_list(value, allowed, default):
+    """
+    Parse a comma-separated list and check every entry against allowed.
+    Raises:
+        ValueError: If an entry is not allowed.
+    """
+    if not value:
+        return list(default)
+    items = [item.strip() for item in value.split(",") if item.strip()]
+    unknown = [item for item in items if item not in allowed]
+    if unknown or not items:
+        raise ValueError(", ".join(unknown))
+    return items
+
+
+def epoch_seconds(column):
+    """SQL expression for a timestamp column as integer seconds since the Unix epoch."""
+    dialect = db.engine.dialect.name
+    if dialect == "sqlite":
+        return cast(func.strftime("%s", column), Integer)
+    if dialect in ("mysql", "mariadb"):
+        return func.unix_timestamp(column)
+    return cast(func.extract("epoch", column), BigInteger)
+
+
+def aggregate_observations(bucket_seconds, fields, aggregates, device_id=None, start=None, end=None, use_rollups=True):
+    """
+    Compute time-bucketed statistics per device inside the database.
+    Answers from the coarsest rollup table that fits the bucket and range,
+    otherwise groups raw observations on (deviceID, bucket) in SQL.
+    No ORM objects are built either way.
+    Args:
+        bucket_seconds (int): Bucket width in seconds.
+        fields (list): Observation fields to aggregate.
+        aggregates (list): Aggregate function names from AGGREGATES.
+        device_id (str, optional): Restrict to one device.
+        start (datetime, optional): Inclusive lower bound on timestamp.
+        end (datetime, optional): Exclusive upper bound on timestamp.
+        use_rollups (bool): Allow answering from the rollup tables.
+    Returns:
+        tuple: (list of dicts, one per (deviceID, bucket) ordered by device then time,
+                "rollup:<resolution>" or "raw")
+    """
+    start, end = _naive_utc(start), _naive_utc(end)
+    resolution = pick_rollup(bucket_seconds, start, end) if use_rollups else None
+    if resolution:
+        query = _rollup_query(resolution, bucket_seconds, fields, aggregates, device_id, start, end)
+        source = f"rollup:{resolution}"
+    else:
+        query = _raw_query(bucket_seconds, fields, aggregates, device_id, start, end)
+        source = "raw"
+    buckets = [_bucket_dict(row._mapping, fields, aggregates) for row in db.session.execute(query)]
+    return buckets, source
+
+
+def pick_rollup(bucket_seconds, start=None, end=None):
+    """
+    Choose the coarsest rollup resolution whose buckets tile the request exactly.
+    Returns:
+        str: Resolution name, or None when only raw observations can answer.
+    """
+    for resolution, seconds in ROLLUP_RESOLUTIONS:
+        if bucket_seconds % seconds:
+            continue
+        if any(bound is not None and (bound - EPOCH) % timedelta(seconds=seconds) for bound in (start, end)):
+            continue
+        return resolution
+    return None
+
+
+def _raw_query(bucket_seconds, fields, aggregates, device_id, start, end):
+    """Group raw observations into buckets."""
+    bucket = (epoch_seconds(Observation.timestamp) // bucket_seconds) * bucket_seconds
+
+    columns = [
+        Observation.deviceID.label("deviceID"),
+        bucket.label("bucket"),
+        func.count().label("count"),
+    ]
+    for field in fields:
+        for aggregate in aggregates:
+            columns.append(AGGREGATES[aggregate](getattr(Observation, field)).label(f"{field}_{aggregate}"))
+
+    query = select(*columns)
+    if device_id:
+        query = query.where(Observation.deviceID == device_id)
+    if start:
+        query = query.where(Observation.timestamp >= start)
+    if end:
+        query = query.where(Observation.timestamp < end)
+    return query.group_by(Observation.deviceID, bucket).order_by(Observation.deviceID, bucket)
+
+
+def _rollup_query(resolution, bucket_seconds, fields, aggregates, device_id, start, end):
+    """Re-group pre-aggregated rollup rows into buckets."""
+    rollup = ObservationRollup
+    bucket = (epoch_seconds(rollup.bucketStart) // bucket_seconds) * bucket_seconds
+
+    columns = [
+        rollup.deviceID.label("deviceID"),
+        bucket.label("bucket"),
+        func.sum(rollup.count).label("count"),
+    ]
+    for field in fields:
+        field_count = func.sum(getattr(rollup, f"{field}Count"))
+        combined = {
+            "avg": func.sum(getattr(rollup, f"{field}Sum")) / func.nullif(field_count, 0),
+            "min": func.min(getattr(rollup, f"{field}Min")),
+            "max": func.max(getattr(rollup, f"{field}Max")),
+            "sum": func.sum(getattr(rollup, f"{field}Sum")),
+            "count": field_count,
+        }
+        for aggregate in aggregates:
+            columns.append(combined[aggregate].label(f"{field}_{aggregate}"))
+
+    query = select(*columns).where(rollup.resolution == resolution)
+    if device_id:
+        query = query.where(rollup.deviceID == device_id)
+    if start:
+        query = query.where(rollup.bucketStart >= start)
+    if end:
+        query = query.where(rollup.bucketStart < end)
+    return query.group_by(rollup.deviceID, bucket).order_by(rollup.deviceID, bucket)
+
+
+def _naive_utc(value):
+    """Normalize an aware datetime to naive UTC, matching how timestamps are stored."""
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _bucket_dict(row, fields, aggregates):
+    """Shape one aggregated row for the API response."""
+    data = {
+        "deviceID": row["deviceID"],
+        "bucketStart": (EPOCH + timedelta(seconds=int(row["bucket"]))).isoformat(),
+        "count": row["count"],
+    }
+    for field in fields:
+        data[field] = {aggregate: row[f"{field}_{aggregate}"] for aggregate in aggregates}
+    return data
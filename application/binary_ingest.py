@@ -0,0 +1,160 @@
+"""
+Compact binary ingest format for constrained IoT devices.
+
+A request body is a sequence of frames, one per device. Each frame is
+
+    header     "<2sBBI": magic b"OB", version (1), deviceID length, record count n
+    deviceID   UTF-8 bytes
+    columns    n little-endian values per column, column after column:
+               timestamp (int64, milliseconds since the Unix epoch, UTC),
+               temperature, humidity, windSpeed, precipitation,
+               latitude, longitude (float64; NaN means "not measured")
+
+Readings are laid out column by column so each column decodes straight
+into an array buffer without per-field parsing.
+"""
+from application.geo import valid_coordinates
+from application.ingest import new_observation_ids
+from array import array
+from datetime import datetime, timedelta
+import struct
+import sys
+
+CONTENT_TYPE = "application/vnd.observation-frames"
+
+MAGIC = b"OB"
+VERSION = 1
+FRAME_HEADER = struct.Struct("<2sBBI")
+
+# Float columns after the timestamp column, in wire order
+FLOAT_COLUMNS = ("temperature", "humidity", "windSpeed", "precipitation", "latitude", "longitude")
+
+# Fields that must not be NaN
+REQUIRED_COLUMNS = ("temperature", "humidity")
+
+# Never valid in any column; NaN alone means "not measured"
+INFINITIES = (float("inf"), float("-inf"))
+
+EPOCH = datetime(1970, 1, 1)
+
+# Timestamps (milliseconds since EPOCH) that fit in a datetime
+MIN_TIMESTAMP = (datetime.min - EPOCH) // timedelta(milliseconds=1)
+MAX_TIMESTAMP = (datetime.max - EPOCH) // timedelta(milliseconds=1)
+
+# Bytes per reading: the timestamp plus the float columns
+RECORD_SIZE = 8 * (1 + len(FLOAT_COLUMNS))
+
+
+class BatchTooLarge(ValueError):
+    """A body holds more readings than the caller allows."""
+
+
+def encode_frame(device_id, readings):
+    """
+    Encode one device's readings as a frame.
+    Args:
+        device_id (str): The device ID.
+        readings (list): Dicts with a datetime "timestamp" and the FLOAT_COLUMNS
+            fields; missing or None values are sent as NaN.
+    Returns:
+        bytes: The encoded frame.
+    """
+    device = device_id.encode()
+    if len(device) > 255:
+        raise ValueError("deviceID too long")
+    timestamps = array("q", (int((reading["timestamp"] - EPOCH) / timedelta(milliseconds=1)) for reading in readings))
+    columns = [timestamps] + [
+        array("d", (_nan_if_none(reading.get(column)) for reading in readings)) for column in FLOAT_COLUMNS
+    ]
+    if sys.byteorder == "big":
+        for column in columns:
+            column.byteswap()
+    return FRAME_HEADER.pack(MAGIC, VERSION, len(device), len(readings)) + device + b"".join(
+        column.tobytes() for column in columns
+    )
+
+
+def decode_frames(body, max_records=None):
+    """
+    Decode a request body of frames into observation rows.
+    Args:
+        body (bytes): The raw request body.
+        max_records (int, optional): Most readings accepted; checked from the
+            frame headers before any columns are decoded.
+    Returns:
+        list: Row dicts ready for store_observations.
+    Raises:
+        BatchTooLarge: If the body holds more than max_records readings.
+        ValueError: If the body is malformed or a value is missing or out of range.
+    """
+    view = memoryview(body)
+    rows = []
+    offset = 0
+    records = 0
+    while offset < len(view):
+        if len(view) - offset < FRAME_HEADER.size:
+            raise ValueError("Truncated frame header")
+        magic, version, device_length, count = FRAME_HEADER.unpack_from(view, offset)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Unsupported frame")
+        offset += FRAME_HEADER.size
+        records += count
+        if max_records is not None and records > max_records:
+            raise BatchTooLarge("Batch too large")
+
+        frame_end = offset + device_length + count * RECORD_SIZE
+        if frame_end > len(view):
+            raise ValueError("Truncated frame")
+        device_id = bytes(view[offset:offset + device_length]).decode()
+        offset += device_length
+
+        columns = {}
+        for name, typecode in [("timestamp", "q")] + [(column, "d") for column in FLOAT_COLUMNS]:
+            values = array(typecode)
+            values.frombytes(view[offset:offset + count * 8])
+            if sys.byteorder == "big":
+                values.byteswap()
+            columns[name] = values
+            offset += count * 8
+
+        rows.extend(_frame_rows(device_id, columns))
+    return rows
+
+
+def _frame_rows(device_id, columns):
+    """Build row dicts from one frame's decoded columns."""
+    for column in REQUIRED_COLUMNS:
+        if any(value != value for value in columns[column]):
+            raise ValueError(f"Missing {column}")
+    for column in FLOAT_COLUMNS:
+        if any(value in INFINITIES for value in columns[column]):
+            raise ValueError(f"{column} must be finite")
+    timestamps = columns["timestamp"]
+    if timestamps and not (MIN_TIMESTAMP <= min(timestamps) and max(timestamps) <= MAX_TIMESTAMP):
+        raise ValueError("Timestamp out of range")
+
+    rows = []
+    for observation_id, timestamp, temperature, humidity, wind_speed, precipitation, latitude, longitude in zip(
+        new_observation_ids(len(timestamps)), timestamps, columns["temperature"], columns["humidity"], columns["windSpeed"],
+        columns["precipitation"], columns["latitude"], columns["longitude"]
+    ):
+        has_location = latitude == latitude and longitude == longitude
+        if has_location and not valid_coordinates(latitude, longitude):
+            raise ValueError("Location out of range")
+        rows.append({
+            "observationID": observation_id,
+            "timestamp": EPOCH + timedelta(milliseconds=timestamp),
+            "temperature": temperature,
+            "humidity": humidity,
+            "windSpeed": wind_speed if wind_speed == wind_speed else None,
+            "precipitation": precipitation if precipitation == precipitation else None,
+            "locationCoordinates": f"{latitude}, {longitude}" if has_location else None,
+            "latitude": latitude if has_location else None,
+            "longitude": longitude if has_location else None,
+            "deviceID": device_id,
+        })
+    return rows
+
+
+def _nan_if_none(value):
+    return float("nan") if value is None else value
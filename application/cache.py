@@ -0,0 +1,346 @@
+from collections import OrderedDict
+from flask import current_app
+import mmap
+import os
+import pickle
+import sqlite3
+import struct
+import threading
+import time
+
+# API token cache sizing
+API_TOKEN_CACHE_SIZE = 10000
+API_TOKEN_CACHE_TTL = 30  # seconds; also how long a revoked token lives on in other per-process caches
+
+# Stripe customer mapping cache sizing; the mapping never changes once created
+CUSTOMER_CACHE_SIZE = 10000
+CUSTOMER_CACHE_TTL = 86400  # seconds
+
+# Registered device cache sizing; devices are never deleted, so only hits are cached
+DEVICE_CACHE_SIZE = 100000
+DEVICE_CACHE_TTL = 3600  # seconds
+
+# Invalidation events kept in a shared store for workers that fall behind
+SHARED_CACHE_LOG_SIZE = 10000
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Thread-safe, size-bounded LRU cache whose entries expire after a TTL.
+    Expired entries are dropped lazily on access; the least recently used
+    entry is evicted when the cache is full.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return the cached value for key, or default if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        """
+        Store a value.
+        Args:
+            key: Cache key.
+            value: Value to store.
+            ttl (float, optional): Lifetime in seconds, capped at the cache TTL.
+        """
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key):
+        """Remove key from the cache if present."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Remove every entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCacheStore:
+    """
+    Cache store shared by every worker process on a host.
+    Entries live in a SQLite file. Invalidations are appended to a log, and the
+    sequence number of the latest one is mirrored into a small mmap'd file, so a
+    worker can notice pending invalidations with a memory read rather than a query.
+    Values are pickled; the file must only be writable by the app's own user.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entry ("
+                "namespace TEXT, key BLOB, value BLOB, expires REAL, PRIMARY KEY (namespace, key))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_invalidation ("
+                "seq INTEGER PRIMARY KEY AUTOINCREMENT, namespace TEXT, key BLOB)"
+            )
+        with open(f"{path}.version", "a+b") as version_file:
+            if os.fstat(version_file.fileno()).st_size < 8:
+                version_file.write(b"\0" * 8)
+                version_file.flush()
+            self._version = mmap.mmap(version_file.fileno(), 8)
+
+    def _connect(self):
+        """Return this thread's connection, reopening it after a fork."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def version(self):
+        """Sequence number of the latest invalidation."""
+        return struct.unpack_from("<Q", self._version)[0]
+
+    def get(self, namespace, key):
+        """Return (value, seconds left), or None if missing or expired."""
+        row = self._connect().execute(
+            "SELECT value, expires FROM cache_entry WHERE namespace = ? AND key = ?",
+            (namespace, pickle.dumps(key))
+        ).fetchone()
+        if row is None:
+            return None
+        remaining = row[1] - time.time()
+        if remaining <= 0:
+            return None
+        return pickle.loads(row[0]), remaining
+
+    def set(self, namespace, key, value, ttl):
+        self._connect().execute(
+            "INSERT OR REPLACE INTO cache_entry (namespace, key, value, expires) VALUES (?, ?, ?, ?)",
+            (namespace, pickle.dumps(key), pickle.dumps(value), time.time() + ttl)
+        )
+
+    def invalidate(self, namespace, key=_MISSING):
+        """Delete one key, or the whole namespace, and tell every worker to drop it."""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if key is _MISSING:
+                conn.execute("DELETE FROM cache_entry WHERE namespace = ?", (namespace,))
+                blob = None
+            else:
+                blob = pickle.dumps(key)
+                conn.execute("DELETE FROM cache_entry WHERE namespace = ? AND key = ?", (namespace, blob))
+            seq = conn.execute(
+                "INSERT INTO cache_invalidation (namespace, key) VALUES (?, ?)", (namespace, blob)
+            ).lastrowid
+            if seq % 1000 == 0:
+                conn.execute("DELETE FROM cache_invalidation WHERE seq <= ?", (seq - SHARED_CACHE_LOG_SIZE,))
+                conn.execute("DELETE FROM cache_entry WHERE expires <= ?", (time.time(),))
+            # Published while holding the write lock, so the counter only moves forward
+            struct.pack_into("<Q", self._version, 0, seq)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def invalidations_since(self, seq):
+        """
+        Return (complete, events) for invalidations after seq.
+        complete is False if older events were pruned and some may be missing.
+        """
+        rows = self._connect().execute(
+            "SELECT seq, namespace, key FROM cache_invalidation WHERE seq > ? ORDER BY seq", (seq,)
+        ).fetchall()
+        complete = not rows or rows[0][0] == seq + 1
+        return complete, [(seq, namespace, _MISSING if key is None else pickle.loads(key)) for seq, namespace, key in rows]
+
+
+class Cache:
+    """
+    A named cache: an in-process TTLCache, optionally backed by a shared store.
+    With a store, misses are filled from entries other workers computed, and
+    pop/clear are broadcast so every worker drops its local copy on its next access.
+    A caller filling a miss from the database passes the generation() it saw
+    before reading, so a value invalidated in the meantime is never cached.
+    With share_values=False, values stay in each worker and only invalidations
+    go through the store, for secrets that must not be written to disk.
+    """
+
+    def __init__(self, namespace, maxsize=1024, ttl=60, store=None, share_values=True):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.share_values = share_values
+        self._local = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._seen = 0
+        self._sync_lock = threading.Lock()
+        self._fill_lock = threading.Lock()
+        self._generation = 0  # bumped by every local pop and clear
+        self.use_store(store)
+
+    def use_store(self, store):
+        """Attach a shared store (or None for process-local only) and start from a clean slate."""
+        self.store = store
+        self._local.clear()
+        self._seen = store.version() if store is not None else 0
+
+    def get(self, key, default=None):
+        """Return the cached value for key, or default if missing or expired."""
+        self._sync()
+        value = self._local.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        if self.store is not None and self.share_values:
+            shared = self.store.get(self.namespace, key)
+            if shared is not None:
+                value, remaining = shared
+                self._local.set(key, value, ttl=remaining)
+                return value
+        return default
+
+    def generation(self):
+        """Token that changes whenever an entry is invalidated here or, with a store, in any worker."""
+        return self._generation, self.store.version() if self.store is not None else 0
+
+    def set(self, key, value, ttl=None, generation=None):
+        """
+        Store a value; ttl is capped at the cache TTL.
+        Args:
+            generation (tuple, optional): generation() taken before the value was
+                read from its source. If an invalidation happened since, the value
+                may already be stale and is not cached.
+        """
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        with self._fill_lock:
+            if generation is not None and generation[0] != self._generation:
+                return
+            self._local.set(key, value, ttl=ttl)
+        if self.store is not None and self.share_values:
+            self.store.set(self.namespace, key, value, ttl)
+            raced = generation is not None and self.store.version() != generation[1]
+            if raced and self._invalidated_since(generation[1], key):
+                # Another worker invalidated the key while we were filling; the
+                # entry may be the one it already deleted, so take it back out
+                self.pop(key)
+
+    def pop(self, key):
+        """Remove key here and in every other worker."""
+        with self._fill_lock:
+            self._generation += 1
+            self._local.pop(key)
+        if self.store is not None:
+            self.store.invalidate(self.namespace, key)
+
+    def clear(self):
+        """Remove every entry here and in every other worker."""
+        with self._fill_lock:
+            self._generation += 1
+            self._local.clear()
+        if self.store is not None:
+            self.store.invalidate(self.namespace)
+
+    def _invalidated_since(self, seq, key):
+        """Whether the store has recorded an invalidation of key (or its namespace) after seq."""
+        complete, events = self.store.invalidations_since(seq)
+        return not complete or any(
+            namespace == self.namespace and (event_key is _MISSING or event_key == key)
+            for _, namespace, event_key in events
+        )
+
+    def _sync(self):
+        """Apply invalidations broadcast by other workers since the last access."""
+        if self.store is None or self.store.version() == self._seen:
+            return
+        with self._sync_lock:
+            version = self.store.version()
+            if version < self._seen:
+                # The store was recreated; nothing local can be trusted
+                self._local.clear()
+                self._seen = version
+                return
+            complete, events = self.store.invalidations_since(self._seen)
+            if not complete:
+                self._local.clear()
+            for seq, namespace, key in events:
+                if namespace == self.namespace:
+                    if key is _MISSING:
+                        self._local.clear()
+                    else:
+                        self._local.pop(key)
+                self._seen = seq
+
+    def __len__(self):
+        return len(self._local)
+
+
+def configure_caches(app):
+    """
+    Create the app's lookup caches on the backend picked by CACHE_BACKEND:
+    "memory" (per process, the default) or "sqlite" (shared by every worker
+    through the file at CACHE_PATH).
+    Returns:
+        SQLiteCacheStore: The shared store, or None.
+    """
+    backend = app.config.get("CACHE_BACKEND", "memory")
+    if backend == "memory":
+        store = None
+    elif backend == "sqlite":
+        path = app.config.get("CACHE_PATH") or os.path.join(app.instance_path, "cache.db")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        store = SQLiteCacheStore(path)
+    else:
+        raise ValueError(f"Unknown CACHE_BACKEND: {backend}")
+    app.extensions["cache_store"] = store
+    config = app.config
+    app.extensions["caches"] = {
+        # token -> (accessID, institutionID, expirationDate); tokens are never written to the shared store
+        "api_tokens": Cache(
+            "api_tokens", store=store, share_values=False,
+            maxsize=config.get("API_TOKEN_CACHE_SIZE", API_TOKEN_CACHE_SIZE),
+            ttl=config.get("API_TOKEN_CACHE_TTL", API_TOKEN_CACHE_TTL),
+        ),
+        # customer_id -> stripe_customer_id
+        "customers": Cache("customers", maxsize=CUSTOMER_CACHE_SIZE, ttl=CUSTOMER_CACHE_TTL, store=store),
+        # deviceID -> transmissionInterval for registered devices
+        "devices": Cache("devices", maxsize=DEVICE_CACHE_SIZE, ttl=DEVICE_CACHE_TTL, store=store),
+    }
+    return store
+
+
+def get_api_token_cache():
+    """Return the current app's API token cache."""
+    return current_app.extensions["caches"]["api_tokens"]
+
+
+def get_customer_cache():
+    """Return the current app's Stripe customer cache."""
+    return current_app.extensions["caches"]["customers"]
+
+
+def get_device_cache():
+    """Return the current app's registered device cache."""
+    return current_app.extensions["caches"]["devices"]
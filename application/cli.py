@@ -0,0 +1,71 @@
+from flask.cli import AppGroup
+import click
+
+# Database CLI: `flask db upgrade`
+db_cli = AppGroup("db", help="Database schema commands.")
+
+@db_cli.command("upgrade")
+def upgrade_db():
+    """Create missing tables, columns and indexes on an existing database."""
+    from application.schema import upgrade_schema
+    created = upgrade_schema()
+    click.echo(f"Schema up to date ({len(created)} column(s) and index(es) created).")
+
+@db_cli.command("rebuild-rollups")
+@click.option("--since", default=None, help="Only rebuild from this ISO date onwards.")
+def rebuild_rollups_command(since):
+    """Recompute the observation rollup tables, e.g. after a backfill."""
+    from datetime import datetime
+    from application.rollups import rebuild_rollups
+    total = rebuild_rollups(datetime.fromisoformat(since) if since else None)
+    click.echo(f"Rolled up {total} observation(s).")
+
+@db_cli.command("rebuild-latest")
+def rebuild_latest_command():
+    """Recompute the latest-reading-per-device snapshot from the observation table."""
+    from application.latest import rebuild_latest
+    total = rebuild_latest()
+    click.echo(f"Snapshot holds {total} device(s).")
+
+@db_cli.command("seed-observations")
+@click.option("--count", type=int, required=True, help="Readings to generate per device.")
+@click.option("--batch-size", type=int, default=None, help="Rows inserted per transaction.")
+@click.option("--seed", type=int, default=None, help="Random seed for reproducible data.")
+def seed_observations_command(count, batch_size, seed):
+    """Bulk-insert mock observations for every registered IoT device."""
+    from application.mock_data import MOCK_BATCH_SIZE, seed_observations
+    from application.models import IoTDevice, db
+    device_ids = [device_id for (device_id,) in db.session.query(IoTDevice.deviceID)]
+    if not device_ids:
+        raise click.ClickException("No IoT devices found in the database.")
+    total = seed_observations(device_ids, count, batch_size or MOCK_BATCH_SIZE, seed)
+    click.echo(f"Inserted {total} observation(s).")
+
+
+@db_cli.command("export-observations")
+@click.option("--format", "export_format", type=click.Choice(["csv", "arrow", "parquet"]), default="csv",
+              help="Output format; arrow and parquet need pyarrow.")
+@click.option("--output", "-o", default="-", help="File to write, or - for stdout.")
+@click.option("--fields", default=None, help="Comma-separated columns to export (default: all).")
+@click.option("--device-id", default=None, help="Only export this device.")
+@click.option("--start", default=None, help="Only export from this ISO date onwards.")
+@click.option("--end", default=None, help="Only export up to this ISO date.")
+def export_observations_command(export_format, output, fields, device_id, start, end):
+    """Stream observations to a CSV, Arrow IPC or Parquet file in constant memory."""
+    from datetime import datetime
+    from application.export import export_columns, export_observations, format_available, observation_query, parse_fields
+    if not format_available(export_format):
+        raise click.ClickException(f"Export format {export_format} requires pyarrow.")
+    try:
+        fields = parse_fields(fields)
+    except ValueError as e:
+        raise click.BadParameter(f"Unsupported field: {e}", param_hint="--fields")
+    query = observation_query(
+        export_columns(fields),
+        device_id,
+        datetime.fromisoformat(start) if start else None,
+        datetime.fromisoformat(end) if end else None
+    )
+    with click.open_file(output, "wb") as stream:
+        for chunk in export_observations(export_format, fields, query):
+            stream.write(chunk)
@@ -0,0 +1,205 @@
+"""
+In-memory registry of IoT devices for the ingestion hot path.
+
+Checking that a device exists is a dict lookup once the registry is warm.
+The registry also tracks each device's newest reading and reading count;
+those are written back to IoTDevice in batches, so device status queries
+read one row per device instead of scanning the observation table.
+"""
+from application.cache import get_device_cache
+from application.models import IoTDevice, db
+from flask import current_app
+from sqlalchemy import bindparam, case, or_, select, update
+from datetime import datetime
+import atexit
+import os
+import threading
+
+# Seconds between background flushes of device activity; 0 flushes after every commit
+DEVICE_STATE_FLUSH_INTERVAL = 5
+
+# A device is silent once it has missed this many transmission intervals
+SILENT_INTERVALS = 3
+
+DEVICE_STATE_COLUMNS = (
+    IoTDevice.deviceID,
+    IoTDevice.transmissionInterval,
+    IoTDevice.lastSeen,
+    IoTDevice.observationCount,
+)
+
+
+class DeviceRegistry:
+    """
+    Registered devices and their activity, per worker process.
+    Activity is accumulated in memory and flushed to the database by a
+    background thread every flush_interval seconds, or straight away when
+    flush_interval is 0.
+    """
+
+    def __init__(self, app, flush_interval=DEVICE_STATE_FLUSH_INTERVAL):
+        self.app = app
+        self.flush_interval = flush_interval
+        self._devices = {}  # deviceID -> transmissionInterval
+        self._pending = {}  # deviceID -> [lastSeen, new readings] not yet flushed
+        self._lock = threading.Lock()
+        self._warm = False
+        self._flusher_pid = None
+
+    def warm(self):
+        """Load every registered device."""
+        rows = db.session.execute(select(IoTDevice.deviceID, IoTDevice.transmissionInterval)).all()
+        with self._lock:
+            self._devices.update(rows)
+            self._warm = True
+
+    def add(self, device_id, transmission_interval):
+        """Register a device created by this worker."""
+        with self._lock:
+            self._devices[device_id] = transmission_interval
+        get_device_cache().set(device_id, transmission_interval)
+
+    def known(self, device_ids):
+        """
+        Return the subset of device_ids that are registered.
+        Devices created by other workers are looked up in the shared device
+        cache, then with one query, and remembered.
+        """
+        if not self._warm:
+            self.warm()
+        device_ids = set(device_ids)
+        known = {device_id for device_id in device_ids if device_id in self._devices}
+        missing = device_ids - known
+        if not missing:
+            return known
+
+        device_cache = get_device_cache()
+        found = {}
+        for device_id in missing:
+            interval = device_cache.get(device_id)
+            if interval is not None:
+                found[device_id] = interval
+        missing -= found.keys()
+        if missing:
+            rows = db.session.execute(
+                select(IoTDevice.deviceID, IoTDevice.transmissionInterval).where(IoTDevice.deviceID.in_(missing))
+            )
+            for device_id, interval in rows:
+                device_cache.set(device_id, interval)
+                found[device_id] = interval
+        with self._lock:
+            self._devices.update(found)
+        return known | found.keys()
+
+    def record(self, rows):
+        """Count committed observation rows towards their devices' activity."""
+        with self._lock:
+            for row in rows:
+                pending = self._pending.get(row["deviceID"])
+                if pending is None:
+                    self._pending[row["deviceID"]] = [row["timestamp"], 1]
+                else:
+                    if row["timestamp"] > pending[0]:
+                        pending[0] = row["timestamp"]
+                    pending[1] += 1
+        if not self.flush_interval:
+            self.flush()
+        elif self._flusher_pid != os.getpid():
+            self._start_flusher()
+
+    def flush(self):
+        """
+        Write pending activity to IoTDevice with one batched UPDATE.
+        Returns:
+            int: Number of devices updated.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        table = IoTDevice.__table__
+        statement = update(table).where(table.c.deviceID == bindparam("b_deviceID")).values(
+            lastSeen=case(
+                (or_(table.c.lastSeen.is_(None), table.c.lastSeen < bindparam("b_lastSeen")), bindparam("b_lastSeen")),
+                else_=table.c.lastSeen
+            ),
+            observationCount=table.c.observationCount + bindparam("b_count"),
+        )
+        params = [
+            {"b_deviceID": device_id, "b_lastSeen": last_seen, "b_count": count}
+            for device_id, (last_seen, count) in pending.items()
+        ]
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(statement, params)
+        except Exception:
+            # Keep the activity for the next flush
+            with self._lock:
+                for device_id, (last_seen, count) in pending.items():
+                    current = self._pending.setdefault(device_id, [last_seen, 0])
+                    current[0] = max(current[0], last_seen)
+                    current[1] += count
+            raise
+        return len(pending)
+
+    def _start_flusher(self):
+        """Start the background flush thread in this process (again after a fork)."""
+        with self._lock:
+            if self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+        stop = threading.Event()
+
+        def run():
+            while not stop.wait(self.flush_interval):
+                self._flush_in_app()
+
+        threading.Thread(target=run, name="device-state-flush", daemon=True).start()
+
+        def shutdown():
+            stop.set()
+            self._flush_in_app()
+
+        atexit.register(shutdown)
+
+    def _flush_in_app(self):
+        with self.app.app_context():
+            try:
+                self.flush()
+            except Exception:
+                self.app.logger.exception("Failed to flush device activity")
+
+
+def get_device_registry():
+    """Return the current app's device registry, creating it on first use."""
+    registry = current_app.extensions.get("device_registry")
+    if registry is None:
+        registry = current_app.extensions["device_registry"] = DeviceRegistry(
+            current_app._get_current_object(),
+            flush_interval=current_app.config.get("DEVICE_STATE_FLUSH_INTERVAL", DEVICE_STATE_FLUSH_INTERVAL),
+        )
+    return registry
+
+
+def device_status(now=None, silent_intervals=SILENT_INTERVALS):
+    """
+    Report each device's activity from IoTDevice, without touching observations.
+    A device is silent if it has never reported, or its newest reading is older
+    than silent_intervals transmission intervals.
+    Returns:
+        list: One dict per device.
+    """
+    get_device_registry().flush()
+    now = now or datetime.utcnow()
+    devices = []
+    for device_id, interval, last_seen, count in db.session.execute(select(*DEVICE_STATE_COLUMNS)):
+        silent = last_seen is None or (now - last_seen).total_seconds() > interval * silent_intervals
+        devices.append({
+            "deviceID": device_id,
+            "transmissionInterval": interval,
+            "lastSeen": last_seen.isoformat() if last_seen else None,
+            "observationCount": count or 0,
+            "silent": silent,
+        })
+    return devices
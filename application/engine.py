@@ -0,0 +1,38 @@
+from application.extensions import db
+from application.geo import haversine_km
+from sqlalchemy import event
+
+
+def apply_sqlite_pragmas(engine, pragmas):
+    """
+    Run PRAGMA statements on every new connection of a SQLite engine.
+    Args:
+        engine (Engine): A SQLite engine.
+        pragmas (dict): Pragma name -> value, e.g. {"journal_mode": "WAL"}.
+    """
+    statements = [f"PRAGMA {name}={value}" for name, value in pragmas.items() if value is not None]
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for statement in statements:
+            cursor.execute(statement)
+        cursor.close()
+
+
+def register_sqlite_functions(engine):
+    """Register the Python SQL functions the app's queries use (haversine_km) on every new connection."""
+    @event.listens_for(engine, "connect")
+    def create_functions(dbapi_connection, connection_record):
+        dbapi_connection.create_function("haversine_km", 4, haversine_km, deterministic=True)
+
+
+def configure_engines(app):
+    """Apply SQLITE_PRAGMAS and functions to the app's SQLite engines; server databases use SQLALCHEMY_ENGINE_OPTIONS."""
+    pragmas = app.config.get("SQLITE_PRAGMAS") or {}
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == "sqlite":
+                register_sqlite_functions(engine)
+                if pragmas:
+                    apply_sqlite_pragmas(engine, pragmas)
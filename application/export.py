@@ -0,0 +1,192 @@
+"""
+Bulk export of observations as CSV, Arrow IPC or Parquet.
+
+Rows are read from a server-side cursor in chunks and each chunk is encoded
+and handed on before the next is fetched, so an export of any size runs in
+constant memory. Arrow and Parquet need the optional pyarrow package; CSV
+uses the standard library only.
+"""
+from application.geo import bbox_clause, near_clause
+from application.models import Observation, db
+from application.serializers import observation_serializer
+from sqlalchemy import DateTime, Float, select
+import csv
+import importlib.util
+import io
+
+# Columns that can be exported, in their default order
+OBSERVATION_COLUMNS = observation_serializer.columns
+EXPORT_COLUMNS = {column.key: column for column in OBSERVATION_COLUMNS}
+
+# Rows read, encoded and flushed per chunk (one Parquet row group each)
+EXPORT_CHUNK_SIZE = 10000
+
+# format -> (mimetype, file extension, needs pyarrow)
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv", False),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows", True),
+    "parquet": ("application/vnd.apache.parquet", "parquet", True),
+}
+
+
+def observation_query(columns=OBSERVATION_COLUMNS, device_id=None, start=None, end=None, bbox=None, near=None):
+    """
+    Build a select of observation columns filtered like GET /observations/.
+    Args:
+        columns (tuple): Columns to select.
+        device_id (str, optional): Only this device.
+        start (datetime, optional): Inclusive lower bound on timestamp.
+        end (datetime, optional): Inclusive upper bound on timestamp.
+        bbox (tuple, optional): (south, west, north, east) in degrees.
+        near (tuple, optional): (latitude, longitude, radius in km).
+    Returns:
+        Select: The query.
+    """
+    query = select(*columns)
+    if device_id:
+        query = query.where(Observation.deviceID == device_id)
+    if start:
+        query = query.where(Observation.timestamp >= start)
+    if end:
+        query = query.where(Observation.timestamp <= end)
+    if bbox:
+        query = query.where(bbox_clause(Observation.latitude, Observation.longitude, *bbox))
+    if near:
+        query = query.where(near_clause(Observation.latitude, Observation.longitude, *near))
+    return query
+
+
+def parse_fields(value):
+    """
+    Parse a comma-separated column projection.
+    Returns:
+        list: Column names, every exportable column if value is empty.
+    Raises:
+        ValueError: If a name is not an exportable column.
+    """
+    if not value:
+        return list(EXPORT_COLUMNS)
+    fields = [field.strip() for field in value.split(",") if field.strip()]
+    unknown = [field for field in fields if field not in EXPORT_COLUMNS]
+    if unknown or not fields:
+        raise ValueError(", ".join(unknown) or value)
+    return fields
+
+
+def format_available(export_format):
+    """Return True if the format's dependencies are installed."""
+    return not EXPORT_FORMATS[export_format][2] or importlib.util.find_spec("pyarrow") is not None
+
+
+def export_columns(fields):
+    """Return the columns for a list of exported field names."""
+    return tuple(EXPORT_COLUMNS[field] for field in fields)
+
+
+def export_observations(export_format, fields, query, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Stream observations in the given format.
+    Args:
+        export_format (str): One of EXPORT_FORMATS.
+        fields (list): Exported column names, in order.
+        query (Select): Filtered select of export_columns(fields), e.g. from observation_query.
+        chunk_size (int): Rows read and encoded at a time.
+    Yields:
+        bytes: Consecutive pieces of the encoded file.
+    """
+    query = query.order_by(Observation.timestamp, Observation.observationID)
+    chunks = db.session.execute(query.execution_options(yield_per=chunk_size)).partitions()
+    writer = {"csv": _write_csv, "arrow": _write_arrow, "parquet": _write_parquet}[export_format]
+    return writer(fields, chunks)
+
+
+def _write_csv(fields, chunks):
+    """Encode chunks of rows as CSV with a header line."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(fields)
+    for rows in chunks:
+        writer.writerows(
+            [value.isoformat() if hasattr(value, "isoformat") else value for value in row] for row in rows
+        )
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def _write_arrow(fields, chunks):
+    """Encode chunks of rows as an Arrow IPC stream, one record batch per chunk."""
+    import pyarrow as pa
+
+    schema = _arrow_schema(pa, fields)
+    sink = _ChunkSink()
+    with pa.ipc.new_stream(pa.PythonFile(sink, mode="w"), schema) as writer:
+        for rows in chunks:
+            writer.write_batch(_record_batch(pa, schema, rows))
+            yield sink.drain()
+    yield sink.drain()
+
+
+def _write_parquet(fields, chunks):
+    """Encode chunks of rows as Parquet, one row group per chunk."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _arrow_schema(pa, fields)
+    sink = _ChunkSink()
+    with pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema) as writer:
+        for rows in chunks:
+            writer.write_batch(_record_batch(pa, schema, rows))
+            yield sink.drain()
+    yield sink.drain()
+
+
+def _arrow_schema(pa, fields):
+    """Map the exported columns' SQL types to an Arrow schema."""
+    def arrow_type(column):
+        if isinstance(column.type, DateTime):
+            return pa.timestamp("us")
+        if isinstance(column.type, Float):
+            return pa.float64()
+        return pa.string()
+
+    return pa.schema([(field, arrow_type(EXPORT_COLUMNS[field])) for field in fields])
+
+
+def _record_batch(pa, schema, rows):
+    """Transpose a chunk of rows into an Arrow record batch."""
+    columns = list(zip(*rows)) if rows else [()] * len(schema)
+    return pa.record_batch(
+        [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+        schema=schema
+    )
+
+
+class _ChunkSink:
+    """Write-only file object that hands back whatever was written since the last drain."""
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
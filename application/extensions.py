@@ -0,0 +1,6 @@
+from flask_sqlalchemy import SQLAlchemy
+from flask_jwt_extended import JWTManager
+
+# Extensions are created unbound and attached to an app in create_app
+db = SQLAlchemy()
+jwt = JWTManager()
@@ -0,0 +1,179 @@
+"""
+Coordinates and region filters for observations.
+
+Readings carry numeric latitude/longitude columns next to the free-form
+locationCoordinates string, indexed together. Region queries first
+constrain both columns to a bounding box, which the index answers, and
+only then run the exact great-circle distance check on the candidates.
+"""
+from application.extensions import db
+from sqlalchemy import Float, and_, bindparam, func, or_, select
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+import math
+
+# Mean Earth radius
+EARTH_RADIUS_KM = 6371.0088
+
+# Length of one degree of latitude
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+# Rows parsed and updated per transaction when backfilling
+BACKFILL_CHUNK_SIZE = 5000
+
+
+def parse_coordinates(value):
+    """
+    Parse a "lat, lon" string.
+    Returns:
+        tuple: (latitude, longitude), or None if value is missing, malformed or out of range.
+    """
+    if not isinstance(value, str):
+        return None
+    parts = value.split(",")
+    if len(parts) != 2:
+        return None
+    try:
+        latitude, longitude = float(parts[0]), float(parts[1])
+    except ValueError:
+        return None
+    if not valid_coordinates(latitude, longitude):
+        return None
+    return latitude, longitude
+
+
+def valid_coordinates(latitude, longitude):
+    """Return whether a latitude and longitude in degrees are in range."""
+    return -90 <= latitude <= 90 and -180 <= longitude <= 180
+
+
+def parse_bbox(value):
+    """
+    Parse a "south,west,north,east" bounding box in degrees.
+    A box with west > east crosses the antimeridian.
+    Raises:
+        ValueError: If the box is malformed.
+    """
+    south, west, north, east = (float(part) for part in value.split(","))
+    if not (-90 <= south <= north <= 90 and -180 <= west <= 180 and -180 <= east <= 180):
+        raise ValueError("Invalid bbox")
+    return south, west, north, east
+
+
+def parse_near(near, radius):
+    """
+    Parse a "lat,lon" centre and a radius in kilometres.
+    Raises:
+        ValueError: If either is malformed.
+    """
+    center = parse_coordinates(near)
+    if center is None:
+        raise ValueError("Invalid near")
+    radius = float(radius)
+    if not radius > 0:
+        raise ValueError("Invalid radius")
+    return center[0], center[1], radius
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance between two points in kilometres."""
+    if lat1 is None or lon1 is None or lat2 is None or lon2 is None:
+        return None
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class distance_km(FunctionElement):
+    """SQL great-circle distance in kilometres: distance_km(lat1, lon1, lat2, lon2)."""
+    type = Float()
+    inherit_cache = True
+    name = "distance_km"
+
+
+@compiles(distance_km)
+def _compile_distance_km(element, compiler, **kw):
+    lat1, lon1, lat2, lon2 = (func.radians(argument) for argument in element.clauses)
+    a = (
+        func.power(func.sin((lat2 - lat1) / 2), 2)
+        + func.cos(lat1) * func.cos(lat2) * func.power(func.sin((lon2 - lon1) / 2), 2)
+    )
+    return compiler.process(2 * EARTH_RADIUS_KM * func.asin(func.least(1.0, func.sqrt(a))), **kw)
+
+
+@compiles(distance_km, "sqlite")
+def _compile_distance_km_sqlite(element, compiler, **kw):
+    # Math functions are optional in SQLite builds; haversine_km is registered on every connection
+    return f"haversine_km({compiler.process(element.clauses, **kw)})"
+
+
+def bbox_clause(latitude, longitude, south, west, north, east):
+    """Filter latitude/longitude columns to a bounding box, splitting it at the antimeridian."""
+    in_latitude = latitude.between(south, north)
+    if west <= east:
+        return and_(in_latitude, longitude.between(west, east))
+    return and_(in_latitude, or_(longitude >= west, longitude <= east))
+
+
+def near_clause(latitude, longitude, center_latitude, center_longitude, radius_km):
+    """
+    Filter latitude/longitude columns to a circle: an indexable bounding box
+    around it first, then the exact distance check on what is left.
+    """
+    delta_latitude = radius_km / KM_PER_DEGREE
+    south = max(center_latitude - delta_latitude, -90.0)
+    north = min(center_latitude + delta_latitude, 90.0)
+
+    # Longitude degrees shrink towards the poles; near one, every longitude is in range
+    cos_latitude = math.cos(math.radians(max(abs(south), abs(north))))
+    if south == -90.0 or north == 90.0 or radius_km / (KM_PER_DEGREE * cos_latitude) >= 180:
+        west, east = -180.0, 180.0
+    else:
+        delta_longitude = radius_km / (KM_PER_DEGREE * cos_latitude)
+        west = (center_longitude - delta_longitude + 180) % 360 - 180
+        east = (center_longitude + delta_longitude + 180) % 360 - 180
+
+    return and_(
+        bbox_clause(latitude, longitude, south, west, north, east),
+        distance_km(latitude, longitude, center_latitude, center_longitude) <= radius_km,
+    )
+
+
+def backfill_coordinates(table, chunk_size=BACKFILL_CHUNK_SIZE):
+    """
+    Fill latitude/longitude from locationCoordinates for rows stored before the columns existed.
+    Args:
+        table (Table): A table with locationCoordinates, latitude and longitude columns.
+        chunk_size (int): Rows read and updated per transaction.
+    Returns:
+        int: Number of rows updated.
+    """
+    key = table.primary_key.columns.values()[0]
+    query = (
+        select(key, table.c.locationCoordinates)
+        .where(table.c.latitude.is_(None), table.c.locationCoordinates.is_not(None))
+        .order_by(key)
+        .limit(chunk_size)
+    )
+    statement = (
+        table.update()
+        .where(key == bindparam("_key"))
+        .values(latitude=bindparam("_latitude"), longitude=bindparam("_longitude"))
+    )
+    updated, last_key = 0, None
+    while True:
+        with db.engine.begin() as conn:
+            # Rows that do not parse stay NULL, so page by key rather than by what is left
+            page = query if last_key is None else query.where(key > last_key)
+            rows = conn.execute(page).all()
+            if not rows:
+                return updated
+            last_key = rows[-1][0]
+            values = [
+                {"_key": row[0], "_latitude": coordinates[0], "_longitude": coordinates[1]}
+                for row, coordinates in ((row, parse_coordinates(row[1])) for row in rows)
+                if coordinates is not None
+            ]
+            if values:
+                conn.execute(statement, values)
+                updated += len(values)
@@ -0,0 +1,79 @@
+import os
+import threading
+import time
+
+# Crockford base32 alphabet used by ULIDs
+_CROCKFORD = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+
+# Every 10-bit value as two characters, so a ULID encodes in 13 lookups
+_PAIRS = [first + second for first in _CROCKFORD for second in _CROCKFORD]
+_PAIR_SHIFTS = tuple(range(120, -1, -10))
+
+_RANDOM_BITS = 80
+_RANDOM_MAX = (1 << _RANDOM_BITS) - 1
+
+
+class ULIDGenerator:
+    """
+    Generates ULIDs: 26-character, lexicographically time-ordered unique IDs.
+    Each ID is a 48-bit millisecond timestamp followed by 80 random bits.
+    Within one millisecond the random part is incremented rather than redrawn,
+    so IDs from one process are strictly increasing; separate processes draw
+    independent random parts and need no coordination.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._last_random = 0
+
+    def new(self):
+        """Return a new ULID string."""
+        return _encode(self._reserve(1))
+
+    def new_batch(self, count):
+        """Return count consecutive ULID strings, taking the lock once."""
+        first = self._reserve(count)
+        return [_encode(value) for value in range(first, first + count)]
+
+    def _reserve(self, count):
+        """Reserve count consecutive 128-bit values and return the first."""
+        with self._lock:
+            ms = time.time_ns() // 1_000_000
+            if ms <= self._last_ms:
+                ms = self._last_ms
+                random = self._last_random + 1
+            else:
+                random = int.from_bytes(os.urandom(10), "big")
+            if random + count - 1 > _RANDOM_MAX:
+                # Random space for this millisecond exhausted; borrow the next one
+                ms += 1
+                random = int.from_bytes(os.urandom(10), "big") >> 1
+            self._last_ms, self._last_random = ms, random + count - 1
+        return (ms << _RANDOM_BITS) | random
+
+
+def _encode(value):
+    """Encode a 128-bit value as 26 Crockford base32 characters."""
+    return "".join([_PAIRS[(value >> shift) & 0x3FF] for shift in _PAIR_SHIFTS])
+
+
+_generator = ULIDGenerator()
+
+
+def new_id(prefix=None):
+    """
+    Generate a time-ordered unique ID for a primary key.
+    Args:
+        prefix (str, optional): Readable prefix, e.g. "obs" gives "obs-01J9...".
+    Returns:
+        str: The ID.
+    """
+    ulid = _generator.new()
+    return f"{prefix}-{ulid}" if prefix else ulid
+
+
+def new_ids(count, prefix=None):
+    """Generate count time-ordered unique IDs at once, e.g. for a bulk insert."""
+    ulids = _generator.new_batch(count)
+    return [f"{prefix}-{ulid}" for ulid in ulids] if prefix else ulids
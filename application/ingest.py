@@ -0,0 +1,110 @@
+from application.models import Observation, db
+from application.rollups import record_rollups
+from application.latest import record_latest
+from application.device_registry import get_device_registry
+from application.geo import parse_coordinates
+from application.ids import new_id, new_ids
+from sqlalchemy import insert
+from datetime import datetime, timezone
+import math
+
+# Fields every reading must carry
+REQUIRED_OBSERVATION_FIELDS = ("deviceID", "timestamp", "temperature", "humidity")
+
+# Fields that must be numeric when present
+NUMERIC_OBSERVATION_FIELDS = ("temperature", "humidity", "windSpeed", "precipitation")
+
+
+def new_observation_id():
+    """Generate a unique, time-ordered observation ID."""
+    return new_id("obs")
+
+
+def new_observation_ids(count):
+    """Generate count observation IDs at once for bulk paths."""
+    return new_ids(count, "obs")
+
+
+def parse_observation(data):
+    """
+    Validate a single reading and build the row values to insert.
+    Args:
+        data (dict): Reading as posted by an IoT device.
+    Returns:
+        tuple: (row, None) when valid, (None, error message) otherwise.
+    """
+    if not isinstance(data, dict):
+        return None, "Validation error: Observation must be an object"
+    if any(data.get(field) is None for field in REQUIRED_OBSERVATION_FIELDS):
+        return None, "Validation error: Missing required fields"
+    if not isinstance(data["deviceID"], str):
+        return None, "Validation error: deviceID must be a string"
+    if data.get("locationCoordinates") is not None and not isinstance(data["locationCoordinates"], str):
+        return None, "Validation error: locationCoordinates must be a string"
+
+    try:
+        timestamp = datetime.fromisoformat(data["timestamp"])
+    except (TypeError, ValueError):
+        return None, "Validation error: Invalid timestamp"
+    if timestamp.tzinfo is not None:
+        # Timestamps are stored as naive UTC
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    for field in NUMERIC_OBSERVATION_FIELDS:
+        value = data.get(field)
+        if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+            return None, f"Validation error: {field} must be a number"
+        if value is not None and not is_finite(value):
+            return None, f"Validation error: {field} must be a finite number"
+
+    row = {
+        "observationID": new_observation_id(),
+        "timestamp": timestamp,
+        "temperature": data.get("temperature"),
+        "humidity": data.get("humidity"),
+        "windSpeed": data.get("windSpeed"),
+        "precipitation": data.get("precipitation"),
+        "locationCoordinates": data.get("locationCoordinates"),
+        "latitude": None,
+        "longitude": None,
+        "deviceID": data.get("deviceID"),
+    }
+    # Unparseable coordinates are kept as posted but leave the reading out of region queries
+    coordinates = parse_coordinates(row["locationCoordinates"])
+    if coordinates is not None:
+        row["latitude"], row["longitude"] = coordinates
+    return row, None
+
+
+def is_finite(value):
+    """Return whether a number is neither NaN nor infinite, nor an integer too large for a float."""
+    try:
+        return math.isfinite(value)
+    except OverflowError:
+        return False
+
+
+def known_device_ids(device_ids):
+    """Return the subset of device_ids that are registered, from the in-memory device registry."""
+    return get_device_registry().known(device_ids)
+
+
+def store_observations(rows):
+    """
+    Insert observation rows with a single bulk statement and fold them into the rollups
+    and the latest-reading snapshot.
+    The caller owns the transaction and is responsible for committing.
+    Args:
+        rows (list): Row dicts as built by parse_observation.
+    """
+    if not rows:
+        return
+    # Core insert on the table: one executemany, no ORM bulk-persistence overhead
+    db.session.execute(insert(Observation.__table__), rows)
+    record_rollups(rows)
+    record_latest(rows)
+
+
+def commit_observations(rows):
+    """Commit the current transaction, then count the stored rows towards device activity."""
+    db.session.commit()
+    get_device_registry().record(rows)
@@ -0,0 +1,93 @@
+from application.models import LatestObservation, Observation, db
+from sqlalchemy import and_, delete, func, or_, select, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+
+# Observation columns copied into the latest_observation snapshot
+LATEST_COLUMNS = tuple(column.name for column in LatestObservation.__table__.columns)
+
+
+def newest_per_device(rows):
+    """
+    Reduce observation rows to the newest one per device.
+    Ties on timestamp go to the larger observationID, which is time-ordered.
+    Returns:
+        list: Row dicts with the LATEST_COLUMNS keys.
+    """
+    newest = {}
+    for row in rows:
+        if not isinstance(row, dict):
+            row = row._mapping
+        current = newest.get(row["deviceID"])
+        if current is None or (row["timestamp"], row["observationID"]) > (current["timestamp"], current["observationID"]):
+            newest[row["deviceID"]] = row
+    return [{column: row.get(column) for column in LATEST_COLUMNS} for row in newest.values()]
+
+
+def record_latest(rows):
+    """
+    Fold newly inserted observations into the per-device snapshot.
+    Runs in the caller's transaction; one upsert that only replaces older readings.
+    Args:
+        rows (list): Observation row dicts that were just inserted.
+    """
+    latest = newest_per_device(rows)
+    if not latest:
+        return
+
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "sqlite":
+        statement = sqlite.insert(LatestObservation.__table__)
+    elif dialect == "postgresql":
+        statement = postgresql.insert(LatestObservation.__table__)
+    else:
+        _merge_with_orm(latest)
+        return
+
+    table = LatestObservation.__table__
+    excluded = statement.excluded
+    statement = statement.on_conflict_do_update(
+        index_elements=["deviceID"],
+        set_={column: excluded[column] for column in LATEST_COLUMNS if column != "deviceID"},
+        # Late or replayed readings never replace a newer one
+        where=or_(
+            table.c.timestamp < excluded.timestamp,
+            and_(table.c.timestamp == excluded.timestamp, table.c.observationID < excluded.observationID),
+        ),
+    )
+    db.session.execute(statement, latest)
+
+
+def rebuild_latest():
+    """
+    Recompute the snapshot from the observation table, e.g. on a database that predates it.
+    Returns:
+        int: Number of devices in the snapshot.
+    """
+    newest = (
+        select(Observation.deviceID, func.max(Observation.timestamp).label("timestamp"))
+        .group_by(Observation.deviceID)
+        .subquery()
+    )
+    rows = db.session.execute(
+        select(*[getattr(Observation, column) for column in LATEST_COLUMNS]).join(
+            newest,
+            tuple_(Observation.deviceID, Observation.timestamp) == tuple_(newest.c.deviceID, newest.c.timestamp)
+        )
+    ).all()
+    db.session.execute(delete(LatestObservation))
+    latest = newest_per_device(rows)
+    if latest:
+        db.session.execute(LatestObservation.__table__.insert(), latest)
+    db.session.commit()
+    return len(latest)
+
+
+def _merge_with_orm(latest):
+    """Fallback merge for databases without INSERT ... ON CONFLICT."""
+    for row in latest:
+        current = db.session.get(LatestObservation, row["deviceID"])
+        if current is None:
+            db.session.add(LatestObservation(**row))
+        elif (current.timestamp, current.observationID) < (row["timestamp"], row["observationID"]):
+            for column, value in row.items():
+                setattr(current, column, value)
@@ -0,0 +1,348 @@
+"""
+Per-request instrumentation and an opt-in sampling profiler.
+
+Every request records its latency, the number and total time of the SQL
+statements it ran (from SQLAlchemy cursor events) and the time spent
+encoding rows and JSON. They are kept per worker process as Prometheus
+histograms labelled by URL rule and served as text on GET /metrics, along
+with the write-behind queue counters.
+
+With PROFILE_SLOW_REQUESTS set to a number of seconds, one background
+thread samples the stack of every request in flight, and requests slower
+than that write their samples as collapsed stacks (one "frame;frame;...
+count" line per stack) to PROFILE_DIR, ready for flamegraph.pl or
+speedscope.
+"""
+from application.extensions import db
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from flask import Response, current_app, g, has_app_context, has_request_context, request
+from sqlalchemy import event
+import os
+import sys
+import threading
+import time
+
+# Upper bounds of the histogram buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+# Seconds between stack samples of a profiled request
+PROFILE_SAMPLE_INTERVAL = 0.005
+
+# Deepest stack recorded per sample
+PROFILE_MAX_DEPTH = 128
+
+
+class Histogram:
+    """Cumulative-bucket histogram with a running count and sum."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        self.count += 1
+        self.sum += value
+
+    def lines(self, name, labels):
+        """Render the _bucket, _sum and _count samples."""
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield f'{name}_bucket{_labels(labels + (("le", _number(bound)),))} {cumulative}'
+        yield f'{name}_bucket{_labels(labels + (("le", "+Inf"),))} {self.count}'
+        yield f"{name}_sum{_labels(labels)} {_number(self.sum)}"
+        yield f"{name}_count{_labels(labels)} {self.count}"
+
+
+class Metrics:
+    """Histograms and counters of one worker process, keyed by metric name and labels."""
+
+    # name -> (type, help)
+    DESCRIPTIONS = {
+        "http_request_duration_seconds": ("histogram", "Request latency by URL rule."),
+        "http_requests_total": ("counter", "Requests by URL rule and status."),
+        "db_queries_per_request": ("histogram", "SQL statements executed per request."),
+        "db_query_seconds_per_request": ("histogram", "Total SQL execution time per request."),
+        "serialization_seconds_per_request": ("histogram", "Time spent encoding rows and JSON per request."),
+        "db_background_queries_total": ("counter", "SQL statements executed outside requests."),
+        "db_background_query_seconds_total": ("counter", "SQL execution time outside requests."),
+        "profiles_written_total": ("counter", "Slow-request profiles written to PROFILE_DIR."),
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}  # (name, labels) -> Histogram
+        self._counters = {}  # (name, labels) -> value
+
+    def observe(self, name, labels, value, buckets=LATENCY_BUCKETS):
+        with self._lock:
+            histogram = self._histograms.get((name, labels))
+            if histogram is None:
+                histogram = self._histograms[(name, labels)] = Histogram(buckets)
+            histogram.observe(value)
+
+    def inc(self, name, labels=(), amount=1):
+        with self._lock:
+            self._counters[(name, labels)] = self._counters.get((name, labels), 0) + amount
+
+    def render(self, gauges=(), counters=()):
+        """
+        Render everything in the Prometheus text format.
+        Args:
+            gauges (iterable): Extra (name, help, value) gauges to append.
+            counters (iterable): Extra (name, help, value) counters to append.
+        Returns:
+            str: The exposition text.
+        """
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counted = sorted(self._counters.items())
+        lines, described = [], set()
+
+        def describe(name, kind, text):
+            if name not in described:
+                described.add(name)
+                lines.append(f"# HELP {name} {text}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), histogram in histograms:
+            describe(name, *self.DESCRIPTIONS[name])
+            lines.extend(histogram.lines(name, labels))
+        for (name, labels), value in counted:
+            describe(name, *self.DESCRIPTIONS[name])
+            lines.append(f"{name}{_labels(labels)} {_number(value)}")
+        for kind, samples in (("counter", counters), ("gauge", gauges)):
+            for name, text, value in samples:
+                if value is not None:
+                    describe(name, kind, text)
+                    lines.append(f"{name} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class SamplingProfiler:
+    """Samples the stacks of registered threads from a single background thread."""
+
+    def __init__(self, interval=PROFILE_SAMPLE_INTERVAL):
+        self.interval = interval
+        self._active = {}  # thread id -> Counter of collapsed stacks
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def start(self, thread_id):
+        """Begin sampling a thread."""
+        with self._lock:
+            self._active[thread_id] = Counter()
+            if self._pid != os.getpid() or self._thread is None or not self._thread.is_alive():
+                # (Re)start the sampler in this process, e.g. after a gunicorn fork
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def stop(self, thread_id):
+        """
+        Stop sampling a thread.
+        Returns:
+            Counter: Collapsed stack -> number of samples.
+        """
+        with self._lock:
+            return self._active.pop(thread_id, Counter())
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while True:
+            with self._lock:
+                idle = not self._active
+                if idle:
+                    self._wake.clear()
+            if idle:
+                self._wake.wait()
+                continue
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, stacks in self._active.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None and thread_id != own_id:
+                        stacks[collapse_stack(frame)] += 1
+
+
+def collapse_stack(frame):
+    """Render a frame and its callers root first, one "function (file:line)" per frame."""
+    names = []
+    while frame is not None and len(names) < PROFILE_MAX_DEPTH:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+@contextmanager
+def serialization_timer():
+    """Add the time spent in the block to the current request's serialization time."""
+    began = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats = request_stats()
+        if stats is not None:
+            stats["serializationSeconds"] += time.perf_counter() - began
+
+
+def request_stats():
+    """
+    Return the current request's running counters.
+    Returns:
+        dict: started, queries, sqlSeconds, serializationSeconds and status, or None outside a request.
+    """
+    if has_request_context() and has_app_context():
+        return g.get("request_stats")
+    return None
+
+
+def get_metrics():
+    """Return the current app's metrics."""
+    return current_app.extensions["metrics"]
+
+
+def configure_metrics(app):
+    """Install the request hooks, SQL event listeners, profiler and GET /metrics on the app."""
+    if not app.config.get("METRICS_ENABLED", True):
+        return
+    metrics = app.extensions["metrics"] = Metrics()
+    slow_seconds = app.config.get("PROFILE_SLOW_REQUESTS")
+    profiler = SamplingProfiler(app.config.get("PROFILE_SAMPLE_INTERVAL", PROFILE_SAMPLE_INTERVAL)) if slow_seconds else None
+
+    with app.app_context():
+        for engine in db.engines.values():
+            _count_queries(engine, metrics)
+
+    @app.before_request
+    def start_request_metrics():
+        g.request_stats = {
+            "started": time.perf_counter(),
+            "queries": 0,
+            "sqlSeconds": 0.0,
+            "serializationSeconds": 0.0,
+            "status": 500,
+        }
+        if profiler is not None:
+            profiler.start(threading.get_ident())
+
+    @app.after_request
+    def remember_status(response):
+        stats = request_stats()
+        if stats is not None:
+            stats["status"] = response.status_code
+        return response
+
+    # Runs once a streamed response has finished, so its latency includes the body
+    @app.teardown_request
+    def record_request_metrics(exc):
+        stacks = profiler.stop(threading.get_ident()) if profiler is not None else None
+        stats = request_stats()
+        if stats is None:
+            return
+        elapsed = time.perf_counter() - stats["started"]
+        rule = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        labels = (("endpoint", rule), ("method", request.method))
+        metrics.observe("http_request_duration_seconds", labels, elapsed)
+        metrics.inc("http_requests_total", labels + (("status", str(stats["status"])),))
+        metrics.observe("db_queries_per_request", labels, stats["queries"], QUERY_COUNT_BUCKETS)
+        metrics.observe("db_query_seconds_per_request", labels, stats["sqlSeconds"])
+        metrics.observe("serialization_seconds_per_request", labels, stats["serializationSeconds"])
+        if stacks and elapsed >= slow_seconds:
+            _write_profile(app, stacks, elapsed)
+            metrics.inc("profiles_written_total")
+
+    app.add_url_rule("/metrics", "metrics", _serve_metrics)
+
+
+def _serve_metrics():
+    """Prometheus text exposition of this worker's metrics."""
+    gauges, counters = [], []
+    write_queue = current_app.extensions.get("write_behind_queue")
+    if write_queue is not None:
+        stats = write_queue.stats()
+        counters = [
+            ("write_behind_accepted_total", "Readings queued.", stats["accepted"]),
+            ("write_behind_rejected_total", "Readings refused because the queue was full.", stats["rejected"]),
+            ("write_behind_written_total", "Readings committed.", stats["written"]),
+            ("write_behind_failed_total", "Readings lost to failed flushes.", stats["failed"]),
+            ("write_behind_batches_total", "Group commits.", stats["batches"]),
+        ]
+        gauges = [
+            ("write_behind_queue_depth", "Readings waiting to be written.", stats["depth"]),
+            ("write_behind_queue_capacity", "Readings the queue can hold.", stats["capacity"]),
+            ("write_behind_flush_seconds_max", "Slowest group commit.", stats["maxFlushSeconds"]),
+            ("write_behind_flush_seconds_avg", "Average group commit.", stats["avgFlushSeconds"]),
+        ]
+    return Response(get_metrics().render(gauges, counters), mimetype="text/plain; version=0.0.4")
+
+
+def _count_queries(engine, metrics):
+    """Time every statement on the engine, charging it to the current request if there is one."""
+    # Keyed per Metrics instance, so apps sharing an engine keep separate start times
+    started_key = ("metrics_query_started", id(metrics))
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault(started_key, []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get(started_key)
+        if not started:
+            return
+        elapsed = time.perf_counter() - started.pop()
+        stats = request_stats()
+        if stats is not None:
+            stats["queries"] += 1
+            stats["sqlSeconds"] += elapsed
+        else:
+            metrics.inc("db_background_queries_total")
+            metrics.inc("db_background_query_seconds_total", amount=elapsed)
+
+    # A failed statement never reaches after_cursor_execute; drop its start time
+    # so it is not charged to the next statement on this pooled connection
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        if context.connection is not None:
+            context.connection.info.pop(started_key, None)
+
+
+def _write_profile(app, stacks, elapsed):
+    """Write a slow request's samples as collapsed stacks."""
+    directory = app.config.get("PROFILE_DIR") or os.path.join(app.instance_path, "profiles")
+    os.makedirs(directory, exist_ok=True)
+    rule = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    name = f"{datetime.utcnow():%Y%m%dT%H%M%S%f}-{request.method}-{rule.replace('/', '_').strip('_') or 'root'}.folded"
+    path = os.path.join(directory, name)
+    with open(path, "w") as profile:
+        profile.writelines(f"{stack} {count}\n" for stack, count in stacks.most_common())
+    app.logger.info("Profiled %s %s (%.3fs) to %s", request.method, request.path, elapsed, path)
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
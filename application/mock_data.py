@@ -0,0 +1,100 @@
+from application.ingest import new_observation_ids, store_observations, commit_observations
+from datetime import datetime, timedelta
+import random
+
+try:  # Optional: vectorized column generation
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without numpy
+    np = None
+
+# Rows generated and inserted per batch
+MOCK_BATCH_SIZE = 10000
+
+# Value ranges for generated readings: (low, high, decimals)
+MOCK_RANGES = {
+    "temperature": (-10, 40, 2),
+    "humidity": (0, 100, 2),
+    "windSpeed": (0, 20, 2),
+    "precipitation": (0, 10, 2),
+    "latitude": (-90, 90, 6),
+    "longitude": (-180, 180, 6),
+}
+
+# Readings are spread over the last day
+MOCK_WINDOW_MINUTES = 1440
+
+
+def generate_columns(size, now, rng):
+    """
+    Build one batch of mock readings column by column.
+    Uses NumPy when it is installed, otherwise plain lists.
+    Returns:
+        dict: Column name -> list of Python values, each of length size.
+    """
+    if np is not None:
+        columns = {
+            name: np.round(rng.uniform(low, high, size), decimals).tolist()
+            for name, (low, high, decimals) in MOCK_RANGES.items()
+        }
+        minutes = rng.integers(0, MOCK_WINDOW_MINUTES + 1, size)
+        columns["timestamp"] = (np.datetime64(now, "us") - minutes.astype("timedelta64[m]")).tolist()
+        return columns
+
+    columns = {
+        name: [round(rng.uniform(low, high), decimals) for _ in range(size)]
+        for name, (low, high, decimals) in MOCK_RANGES.items()
+    }
+    columns["timestamp"] = [now - timedelta(minutes=rng.randint(0, MOCK_WINDOW_MINUTES)) for _ in range(size)]
+    return columns
+
+
+def generate_observation_batches(device_ids, count, batch_size=MOCK_BATCH_SIZE, seed=None):
+    """
+    Yield mock observation rows in fixed-size batches.
+    Args:
+        device_ids (list): Devices to generate readings for.
+        count (int): Readings per device.
+        batch_size (int): Rows per yielded batch.
+        seed (int, optional): Seed for reproducible data.
+    Yields:
+        list: Row dicts ready for store_observations.
+    """
+    rng = np.random.default_rng(seed) if np is not None else random.Random(seed)
+    now = datetime.utcnow()
+    total = len(device_ids) * count
+    for offset in range(0, total, batch_size):
+        size = min(batch_size, total - offset)
+        columns = generate_columns(size, now, rng)
+        yield [
+            {
+                "observationID": observation_id,
+                "timestamp": timestamp,
+                "temperature": temperature,
+                "humidity": humidity,
+                "windSpeed": wind_speed,
+                "precipitation": precipitation,
+                "locationCoordinates": f"{latitude}, {longitude}",
+                "latitude": latitude,
+                "longitude": longitude,
+                # Readings are laid out device by device
+                "deviceID": device_ids[(offset + i) // count],
+            }
+            for i, (observation_id, timestamp, temperature, humidity, wind_speed, precipitation, latitude, longitude) in enumerate(zip(
+                new_observation_ids(size), columns["timestamp"], columns["temperature"], columns["humidity"], columns["windSpeed"],
+                columns["precipitation"], columns["latitude"], columns["longitude"]
+            ))
+        ]
+
+
+def seed_observations(device_ids, count, batch_size=MOCK_BATCH_SIZE, seed=None):
+    """
+    Generate and insert mock observations, committing once per batch so memory stays bounded.
+    Returns:
+        int: Number of observations inserted.
+    """
+    inserted = 0
+    for batch in generate_observation_batches(device_ids, count, batch_size, seed):
+        store_observations(batch)
+        commit_observations(batch)
+        inserted += len(batch)
+    return inserted
@@ -1,4 +1,4 @@
-from app import db
+from application.extensions import db
 from datetime import datetime
 
 # Mixin for adding timestamps
@@ -46,7 +46,7 @@ class Institution(TimestampMixin, db.Model):
 class APIAccess(TimestampMixin, db.Model):
     __tablename__ = 'api_access'
     accessID = db.Column(db.String, primary_key=True)
-    token = db.Column(db.String, nullable=False)
+    token = db.Column(db.String, nullable=False, unique=True, index=True)
     expirationDate = db.Column(db.DateTime, nullable=False)
 
     # Foreign Keys
@@ -62,10 +62,63 @@ class Observation(TimestampMixin, db.Model):
     windSpeed = db.Column(db.Float, nullable=True)
     precipitation = db.Column(db.Float, nullable=True)
     locationCoordinates = db.Column(db.String, nullable=True)
+    latitude = db.Column(db.Float, nullable=True)  # Parsed from locationCoordinates
+    longitude = db.Column(db.Float, nullable=True)
 
     # Foreign Keys
     deviceID = db.Column(db.String, db.ForeignKey('iot_device.deviceID'), nullable=False)
 
+    # Time-series access paths: per-device range scans and global time ranges; region queries
+    __table_args__ = (
+        db.Index('ix_observation_device_timestamp', 'deviceID', 'timestamp'),
+        db.Index('ix_observation_timestamp', 'timestamp'),
+        db.Index('ix_observation_lat_lon', 'latitude', 'longitude'),
+    )
+
+# ObservationRollup Model: per-device pre-aggregates at minute, hour and day resolution
+class ObservationRollup(db.Model):
+    __tablename__ = 'observation_rollup'
+    deviceID = db.Column(db.String, db.ForeignKey('iot_device.deviceID'), primary_key=True)
+    resolution = db.Column(db.String, primary_key=True)  # 'minute', 'hour' or 'day'
+    bucketStart = db.Column(db.DateTime, primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    # Per-field count/sum/min/max; counts differ from `count` for nullable fields
+    temperatureCount = db.Column(db.Integer, nullable=False, default=0)
+    temperatureSum = db.Column(db.Float, nullable=True)
+    temperatureMin = db.Column(db.Float, nullable=True)
+    temperatureMax = db.Column(db.Float, nullable=True)
+    humidityCount = db.Column(db.Integer, nullable=False, default=0)
+    humiditySum = db.Column(db.Float, nullable=True)
+    humidityMin = db.Column(db.Float, nullable=True)
+    humidityMax = db.Column(db.Float, nullable=True)
+    windSpeedCount = db.Column(db.Integer, nullable=False, default=0)
+    windSpeedSum = db.Column(db.Float, nullable=True)
+    windSpeedMin = db.Column(db.Float, nullable=True)
+    windSpeedMax = db.Column(db.Float, nullable=True)
+    precipitationCount = db.Column(db.Integer, nullable=False, default=0)
+    precipitationSum = db.Column(db.Float, nullable=True)
+    precipitationMin = db.Column(db.Float, nullable=True)
+    precipitationMax = db.Column(db.Float, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_observation_rollup_resolution_bucket', 'resolution', 'bucketStart'),
+    )
+
+# LatestObservation Model: the newest reading of each device, maintained on write
+class LatestObservation(db.Model):
+    __tablename__ = 'latest_observation'
+    deviceID = db.Column(db.String, db.ForeignKey('iot_device.deviceID'), primary_key=True)
+    observationID = db.Column(db.String, nullable=False)
+    timestamp = db.Column(db.DateTime, nullable=False)
+    temperature = db.Column(db.Float, nullable=False)
+    humidity = db.Column(db.Float, nullable=False)
+    windSpeed = db.Column(db.Float, nullable=True)
+    precipitation = db.Column(db.Float, nullable=True)
+    locationCoordinates = db.Column(db.String, nullable=True)
+    latitude = db.Column(db.Float, nullable=True)
+    longitude = db.Column(db.Float, nullable=True)
+
 # IoTDevice Model
 class IoTDevice(TimestampMixin, db.Model):
     __tablename__ = 'iot_device'
@@ -74,6 +127,10 @@ class IoTDevice(TimestampMixin, db.Model):
     batteryStatus = db.Column(db.String, nullable=False)
     transmissionInterval = db.Column(db.Integer, nullable=False)
 
+    # Activity, flushed in batches from the in-memory device registry
+    lastSeen = db.Column(db.DateTime, nullable=True)  # Timestamp of the newest reading
+    observationCount = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
     # Relationships
     observations = db.relationship('Observation', backref='iot_device', lazy=True)
 
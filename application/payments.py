@@ -0,0 +1,91 @@
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+import asyncio
+import functools
+
+# Default pooled-connection and timeout settings for Stripe calls
+STRIPE_HTTP_POOL_SIZE = 16
+STRIPE_TIMEOUT = 30  # seconds
+
+
+class StripeClient:
+    """
+    Payment client layer over the Stripe SDK.
+    Reuses one pooled, keep-alive HTTP session for every call, can be pointed
+    at a local Stripe stand-in through api_base, and exposes awaitable
+    variants of each call that run on a bounded thread pool so an async or
+    ASGI caller never blocks its event loop.
+    """
+
+    def __init__(self, api_key, api_base=None, pool_size=STRIPE_HTTP_POOL_SIZE, timeout=STRIPE_TIMEOUT):
+        self.api_key = api_key
+        self.api_base = api_base
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._stripe = None
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="stripe")
+
+    @property
+    def stripe(self):
+        """The configured Stripe SDK module, imported on first use."""
+        if self._stripe is None:
+            import requests
+            import stripe
+
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+
+            stripe.api_key = self.api_key
+            if self.api_base:
+                stripe.api_base = self.api_base
+            stripe.default_http_client = stripe.http_client.RequestsClient(timeout=self.timeout, session=session)
+            self._stripe = stripe
+        return self._stripe
+
+    def create_customer(self, email, name):
+        """Create a Stripe customer."""
+        return self.stripe.Customer.create(email=email, name=name)
+
+    def create_checkout_session(self, **params):
+        """Create a Stripe Checkout session."""
+        return self.stripe.checkout.Session.create(**params)
+
+    def retrieve_checkout_session(self, session_id):
+        """Fetch a Stripe Checkout session by ID."""
+        return self.stripe.checkout.Session.retrieve(session_id)
+
+    async def create_customer_async(self, email, name):
+        """Awaitable create_customer."""
+        return await self._run(self.create_customer, email, name)
+
+    async def create_checkout_session_async(self, **params):
+        """Awaitable create_checkout_session."""
+        return await self._run(self.create_checkout_session, **params)
+
+    async def retrieve_checkout_session_async(self, session_id):
+        """Awaitable retrieve_checkout_session."""
+        return await self._run(self.retrieve_checkout_session, session_id)
+
+    async def _run(self, call, *args, **kwargs):
+        """Run a blocking SDK call on the client's thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(call, *args, **kwargs))
+
+    def close(self):
+        """Release the thread pool."""
+        self._executor.shutdown(wait=False)
+
+
+def get_payment_client():
+    """Return the current app's payment client, creating it on first use."""
+    client = current_app.extensions.get("payment_client")
+    if client is None:
+        client = current_app.extensions["payment_client"] = StripeClient(
+            api_key=current_app.config.get("STRIPE_SECRET_KEY"),
+            api_base=current_app.config.get("STRIPE_API_BASE"),
+            pool_size=current_app.config.get("STRIPE_HTTP_POOL_SIZE", STRIPE_HTTP_POOL_SIZE),
+            timeout=current_app.config.get("STRIPE_TIMEOUT", STRIPE_TIMEOUT),
+        )
+    return client
@@ -0,0 +1,221 @@
+"""
+Query budgets: count and time the SQL a block of code runs.
+
+`record_queries()` collects every statement executed on an engine while
+it is active. `query_budget(max_queries)` does the same and raises
+QueryBudgetExceeded when the block goes over its budget, with a report
+that lists the statements, the ones that ran more than once (the usual
+sign of an N+1 loop) and, on SQLite, the ones whose plan scans a whole
+table. Tests use it through the `query_budget` fixture; in development,
+QUERY_BUDGET_WARN logs the same report for any request over that many
+statements.
+"""
+from application.extensions import db
+from collections import Counter
+from contextlib import contextmanager
+from flask import g, has_app_context, has_request_context, request
+from sqlalchemy import event
+import time
+
+# Statement prefixes worth running EXPLAIN QUERY PLAN on
+EXPLAINABLE = ("SELECT", "WITH", "UPDATE", "DELETE")
+
+# Statements are shortened to this many characters in reports
+REPORT_STATEMENT_LENGTH = 200
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A block ran more SQL statements, or spent longer in SQL, than its budget."""
+
+
+class QueryRecorder:
+    """Statements executed on an engine while recording, with their parameters and durations."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.queries = []  # (statement, parameters, seconds, executemany)
+        # Start times live on the connection under a key of this recorder's own,
+        # so nested recorders on the same connection never share them
+        self._started_key = ("query_budget_started", id(self))
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def seconds(self):
+        return sum(seconds for _, _, seconds, _ in self.queries)
+
+    def start(self):
+        event.listen(self.engine, "before_cursor_execute", self._before)
+        event.listen(self.engine, "after_cursor_execute", self._after)
+        event.listen(self.engine, "handle_error", self._error)
+
+    def stop(self):
+        event.remove(self.engine, "before_cursor_execute", self._before)
+        event.remove(self.engine, "after_cursor_execute", self._after)
+        event.remove(self.engine, "handle_error", self._error)
+
+    def duplicates(self):
+        """
+        Statements run more than once.
+        Returns:
+            list: (statement, times run, times with identical parameters) tuples, most frequent first.
+        """
+        statements = Counter(statement for statement, _, _, _ in self.queries)
+        identical = Counter((statement, repr(parameters)) for statement, parameters, _, _ in self.queries)
+        repeats = Counter()
+        for (statement, _), times in identical.items():
+            if times > 1:
+                repeats[statement] += times
+        return [
+            (statement, times, repeats[statement])
+            for statement, times in statements.most_common()
+            if times > 1
+        ]
+
+    def unindexed(self):
+        """
+        Statements whose SQLite query plan scans a whole table.
+        Returns:
+            list: (statement, plan detail) pairs; empty on other databases.
+        """
+        if self.engine.dialect.name != "sqlite":
+            return []
+        found, seen = [], set()
+        with self.engine.connect() as conn:
+            for statement, parameters, _, executemany in self.queries:
+                if executemany or statement in seen or not statement.lstrip().upper().startswith(EXPLAINABLE):
+                    continue
+                seen.add(statement)
+                plan = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+                found.extend(
+                    (statement, row[-1]) for row in plan
+                    if row[-1].startswith("SCAN ") and " USING " not in row[-1] and row[-1] != "SCAN CONSTANT ROW"
+                )
+        return found
+
+    def report(self):
+        """Readable summary of the recorded statements, repeats and full scans."""
+        lines = [f"{self.count} statement(s) in {self.seconds * 1000:.2f} ms"]
+        for index, (statement, _, seconds, executemany) in enumerate(self.queries, 1):
+            lines.append(f"  {index}. [{seconds * 1000:.2f} ms{', executemany' if executemany else ''}] {_one_line(statement)}")
+        duplicates = self.duplicates()
+        if duplicates:
+            lines.append("Repeated statements:")
+            lines.extend(
+                f"  {times}x ({identical} with identical parameters) {_one_line(statement)}"
+                for statement, times, identical in duplicates
+            )
+        unindexed = self.unindexed()
+        if unindexed:
+            lines.append("Full table scans:")
+            lines.extend(f"  {detail}: {_one_line(statement)}" for statement, detail in unindexed)
+        return "\n".join(lines)
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault(self._started_key, []).append(time.perf_counter())
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get(self._started_key)
+        if not started:
+            return  # began before this recorder started
+        seconds = time.perf_counter() - started.pop()
+        if not started:
+            del conn.info[self._started_key]
+        self.queries.append((statement, parameters, seconds, executemany))
+
+    def _error(self, context):
+        # A failed statement never reaches after_cursor_execute; drop its start time
+        # so it is not charged to the next statement on this pooled connection
+        if context.connection is not None:
+            context.connection.info.pop(self._started_key, None)
+
+
+@contextmanager
+def record_queries(engine=None):
+    """
+    Record the statements executed on an engine inside the block.
+    Args:
+        engine (Engine, optional): Defaults to the current app's db.engine.
+    Yields:
+        QueryRecorder: The statements recorded so far.
+    """
+    recorder = QueryRecorder(engine if engine is not None else db.engine)
+    recorder.start()
+    try:
+        yield recorder
+    finally:
+        recorder.stop()
+
+
+@contextmanager
+def query_budget(max_queries, max_seconds=None, engine=None):
+    """
+    Fail if the block executes more than max_queries statements or spends more than max_seconds in SQL.
+    Raises:
+        QueryBudgetExceeded: With the recorder's report.
+    """
+    with record_queries(engine) as recorder:
+        yield recorder
+    if recorder.count > max_queries:
+        raise QueryBudgetExceeded(f"Query budget of {max_queries} exceeded\n{recorder.report()}")
+    if max_seconds is not None and recorder.seconds > max_seconds:
+        raise QueryBudgetExceeded(f"Query time budget of {max_seconds}s exceeded\n{recorder.report()}")
+
+
+def configure_query_budget(app):
+    """Log the query report of every request that runs more than QUERY_BUDGET_WARN statements."""
+    limit = app.config.get("QUERY_BUDGET_WARN")
+    if not limit:
+        return
+
+    def current_recorder():
+        if has_request_context() and has_app_context():
+            return g.get("query_recorder")
+        return None
+
+    # One set of listeners for all requests; each statement goes to its own request's recorder
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        recorder = current_recorder()
+        if recorder is not None:
+            recorder._before(conn, cursor, statement, parameters, context, executemany)
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        recorder = current_recorder()
+        if recorder is not None:
+            recorder._after(conn, cursor, statement, parameters, context, executemany)
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        recorder = current_recorder()
+        if recorder is not None:
+            recorder._error(context)
+
+    @app.before_request
+    def start_query_recorder():
+        g.query_recorder = QueryRecorder(engine)
+
+    @app.teardown_request
+    def check_query_budget(exc):
+        recorder = current_recorder()
+        if recorder is None:
+            return
+        g.pop("query_recorder")
+        if recorder.count > limit:
+            app.logger.warning(
+                "%s %s ran %d statements (budget %d)\n%s",
+                request.method, request.path, recorder.count, limit, recorder.report()
+            )
+
+
+def _one_line(statement):
+    statement = " ".join(statement.split())
+    if len(statement) > REPORT_STATEMENT_LENGTH:
+        statement = statement[:REPORT_STATEMENT_LENGTH - 3] + "..."
+    return statement
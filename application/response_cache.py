@@ -0,0 +1,111 @@
+"""
+Response caching with ETags for read-mostly GET routes.
+
+A cached route stores its encoded 200 response per path and query string.
+Every response carries a strong ETag, and clients that send it back in
+If-None-Match get an empty 304. Write handlers invalidate a namespace,
+which retires every cached response in it at once, in every worker
+when the shared cache backend is configured. Responses in PRIVATE_NAMESPACES
+contain API tokens and are only ever cached in the worker's own memory.
+"""
+from application.cache import Cache
+from application.ids import new_id
+from flask import current_app, request
+from functools import wraps
+import hashlib
+
+# Response cache sizing; with per-worker caches the TTL bounds staleness from other workers' writes
+RESPONSE_CACHE_SIZE = 1024
+RESPONSE_CACHE_TTL = 60  # seconds
+
+# Generations only change on invalidation, so they can be kept much longer
+RESPONSE_GENERATION_TTL = 86400  # seconds
+
+# Namespaces whose responses hold secrets and are kept out of the shared store
+PRIVATE_NAMESPACES = ("api_access",)
+
+
+class ResponseCache:
+    """
+    Encoded responses grouped into namespaces.
+    Each namespace has a generation that is part of every key. Invalidating a
+    namespace drops its generation in every worker, so the next request starts
+    a new one and stale entries are never served; they age out of the LRU.
+    """
+
+    def __init__(self, maxsize=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL, store=None):
+        self._entries = Cache("responses", maxsize=maxsize, ttl=ttl, store=store)
+        self._private_entries = Cache("private_responses", maxsize=maxsize, ttl=ttl, store=store, share_values=False)
+        self._generations = Cache("response_generations", ttl=RESPONSE_GENERATION_TTL, store=store)
+
+    def key(self, namespace, path, args):
+        """Build the cache key for a request."""
+        generation = self._generations.get(namespace)
+        if generation is None:
+            generation = new_id()
+            self._generations.set(namespace, generation)
+        return (namespace, generation, path, tuple(sorted(args.items(multi=True))))
+
+    def get(self, key):
+        """Return (body, mimetype, etag), or None."""
+        return self._entries_for(key).get(key)
+
+    def set(self, key, body, mimetype):
+        """Store an encoded response and return its ETag."""
+        etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+        self._entries_for(key).set(key, (body, mimetype, etag))
+        return etag
+
+    def invalidate(self, *namespaces):
+        """Retire every cached response in the given namespaces."""
+        for namespace in namespaces:
+            self._generations.pop(namespace)
+
+    def _entries_for(self, key):
+        return self._private_entries if key[0] in PRIVATE_NAMESPACES else self._entries
+
+
+def get_response_cache():
+    """Return the current app's response cache, creating it on first use."""
+    cache = current_app.extensions.get("response_cache")
+    if cache is None:
+        cache = current_app.extensions["response_cache"] = ResponseCache(
+            maxsize=current_app.config.get("RESPONSE_CACHE_SIZE", RESPONSE_CACHE_SIZE),
+            ttl=current_app.config.get("RESPONSE_CACHE_TTL", RESPONSE_CACHE_TTL),
+            store=current_app.extensions.get("cache_store"),
+        )
+    return cache
+
+
+def invalidate_responses(*namespaces):
+    """Drop cached responses after a write; call once the change is committed."""
+    get_response_cache().invalidate(*namespaces)
+
+
+def cached_response(namespace):
+    """
+    Cache a GET view's 200 responses and answer conditional requests.
+    Args:
+        namespace (str): Group invalidated together by the resource's write handlers.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            cache = get_response_cache()
+            key = cache.key(namespace, request.path, request.args)
+            cached = cache.get(key)
+            if cached is not None:
+                body, mimetype, etag = cached
+                response = current_app.response_class(body, mimetype=mimetype)
+            else:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                etag = cache.set(key, response.get_data(), response.mimetype)
+
+            response.set_etag(etag)
+            # Clients may keep the body but must revalidate before reusing it
+            response.cache_control.no_cache = True
+            return response.make_conditional(request)
+        return wrapper
+    return decorator
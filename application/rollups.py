@@ -0,0 +1,189 @@
+from application.models import Observation, ObservationRollup, db
+from sqlalchemy import case, delete, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+# Rollup resolutions and their width in seconds, coarsest first
+ROLLUP_RESOLUTIONS = (("day", 86400), ("hour", 3600), ("minute", 60))
+
+# Observation fields kept in the rollups
+ROLLUP_FIELDS = ("temperature", "humidity", "windSpeed", "precipitation")
+
+# Rows read per chunk while rebuilding
+REBUILD_CHUNK_SIZE = 10000
+
+PRIMARY_KEY = ("deviceID", "resolution", "bucketStart")
+
+
+def truncate(timestamp, resolution):
+    """Return the start of the rollup bucket that holds timestamp."""
+    timestamp = timestamp.replace(second=0, microsecond=0)
+    if resolution in ("hour", "day"):
+        timestamp = timestamp.replace(minute=0)
+    if resolution == "day":
+        timestamp = timestamp.replace(hour=0)
+    return timestamp
+
+
+def summarize(rows):
+    """
+    Fold observation rows into rollup deltas, one per (device, resolution, bucket).
+    Rows are folded into minute buckets first; hour and day buckets are then
+    built from the minute deltas, which are far fewer than the rows.
+    Args:
+        rows (iterable): Observation row dicts or rows with matching attributes.
+    Returns:
+        list: Rollup row dicts ready to be merged into observation_rollup.
+    """
+    minutes = {}
+    for row in rows:
+        if not isinstance(row, dict):
+            row = row._mapping
+        key = (row["deviceID"], "minute", row["timestamp"].replace(second=0, microsecond=0))
+        delta = minutes.get(key)
+        if delta is None:
+            delta = minutes[key] = _empty_delta(key)
+        delta["count"] += 1
+        for field in ROLLUP_FIELDS:
+            value = row[field]
+            if value is None:
+                continue
+            delta[f"{field}Count"] += 1
+            if delta[f"{field}Sum"] is None:
+                delta[f"{field}Sum"] = delta[f"{field}Min"] = delta[f"{field}Max"] = value
+            else:
+                delta[f"{field}Sum"] += value
+                if value < delta[f"{field}Min"]:
+                    delta[f"{field}Min"] = value
+                elif value > delta[f"{field}Max"]:
+                    delta[f"{field}Max"] = value
+
+    deltas = list(minutes.values())
+    for resolution in ("hour", "day"):
+        coarser = {}
+        for delta in minutes.values():
+            key = (delta["deviceID"], resolution, truncate(delta["bucketStart"], resolution))
+            if key in coarser:
+                _combine(coarser[key], delta)
+            else:
+                coarser[key] = dict(delta, resolution=resolution, bucketStart=key[2])
+        deltas.extend(coarser.values())
+    return deltas
+
+
+def _combine(target, delta):
+    """Merge one rollup delta into another in place."""
+    target["count"] += delta["count"]
+    for field in ROLLUP_FIELDS:
+        if delta[f"{field}Sum"] is None:
+            continue
+        target[f"{field}Count"] += delta[f"{field}Count"]
+        if target[f"{field}Sum"] is None:
+            target[f"{field}Sum"] = delta[f"{field}Sum"]
+            target[f"{field}Min"] = delta[f"{field}Min"]
+            target[f"{field}Max"] = delta[f"{field}Max"]
+        else:
+            target[f"{field}Sum"] += delta[f"{field}Sum"]
+            target[f"{field}Min"] = min(target[f"{field}Min"], delta[f"{field}Min"])
+            target[f"{field}Max"] = max(target[f"{field}Max"], delta[f"{field}Max"])
+
+
+def record_rollups(rows):
+    """
+    Merge newly inserted observations into the rollup tables.
+    Runs in the caller's transaction; one upsert statement for all buckets touched.
+    Args:
+        rows (list): Observation row dicts that were just inserted.
+    """
+    deltas = summarize(rows)
+    if not deltas:
+        return
+
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "sqlite":
+        statement = sqlite.insert(ObservationRollup.__table__)
+    elif dialect == "postgresql":
+        statement = postgresql.insert(ObservationRollup.__table__)
+    else:
+        _merge_with_orm(deltas)
+        return
+
+    table = ObservationRollup.__table__
+    excluded = statement.excluded
+    merged = {"count": table.c["count"] + excluded["count"]}
+    for field in ROLLUP_FIELDS:
+        merged[f"{field}Count"] = table.c[f"{field}Count"] + excluded[f"{field}Count"]
+        merged[f"{field}Sum"] = _merge_value(table.c[f"{field}Sum"], excluded[f"{field}Sum"], "sum")
+        merged[f"{field}Min"] = _merge_value(table.c[f"{field}Min"], excluded[f"{field}Min"], "min")
+        merged[f"{field}Max"] = _merge_value(table.c[f"{field}Max"], excluded[f"{field}Max"], "max")
+    statement = statement.on_conflict_do_update(index_elements=list(PRIMARY_KEY), set_=merged)
+    db.session.execute(statement, deltas)
+
+
+def rebuild_rollups(since=None):
+    """
+    Recompute the rollups from the observation table, e.g. after a backfill.
+    Args:
+        since (datetime, optional): Only rebuild from the start of this day onwards.
+    Returns:
+        int: Number of observations folded into the rollups.
+    """
+    delete_query = delete(ObservationRollup)
+    source = select(
+        Observation.deviceID,
+        Observation.timestamp,
+        *[getattr(Observation, field) for field in ROLLUP_FIELDS]
+    )
+    if since:
+        since = truncate(since, "day")
+        delete_query = delete_query.where(ObservationRollup.bucketStart >= since)
+        source = source.where(Observation.timestamp >= since)
+    db.session.execute(delete_query)
+
+    # Read in chunks ordered by time so a bucket is rarely split across chunks
+    total = 0
+    result = db.session.execute(
+        source.order_by(Observation.timestamp).execution_options(yield_per=REBUILD_CHUNK_SIZE)
+    )
+    for partition in result.partitions():
+        record_rollups(partition)
+        total += len(partition)
+    db.session.commit()
+    return total
+
+
+def _empty_delta(key):
+    """Start a zeroed rollup row for a bucket."""
+    delta = dict(zip(PRIMARY_KEY, key))
+    delta["count"] = 0
+    for field in ROLLUP_FIELDS:
+        delta[f"{field}Count"] = 0
+        delta[f"{field}Sum"] = delta[f"{field}Min"] = delta[f"{field}Max"] = None
+    return delta
+
+
+def _merge_value(existing, incoming, operation):
+    """SQL expression combining a stored statistic with an incoming one, ignoring NULLs."""
+    if operation == "sum":
+        combined = existing + incoming
+    elif operation == "min":
+        combined = case((incoming < existing, incoming), else_=existing)
+    else:
+        combined = case((incoming > existing, incoming), else_=existing)
+    return case((existing.is_(None), incoming), (incoming.is_(None), existing), else_=combined)
+
+
+def _merge_with_orm(deltas):
+    """Fallback merge for databases without INSERT ... ON CONFLICT."""
+    for delta in deltas:
+        rollup = db.session.get(ObservationRollup, tuple(delta[column] for column in PRIMARY_KEY))
+        if rollup is None:
+            db.session.add(ObservationRollup(**delta))
+            continue
+        rollup.count += delta["count"]
+        for field in ROLLUP_FIELDS:
+            setattr(rollup, f"{field}Count", getattr(rollup, f"{field}Count") + delta[f"{field}Count"])
+            for statistic, combine in (("Sum", lambda a, b: a + b), ("Min", min), ("Max", max)):
+                name = f"{field}{statistic}"
+                current, incoming = getattr(rollup, name), delta[name]
+                if incoming is not None:
+                    setattr(rollup, name, incoming if current is None else combine(current, incoming))
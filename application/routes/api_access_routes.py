@@ -1,6 +1,10 @@
 from flask import Blueprint, request
 from application.models import APIAccess, Institution, db
 from application.utils import ResponseHelper
+from application.serializers import api_token_serializer
+from application.response_cache import cached_response, invalidate_responses
+from application.cache import get_api_token_cache
+from application.ids import new_id
 from datetime import datetime, timedelta
 import uuid
 
@@ -19,18 +23,19 @@ def generate_api_token():
     if not institution:
         return ResponseHelper.default_response("Institution not found", 404)
 
-    # Generate API token
+    # Generate API token (random, not time-ordered, so it cannot be guessed)
     token = str(uuid.uuid4())
     expiration_date = datetime.utcnow() + timedelta(days=expiration_days)
 
     api_access = APIAccess(
-        accessID=str(uuid.uuid4()),
+        accessID=new_id(),
         token=token,
         expirationDate=expiration_date,
         institutionID=institution_id
     )
     db.session.add(api_access)
     db.session.commit()
+    invalidate_responses("api_access")
 
     return ResponseHelper.default_response(
         "API token generated successfully",
@@ -44,6 +49,7 @@ def generate_api_token():
 
 # Get All API Tokens
 @api_access_bp.route('/', methods=['GET'])
+@cached_response("api_access")
 def get_api_tokens():
     """Retrieve all API tokens for an institution."""
     institution_id = request.args.get('institutionID')
@@ -54,15 +60,9 @@ def get_api_tokens():
         return ResponseHelper.default_response("Institution not found", 404)
 
     # Retrieve tokens
-    tokens = APIAccess.query.filter_by(institutionID=institution_id).all()
-    data = [
-        {
-            "accessID": token.accessID,
-            "token": token.token,
-            "expirationDate": token.expirationDate.isoformat()
-        }
-        for token in tokens
-    ]
+    data = api_token_serializer.dump_many(db.session.execute(
+        api_token_serializer.select().where(APIAccess.institutionID == institution_id)
+    ))
 
     return ResponseHelper.default_response(
         "API tokens retrieved successfully",
@@ -81,5 +81,7 @@ def revoke_api_token(access_id):
 
     db.session.delete(api_access)
     db.session.commit()
+    get_api_token_cache().pop(api_access.token)
+    invalidate_responses("api_access")
 
     return ResponseHelper.default_response("API token revoked successfully", 200)
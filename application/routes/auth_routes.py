@@ -4,6 +4,7 @@ from application.models import Administrator, Customer, db
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 import datetime
 from application.utils import ResponseHelper  # Import the helper class
+from application.ids import new_id
 import json  # Import JSON for serialization and deserialization
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/auth')
@@ -42,7 +43,7 @@ def register():
     # Create an administrator
     elif role == "administrator":
         user = Administrator(
-            adminID=f"admin-{datetime.datetime.utcnow().timestamp()}",
+            adminID=new_id("admin"),
             name=username,
             email=email,
             permissions="full_access",
@@ -1,7 +1,9 @@
 from flask import Blueprint, request
 from application.models import Institution, db
 from application.utils import ResponseHelper
-import uuid
+from application.serializers import institution_serializer
+from application.response_cache import cached_response, invalidate_responses
+from application.ids import new_id
 
 institution_bp = Blueprint('institution', __name__, url_prefix='/institutions')
 
@@ -22,12 +24,13 @@ def create_institution():
 
     # Create institution
     institution = Institution(
-        institutionID=str(uuid.uuid4()),
+        institutionID=new_id(),
         name=name,
         email=email
     )
     db.session.add(institution)
     db.session.commit()
+    invalidate_responses("institutions")
 
     return ResponseHelper.default_response(
         "Institution created successfully",
@@ -37,18 +40,10 @@ def create_institution():
 
 # Get All Institutions
 @institution_bp.route('/', methods=['GET'])
+@cached_response("institutions")
 def get_institutions():
     """Retrieve all institutions."""
-    institutions = Institution.query.all()
-    data = [
-        {
-            "id": institution.institutionID,
-            "name": institution.name,
-            "email": institution.email,
-            "subscriptionStatus": institution.subscriptionStatus
-        }
-        for institution in institutions
-    ]
+    data = institution_serializer.dump_many(db.session.execute(institution_serializer.select()))
 
     return ResponseHelper.default_response(
         "Institutions retrieved successfully",
@@ -58,19 +53,17 @@ def get_institutions():
 
 # Get Institution by ID
 @institution_bp.route('/<string:id>', methods=['GET'])
+@cached_response("institutions")
 def get_institution(id):
     """Retrieve institution details by ID."""
-    institution = Institution.query.filter_by(institutionID=id).first()
+    institution = db.session.execute(
+        institution_serializer.select().where(Institution.institutionID == id)
+    ).first()
 
     if not institution:
         return ResponseHelper.default_response("Institution not found", 404)
 
-    data = {
-        "id": institution.institutionID,
-        "name": institution.name,
-        "email": institution.email,
-        "subscriptionStatus": institution.subscriptionStatus
-    }
+    data = institution_serializer.dump(institution)
 
     return ResponseHelper.default_response(
         "Institution details retrieved successfully",
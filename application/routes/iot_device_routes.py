@@ -1,7 +1,10 @@
 from flask import Blueprint, request
 from application.models import IoTDevice, db
 from application.utils import ResponseHelper
-import uuid
+from application.serializers import device_serializer
+from application.response_cache import cached_response, invalidate_responses
+from application.device_registry import device_status, get_device_registry
+from application.ids import new_id
 
 iot_device_bp = Blueprint('iot_device', __name__, url_prefix='/iot-devices')
 
@@ -19,13 +22,15 @@ def create_device():
 
     # Create the IoT device
     device = IoTDevice(
-        deviceID=str(uuid.uuid4()),
+        deviceID=new_id(),
         location=location,
         batteryStatus=battery_status,
         transmissionInterval=transmission_interval
     )
     db.session.add(device)
     db.session.commit()
+    get_device_registry().add(device.deviceID, device.transmissionInterval)
+    invalidate_responses("iot_devices")
 
     return ResponseHelper.default_response(
         "IoT Device created successfully",
@@ -35,18 +40,10 @@ def create_device():
 
 # Get All IoT Devices
 @iot_device_bp.route('/', methods=['GET'])
+@cached_response("iot_devices")
 def get_devices():
     """Retrieve all IoT devices."""
-    devices = IoTDevice.query.all()
-    data = [
-        {
-            "deviceID": device.deviceID,
-            "location": device.location,
-            "batteryStatus": device.batteryStatus,
-            "transmissionInterval": device.transmissionInterval
-        }
-        for device in devices
-    ]
+    data = device_serializer.dump_many(db.session.execute(device_serializer.select()))
 
     return ResponseHelper.default_response(
         "IoT Devices retrieved successfully",
@@ -54,21 +51,36 @@ def get_devices():
         {"devices": data}
     )
 
+# Get IoT Device Status
+@iot_device_bp.route('/status', methods=['GET'])
+def get_device_status():
+    """
+    Report each device's last reading time and reading count, read from the device table.
+    Pass silent=true to list only devices that have missed several transmission intervals.
+    """
+    devices = device_status()
+    if request.args.get("silent", "").lower() in ("1", "true"):
+        devices = [device for device in devices if device["silent"]]
+
+    return ResponseHelper.default_response(
+        "IoT Device status retrieved successfully",
+        200,
+        {"devices": devices}
+    )
+
 # Get IoT Device by ID
 @iot_device_bp.route('/<string:device_id>', methods=['GET'])
+@cached_response("iot_devices")
 def get_device(device_id):
     """Retrieve IoT device details by ID."""
-    device = IoTDevice.query.filter_by(deviceID=device_id).first()
+    device = db.session.execute(
+        device_serializer.select().where(IoTDevice.deviceID == device_id)
+    ).first()
 
     if not device:
         return ResponseHelper.default_response("IoT Device not found", 404)
 
-    data = {
-        "deviceID": device.deviceID,
-        "location": device.location,
-        "batteryStatus": device.batteryStatus,
-        "transmissionInterval": device.transmissionInterval
-    }
+    data = device_serializer.dump(device)
 
     return ResponseHelper.default_response(
         "IoT Device details retrieved successfully",
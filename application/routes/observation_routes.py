@@ -1,60 +1,213 @@
-from flask import Blueprint, request
-from application.models import Observation, IoTDevice, APIAccess, db
-from application.utils import ResponseHelper
-from datetime import datetime, timedelta
-import random
+from flask import Blueprint, Response, request, current_app, stream_with_context
+from application.models import Observation, IoTDevice, APIAccess, LatestObservation, db
+from application.utils import ResponseHelper, CursorHelper, JSONHelper
+from application.serializers import latest_observation_serializer, observation_serializer
+from application.cache import get_api_token_cache
+from application.ingest import parse_observation, known_device_ids, store_observations, commit_observations
+from application.binary_ingest import CONTENT_TYPE as BINARY_CONTENT_TYPE, BatchTooLarge, decode_frames
+from application.mock_data import seed_observations
+from application.write_behind import get_write_behind_queue
+from application.export import (
+    EXPORT_FORMATS, export_columns, export_observations, format_available, observation_query,
+    parse_fields
+)
+from application.geo import parse_bbox, parse_near
+from application.aggregation import AGGREGATE_FIELDS, AGGREGATES, aggregate_observations, parse_bucket, parse_list
+from datetime import datetime
+from sqlalchemy import tuple_
+import json
 
+# Upper bound on readings accepted by a single batch request
+OBSERVATION_BATCH_MAX_SIZE = 10000
+
+# Page sizes for keyset-paginated reads
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Rows fetched per round-trip when streaming NDJSON
+STREAM_CHUNK_SIZE = 1000
 
 
 observations_bp = Blueprint('observations', __name__, url_prefix='/observations')
 
 # Helper: Validate API Token
 def validate_api_token(token):
-    """Check if the API token is valid and not expired."""
-    api_access = APIAccess.query.filter_by(token=token).first()
-    if not api_access:
+    """Check if the API token is valid and not expired. Valid tokens are cached until they expire."""
+    if not token:
         return False, "Invalid API token."
-    if api_access.expirationDate < datetime.utcnow():
+
+    token_cache = get_api_token_cache()
+    cached = token_cache.get(token)
+    if cached is None:
+        # Taken before the lookup, so a token revoked meanwhile is not cached
+        generation = token_cache.generation()
+        api_access = APIAccess.query.filter_by(token=token).first()
+        if not api_access:
+            return False, "Invalid API token."
+        cached = (api_access.accessID, api_access.institutionID, api_access.expirationDate)
+        token_cache.set(
+            token, cached,
+            ttl=(api_access.expirationDate - datetime.utcnow()).total_seconds(),
+            generation=generation
+        )
+
+    _, institution_id, expiration_date = cached
+    if expiration_date < datetime.utcnow():
         return False, "API token has expired."
-    return True, api_access.institutionID
+    return True, institution_id
 
 # Add Observation
 @observations_bp.route('/', methods=['POST'])
 def add_observation():
-    print("see..................")
     """Add a new observation from an IoT device."""
     data = request.get_json()
 
+    # Validate payload
+    row, error = parse_observation(data)
+    if error:
+        return ResponseHelper.default_response(error, 400)
+
     # Validate device
-    device_id = data.get("deviceID")
-    device = IoTDevice.query.filter_by(deviceID=device_id).first()
-    if not device:
+    if not known_device_ids([row["deviceID"]]):
         return ResponseHelper.default_response("IoT Device not registered", 404)
 
+    if current_app.config.get("WRITE_BEHIND_INGEST"):
+        # Queue for the background writer and answer before the commit
+        if not get_write_behind_queue().submit(row):
+            response, status_code = ResponseHelper.default_response("Ingest queue is full, retry later", 429)
+            response.headers["Retry-After"] = "1"
+            return response, status_code
+        return ResponseHelper.default_response(
+            "Observation accepted",
+            202,
+            {"observationID": row["observationID"]}
+        )
+
     # Create observation
-    observation = Observation(
-        observationID=f"obs-{datetime.utcnow().timestamp()}",
-        timestamp=datetime.fromisoformat(data.get("timestamp")),
-        temperature=data.get("temperature"),
-        humidity=data.get("humidity"),
-        windSpeed=data.get("windSpeed"),
-        precipitation=data.get("precipitation"),
-        locationCoordinates=data.get("locationCoordinates"),
-        deviceID=device_id
-    )
-    db.session.add(observation)
-    db.session.commit()
+    store_observations([row])
+    commit_observations([row])
 
     return ResponseHelper.default_response(
         "Observation added successfully",
         201,
-        {"observationID": observation.observationID}
+        {"observationID": row["observationID"]}
+    )
+
+# Write-Behind Queue Metrics
+@observations_bp.route('/queue', methods=['GET'])
+def get_ingest_queue_stats():
+    """Report the write-behind queue depth, throughput counters and flush latency."""
+    if not current_app.config.get("WRITE_BEHIND_INGEST"):
+        return ResponseHelper.default_response("Write-behind ingestion is disabled", 404)
+
+    return ResponseHelper.default_response(
+        "Ingest queue stats retrieved successfully",
+        200,
+        get_write_behind_queue().stats()
+    )
+
+# Add Observations in Batch
+@observations_bp.route('/batch', methods=['POST'])
+def add_observations_batch():
+    """
+    Add many observations in one request and one transaction.
+    Accepts a JSON array of readings, an NDJSON body (application/x-ndjson) or
+    binary frames (application/vnd.observation-frames, see application.binary_ingest).
+    Every item gets its own result; valid items are inserted even if others are rejected.
+    """
+    max_size = current_app.config.get("OBSERVATION_BATCH_MAX_SIZE", OBSERVATION_BATCH_MAX_SIZE)
+    results = []
+    parsed = []
+
+    if request.mimetype == BINARY_CONTENT_TYPE:
+        # Binary frames decode straight into validated rows; oversized bodies
+        # are refused from the frame headers before any column is decoded
+        try:
+            rows = decode_frames(request.get_data(), max_records=max_size)
+        except BatchTooLarge:
+            return ResponseHelper.default_response("Batch too large", 413)
+        except ValueError as e:
+            return ResponseHelper.default_response(f"Validation error: {e}", 400)
+        total = len(rows)
+        parsed = list(enumerate(rows))
+    else:
+        items, error = _read_batch_payload()
+        if error:
+            return ResponseHelper.default_response(error, 400)
+        total = len(items)
+        if total > max_size:
+            return ResponseHelper.default_response("Batch too large", 413)
+        for index, item in enumerate(items):
+            if isinstance(item, Exception):
+                results.append({"index": index, "status": 400, "message": "Validation error: Invalid JSON"})
+                continue
+            row, error = parse_observation(item)
+            if error:
+                results.append({"index": index, "status": 400, "message": error})
+                continue
+            parsed.append((index, row))
+
+    if not total:
+        return ResponseHelper.default_response("Validation error: Batch is empty", 400)
+
+    # Validate every referenced device with one query
+    registered = known_device_ids(row["deviceID"] for _, row in parsed)
+    rows = []
+    for index, row in parsed:
+        if row["deviceID"] not in registered:
+            results.append({"index": index, "status": 404, "message": "IoT Device not registered"})
+            continue
+        rows.append(row)
+        results.append({"index": index, "status": 201, "observationID": row["observationID"]})
+
+    store_observations(rows)
+    commit_observations(rows)
+
+    results.sort(key=lambda result: result["index"])
+    if len(rows) == total:
+        status_code = 201
+    elif rows:
+        status_code = 207
+    else:
+        status_code = 400
+
+    return ResponseHelper.default_response(
+        "Observations processed",
+        status_code,
+        {"inserted": len(rows), "rejected": total - len(rows), "results": results}
     )
 
+def _read_batch_payload():
+    """Decode a batch body into a list of items; NDJSON lines that fail to parse become exceptions."""
+    if request.mimetype == "application/x-ndjson":
+        items = []
+        for line in request.get_data(as_text=True).splitlines():
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError as e:
+                items.append(e)
+        return items, None
+
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get("observations")
+    if not isinstance(data, list):
+        return None, "Validation error: Expected an array of observations"
+    return data, None
+
 # Get Observations
 @observations_bp.route('/', methods=['GET'])
 def get_observations():
-    """Retrieve observations with optional filters and validate API access."""
+    """
+    Retrieve observations with optional filters and validate API access.
+    Pass `limit` (and the returned `next` cursor) to page through results in
+    (timestamp, observationID) order, or `format=ndjson` to stream every
+    matching row as newline-delimited JSON. Paging is opt-in: without `limit`
+    or `cursor` every matching row is returned in one response. `bbox=south,west,north,east` or
+    `near=lat,lon&radius=km` restrict readings to a region.
+    """
     token = request.headers.get("Authorization")  # API token should be sent in the header
 
     # Validate API token
@@ -63,40 +216,213 @@ def get_observations():
         return ResponseHelper.default_response(message_or_institution_id, 403)
 
     # Apply filters
-    device_id = request.args.get("deviceID")
+    query, error = _filtered_observations()
+    if error:
+        return ResponseHelper.default_response(error, 400)
+
+    if request.args.get("format") == "ndjson":
+        return _stream_observations(query)
+
+    limit = request.args.get("limit")
+    cursor = request.args.get("cursor")
+    if limit is None and cursor is None:
+        # Retrieve observations
+        data = observation_serializer.dump_many(db.session.execute(query))
+        return ResponseHelper.default_response(
+            "Observations retrieved successfully",
+            200,
+            {"observations": data}
+        )
+
+    # Keyset pagination on (timestamp, observationID)
+    try:
+        limit = int(limit) if limit is not None else DEFAULT_PAGE_SIZE
+    except ValueError:
+        return ResponseHelper.default_response("Validation error: Invalid limit", 400)
+    if limit <= 0 or limit > MAX_PAGE_SIZE:
+        return ResponseHelper.default_response(f"Validation error: limit must be between 1 and {MAX_PAGE_SIZE}", 400)
+
+    if cursor:
+        try:
+            after_timestamp, after_id = CursorHelper.decode(cursor)
+            if not isinstance(after_id, str):
+                raise ValueError("Invalid cursor")
+            after_timestamp = datetime.fromisoformat(after_timestamp)
+        except (ValueError, TypeError):
+            return ResponseHelper.default_response("Validation error: Invalid cursor", 400)
+        query = query.where(
+            tuple_(Observation.timestamp, Observation.observationID) > tuple_(after_timestamp, after_id)
+        )
+
+    rows = db.session.execute(
+        query.order_by(Observation.timestamp, Observation.observationID).limit(limit + 1)
+    ).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = CursorHelper.encode([last.timestamp.isoformat(), last.observationID])
+
+    return ResponseHelper.default_response(
+        "Observations retrieved successfully",
+        200,
+        {"observations": observation_serializer.dump_many(rows), "next": next_cursor}
+    )
+
+def _filtered_observations(columns=observation_serializer.columns):
+    """Build a column select for the deviceID/startDate/endDate/bbox/near filters. Returns (query, error)."""
     start_date = request.args.get("startDate")
     end_date = request.args.get("endDate")
+    try:
+        start = datetime.fromisoformat(start_date) if start_date else None
+        end = datetime.fromisoformat(end_date) if end_date else None
+    except ValueError:
+        return None, "Validation error: Invalid date"
+
+    bbox = request.args.get("bbox")
+    try:
+        bbox = parse_bbox(bbox) if bbox else None
+    except ValueError:
+        return None, "Validation error: Invalid bbox"
+    near = request.args.get("near")
+    try:
+        near = parse_near(near, request.args.get("radius", "")) if near else None
+    except ValueError:
+        return None, "Validation error: Invalid near or radius"
+    return observation_query(columns, request.args.get("deviceID"), start, end, bbox, near), None
+
+def _stream_observations(query):
+    """Stream rows as NDJSON from a server-side cursor, so memory stays flat."""
+    query = query.order_by(Observation.timestamp, Observation.observationID)
 
-    query = Observation.query
-    if device_id:
-        query = query.filter_by(deviceID=device_id)
-    if start_date:
-        query = query.filter(Observation.timestamp >= datetime.fromisoformat(start_date))
-    if end_date:
-        query = query.filter(Observation.timestamp <= datetime.fromisoformat(end_date))
-
-    # Retrieve observations
-    observations = query.all()
-    data = [
-        {
-            "observationID": obs.observationID,
-            "timestamp": obs.timestamp.isoformat(),
-            "temperature": obs.temperature,
-            "humidity": obs.humidity,
-            "windSpeed": obs.windSpeed,
-            "precipitation": obs.precipitation,
-            "locationCoordinates": obs.locationCoordinates,
-            "deviceID": obs.deviceID
-        }
-        for obs in observations
+    def generate():
+        result = db.session.execute(query.execution_options(yield_per=STREAM_CHUNK_SIZE))
+        for partition in result.partitions():
+            yield b"".join(_json_line(row) for row in observation_serializer.dump_many(partition))
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+def _json_line(obj):
+    """Encode one NDJSON line."""
+    return (JSONHelper.dumps(obj) or json.dumps(obj).encode()) + b"\n"
+
+# Latest Observation per Device
+@observations_bp.route('/latest', methods=['GET'])
+def get_latest_observations():
+    """
+    Retrieve the newest reading of every device, or of the devices in deviceID
+    (comma-separated or repeated). Served from the latest_observation snapshot.
+    """
+    token = request.headers.get("Authorization")  # API token should be sent in the header
+
+    # Validate API token
+    is_valid, message_or_institution_id = validate_api_token(token)
+    if not is_valid:
+        return ResponseHelper.default_response(message_or_institution_id, 403)
+
+    query = latest_observation_serializer.select()
+    device_ids = [
+        device_id.strip()
+        for value in request.args.getlist("deviceID")
+        for device_id in value.split(",")
+        if device_id.strip()
     ]
+    if device_ids:
+        query = query.where(LatestObservation.deviceID.in_(device_ids))
 
+    data = latest_observation_serializer.dump_many(db.session.execute(query.order_by(LatestObservation.deviceID)))
     return ResponseHelper.default_response(
-        "Observations retrieved successfully",
+        "Latest observations retrieved successfully",
         200,
         {"observations": data}
     )
 
+# Export Observations
+@observations_bp.route('/export', methods=['GET'])
+def export_observations_file():
+    """
+    Stream every matching observation as a file for bulk analysis.
+    Example: /observations/export?format=parquet&fields=timestamp,deviceID,temperature&deviceID=...
+    Supports format=csv (default), arrow (Arrow IPC stream) or parquet, the
+    deviceID/startDate/endDate filters of GET /observations/ and a fields projection.
+    """
+    token = request.headers.get("Authorization")  # API token should be sent in the header
+
+    # Validate API token
+    is_valid, message_or_institution_id = validate_api_token(token)
+    if not is_valid:
+        return ResponseHelper.default_response(message_or_institution_id, 403)
+
+    export_format = request.args.get("format", "csv")
+    if export_format not in EXPORT_FORMATS:
+        return ResponseHelper.default_response("Validation error: Unsupported format", 400)
+    if not format_available(export_format):
+        return ResponseHelper.default_response(f"Export format {export_format} requires pyarrow", 501)
+    try:
+        fields = parse_fields(request.args.get("fields"))
+    except ValueError as e:
+        return ResponseHelper.default_response(f"Validation error: Unsupported field: {e}", 400)
+    query, error = _filtered_observations(export_columns(fields))
+    if error:
+        return ResponseHelper.default_response(error, 400)
+
+    mimetype, extension, _ = EXPORT_FORMATS[export_format]
+    chunks = export_observations(export_format, fields, query)
+    return Response(
+        stream_with_context(chunks),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename=observations.{extension}"}
+    )
+
+# Aggregate Observations
+@observations_bp.route('/aggregate', methods=['GET'])
+def get_observation_aggregates():
+    """
+    Retrieve time-bucketed statistics per device, computed in the database.
+    Example: /observations/aggregate?bucket=1h&fields=temperature,humidity&agg=avg,min,max
+    The date range is half-open: startDate <= timestamp < endDate.
+    Served from the rollup tables when the bucket and range line up; pass source=raw to skip them.
+    """
+    token = request.headers.get("Authorization")  # API token should be sent in the header
+
+    # Validate API token
+    is_valid, message_or_institution_id = validate_api_token(token)
+    if not is_valid:
+        return ResponseHelper.default_response(message_or_institution_id, 403)
+
+    try:
+        bucket_seconds = parse_bucket(request.args.get("bucket", "1h"))
+    except ValueError:
+        return ResponseHelper.default_response("Validation error: Invalid bucket", 400)
+    try:
+        fields = parse_list(request.args.get("fields"), AGGREGATE_FIELDS, AGGREGATE_FIELDS)
+        aggregates = parse_list(request.args.get("agg"), AGGREGATES, ("avg", "min", "max"))
+    except ValueError as e:
+        return ResponseHelper.default_response(f"Validation error: Unsupported field or aggregate: {e}", 400)
+    try:
+        start_date = request.args.get("startDate")
+        end_date = request.args.get("endDate")
+        start = datetime.fromisoformat(start_date) if start_date else None
+        end = datetime.fromisoformat(end_date) if end_date else None
+    except ValueError:
+        return ResponseHelper.default_response("Validation error: Invalid date", 400)
+
+    buckets, source = aggregate_observations(
+        bucket_seconds,
+        fields,
+        aggregates,
+        device_id=request.args.get("deviceID"),
+        start=start,
+        end=end,
+        use_rollups=request.args.get("source") != "raw"
+    )
+
+    return ResponseHelper.default_response(
+        "Observation aggregates retrieved successfully",
+        200,
+        {"buckets": buckets, "source": source}
+    )
+
 # Mock Observations (Updated for API validation)
 @observations_bp.route('/mock', methods=['GET'])
 def mock_observations():
@@ -114,30 +440,14 @@ def mock_observations():
         return ResponseHelper.default_response("Invalid count. Must be a positive integer.", 400)
 
     # Get all IoT devices
-    devices = IoTDevice.query.all()
-    if not devices:
+    device_ids = [device_id for (device_id,) in db.session.query(IoTDevice.deviceID)]
+    if not device_ids:
         return ResponseHelper.default_response("No IoT devices found in the database.", 404)
 
-    observations = []
-    for device in devices:
-        for _ in range(count):
-            observation = Observation(
-                observationID=f"obs-{datetime.utcnow().timestamp()}-{random.randint(1000, 9999)}",
-                timestamp=datetime.utcnow() - timedelta(minutes=random.randint(0, 1440)),
-                temperature=round(random.uniform(-10, 40), 2),
-                humidity=round(random.uniform(0, 100), 2),
-                windSpeed=round(random.uniform(0, 20), 2),
-                precipitation=round(random.uniform(0, 10), 2),
-                locationCoordinates=f"{round(random.uniform(-90, 90), 6)}, {round(random.uniform(-180, 180), 6)}",
-                deviceID=device.deviceID
-            )
-            observations.append(observation)
-
-    db.session.add_all(observations)
-    db.session.commit()
+    generated = seed_observations(device_ids, count)
 
     return ResponseHelper.default_response(
         "Mock observations generated successfully.",
         201,
-        {"generatedObservations": len(observations)}
+        {"generatedObservations": generated}
     )
@@ -1,12 +1,9 @@
 from flask import Blueprint, request
 from application.models import Customer, Payment, db
 from application.utils import ResponseHelper  # Import the helper class
-import uuid
-import os
-import stripe
-
-# Load Stripe API key
-stripe.api_key = os.getenv("STRIPE_SECRET_KEY")
+from application.payments import get_payment_client
+from application.cache import get_customer_cache
+from application.ids import new_id
 
 payment_bp = Blueprint('payment', __name__, url_prefix='/payment')
 
@@ -16,6 +13,7 @@ def create_checkout_session():
     Create a Stripe Checkout session for one-time payments.
     """
     try:
+        payments = get_payment_client()
         data = request.get_json()
 
         # Validate required fields
@@ -23,31 +21,35 @@ def create_checkout_session():
         if not all(field in data for field in required_fields):
             return ResponseHelper.default_response("Missing required fields", 400)
 
-        # Check if the customer already exists in the database
-        customer = Customer.query.filter_by(customer_id=data["customer_id"]).first()
-        if not customer:
-            # Create a new Stripe customer
-            stripe_customer = stripe.Customer.create(
-                email=data["email"],
-                name=data["name"]
-            )
+        # Resolve the Stripe customer: cache first, then the database, then Stripe
+        new_customer = None
+        stripe_customer_id = get_customer_cache().get(data["customer_id"])
+        if stripe_customer_id is None:
+            customer = Customer.query.filter_by(customer_id=data["customer_id"]).first()
+            if customer:
+                stripe_customer_id = customer.stripe_customer_id
+            else:
+                # Create a new Stripe customer
+                stripe_customer = payments.create_customer(
+                    email=data["email"],
+                    name=data["name"]
+                )
+                stripe_customer_id = stripe_customer.id
 
-            # Save the customer in the database
-            customer = Customer(
-                customer_id=data["customer_id"],
-                stripe_customer_id=stripe_customer.id,
-                email=data["email"],
-                name=data["name"]
-            )
-            db.session.add(customer)
-            db.session.commit()
+                # Saved together with the payment below
+                new_customer = Customer(
+                    customer_id=data["customer_id"],
+                    stripe_customer_id=stripe_customer_id,
+                    email=data["email"],
+                    name=data["name"]
+                )
 
         # Generate a unique payment ID
-        payment_id = str(uuid.uuid4())
+        payment_id = new_id()
 
         # Create Stripe Checkout session with expanded payment intent
-        session = stripe.checkout.Session.create(
-            customer=customer.stripe_customer_id,
+        session = payments.create_checkout_session(
+            customer=stripe_customer_id,
             payment_method_types=["card"],
             line_items=[{
                 "price_data": {
@@ -63,9 +65,6 @@ def create_checkout_session():
             # expand=["payment_intent"]  # Expand the payment intent
         )
 
-        # Debugging: Print the session object
-        print("Stripe Checkout Session:", session)
-
           # Use `session.id` as the stripe_payment_id since payment_intent is not present
         stripe_payment_id = session.id  # Use session.id as the unique identifier
 
@@ -73,15 +72,17 @@ def create_checkout_session():
         if not stripe_payment_id:
             # Attempt to retrieve the Payment Intent directly
             if session.id:
-                session_details = stripe.checkout.Session.retrieve(session.id)
+                session_details = payments.retrieve_checkout_session(session.id)
                 stripe_payment_id = session_details.payment_intent
             else:
                 raise Exception("Stripe session does not contain payment_intent.")
 
-        # Save payment details in the database
+        # Save the new customer (if any) and the payment in one transaction
+        if new_customer:
+            db.session.add(new_customer)
         payment = Payment(
             id=payment_id,
-            customer_id=customer.customer_id,
+            customer_id=data["customer_id"],
             stripe_payment_id=stripe_payment_id,
             stripe_session_id=session.id,
             order_id=data["order_id"],
@@ -90,6 +91,7 @@ def create_checkout_session():
         )
         db.session.add(payment)
         db.session.commit()
+        get_customer_cache().set(data["customer_id"], stripe_customer_id)
 
         return ResponseHelper.default_response(
             "Checkout session created successfully",
@@ -98,4 +100,5 @@ def create_checkout_session():
         )
 
     except Exception as e:
+        db.session.rollback()
         return ResponseHelper.default_response(f"Error: {str(e)}", 500)
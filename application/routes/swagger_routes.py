@@ -0,0 +1,11 @@
+from flask_swagger_ui import get_swaggerui_blueprint
+
+# Swagger UI configuration
+SWAGGER_URL = '/swagger'
+API_URL = '/static/swagger.json'
+
+swagger_ui_bp = get_swaggerui_blueprint(
+    SWAGGER_URL,
+    API_URL,
+    config={"app_name": "Authentication API"}
+)
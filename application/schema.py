@@ -0,0 +1,70 @@
+from application.geo import backfill_coordinates
+from application.latest import rebuild_latest
+from application.models import LatestObservation, ObservationRollup, db
+from application.rollups import rebuild_rollups
+from sqlalchemy import inspect, text
+
+# Tables derived from the observation table, and how to fill one that is
+# created on a database that already holds observations
+DERIVED_TABLES = {
+    ObservationRollup.__tablename__: rebuild_rollups,
+    LatestObservation.__tablename__: rebuild_latest,
+}
+
+
+def upgrade_schema():
+    """
+    Bring an existing database up to the current model definitions.
+    Creates missing tables (filling derived ones from the existing
+    observations), adds columns declared on the models that existing tables
+    lack (filling derived ones from existing data), and creates missing
+    indexes. Safe to run repeatedly.
+    Returns:
+        list: Names of the columns ("table.column") and indexes that were created.
+    """
+    existing_tables = set(inspect(db.engine).get_table_names())
+    db.create_all()
+
+    inspector = inspect(db.engine)
+    created = []
+    for table in db.metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing:
+                add_column(table, column)
+                created.append(f"{table.name}.{column.name}")
+        if f"{table.name}.latitude" in created:
+            backfill_coordinates(table)
+
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind=db.engine)
+                created.append(index.name)
+
+    # Once the observation table has every column, fill new derived tables from it
+    if "observation" in existing_tables:
+        for name, rebuild in DERIVED_TABLES.items():
+            if name not in existing_tables:
+                rebuild()
+    return created
+
+
+def add_column(table, column):
+    """
+    Add a model column to an existing table.
+    The column must be nullable or have a server default, so existing rows get a value.
+    """
+    if not column.nullable and column.server_default is None:
+        raise ValueError(f"Cannot add NOT NULL column {table.name}.{column.name} without a server default")
+    preparer = db.engine.dialect.identifier_preparer
+    ddl = (
+        f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {preparer.format_column(column)} "
+        f"{column.type.compile(db.engine.dialect)}"
+    )
+    if column.server_default is not None:
+        ddl += f" DEFAULT {column.server_default.arg}"
+        if not column.nullable:
+            ddl += " NOT NULL"
+    with db.engine.begin() as conn:
+        conn.execute(text(ddl))
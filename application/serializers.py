@@ -0,0 +1,90 @@
+"""
+Schema-driven response serializers.
+
+Each Serializer is declared once per resource as a list of fields and
+encodes selected rows by zipping them with the precomputed keys, so a list
+response costs one dict() per row instead of per-field attribute lookups.
+The serializer also knows its columns, so routes select exactly those
+columns rather than loading whole ORM objects.
+"""
+from application.metrics import serialization_timer
+from application.models import APIAccess, Institution, IoTDevice, LatestObservation, Observation
+from sqlalchemy import DateTime, select
+
+
+class Serializer:
+    """
+    Row encoder for one model.
+    Args:
+        model: The SQLAlchemy model.
+        fields (tuple): Attribute names, or (output key, attribute name) pairs
+            where the JSON key differs from the column. DateTime columns are
+            emitted as ISO 8601 strings.
+    """
+
+    def __init__(self, model, fields):
+        fields = [(field, field) if isinstance(field, str) else field for field in fields]
+        self.keys = tuple(key for key, _ in fields)
+        self.columns = tuple(getattr(model, attribute) for _, attribute in fields)
+
+        self._date_keys = tuple(key for key, column in zip(self.keys, self.columns) if isinstance(column.type, DateTime))
+
+    def _dump_many(self, rows):
+        keys, date_keys = self.keys, self._date_keys
+        data = [dict(zip(keys, row)) for row in rows]
+        for key in date_keys:
+            for item in data:
+                value = item[key]
+                if value is not None:
+                    item[key] = value.isoformat()
+        return data
+
+    def select(self):
+        """Return a select of exactly the serialized columns."""
+        return select(*self.columns)
+
+    def dump(self, row):
+        """Encode one selected row as a dict."""
+        with serialization_timer():
+            return self._dump_many((row,))[0]
+
+    def dump_many(self, rows):
+        """Encode an iterable of selected rows as a list of dicts."""
+        with serialization_timer():
+            return self._dump_many(rows)
+
+
+observation_serializer = Serializer(Observation, (
+    "observationID",
+    "timestamp",
+    "temperature",
+    "humidity",
+    "windSpeed",
+    "precipitation",
+    "locationCoordinates",
+    "latitude",
+    "longitude",
+    "deviceID",
+))
+
+latest_observation_serializer = Serializer(LatestObservation, observation_serializer.keys)
+
+device_serializer = Serializer(IoTDevice, (
+    "deviceID",
+    "location",
+    "batteryStatus",
+    "transmissionInterval",
+))
+
+institution_serializer = Serializer(Institution, (
+    ("id", "institutionID"),
+    "name",
+    "email",
+    "subscriptionStatus",
+))
+
+api_token_serializer = Serializer(APIAccess, (
+    "accessID",
+    "token",
+    "expirationDate",
+))
@@ -1,4 +1,12 @@
-from flask import jsonify
+from application.metrics import serialization_timer
+from flask import current_app, jsonify
+import base64
+import json
+
+try:  # Optional: faster JSON encoding
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson
+    orjson = None
 
 class ResponseHelper:
     @staticmethod
@@ -18,4 +26,62 @@ class ResponseHelper:
         }
         if data:
             response["data"] = data
-        return jsonify(response), status_code
+        with serialization_timer():
+            body = JSONHelper.dumps(response)
+            if body is None:
+                return jsonify(response), status_code
+        return current_app.response_class(body, mimetype="application/json"), status_code
+
+
+class JSONHelper:
+    @staticmethod
+    def dumps(obj):
+        """
+        Encode obj with orjson, honouring the app's key sorting.
+        Args:
+            obj: The value to encode.
+        Returns:
+            bytes: The JSON, or None if orjson is not installed or cannot encode obj,
+            in which case the caller falls back to the standard encoder.
+        """
+        if orjson is None:
+            return None
+        option = orjson.OPT_SORT_KEYS if getattr(current_app.json, "sort_keys", False) else 0
+        try:
+            return orjson.dumps(obj, option=option)
+        except TypeError:
+            return None
+
+
+class CursorHelper:
+    @staticmethod
+    def encode(values):
+        """
+        Encode keyset pagination values as an opaque, URL-safe cursor.
+        Args:
+            values (list): JSON-serializable sort key of the last returned row.
+        Returns:
+            str: The cursor string.
+        """
+        raw = json.dumps(values, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    @staticmethod
+    def decode(cursor):
+        """
+        Decode a cursor produced by encode.
+        Args:
+            cursor (str): The cursor string.
+        Returns:
+            list: The sort key values.
+        Raises:
+            ValueError: If the cursor is malformed.
+        """
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            values = json.loads(raw)
+        except (ValueError, TypeError) as e:
+            raise ValueError("Invalid cursor") from e
+        if not isinstance(values, list):
+            raise ValueError("Invalid cursor")
+        return values
@@ -0,0 +1,208 @@
+"""
+Write-behind ingestion for single readings.
+
+With WRITE_BEHIND_INGEST enabled, POST /observations/ validates a reading,
+puts it on a bounded in-process queue and answers 202 straight away. A
+background writer drains the queue and stores readings in group commits of
+up to WRITE_BEHIND_BATCH_SIZE rows, or whatever has arrived once the oldest
+queued reading has waited WRITE_BEHIND_FLUSH_INTERVAL seconds. A full queue
+is reported to the client as 429, and the queue is drained on shutdown.
+A batch whose commit fails is retried with backoff (SQLite answers
+"database is locked" under write contention), then written row by row so
+one bad reading cannot take the rest of the batch with it.
+Queued readings are lost if the process is killed before they are written.
+"""
+from application.ingest import commit_observations, store_observations
+from application.models import db
+from flask import current_app
+from sqlalchemy.exc import OperationalError
+import atexit
+import os
+import queue
+import threading
+import time
+
+# Defaults for the WRITE_BEHIND_* config keys
+WRITE_BEHIND_QUEUE_SIZE = 10000
+WRITE_BEHIND_BATCH_SIZE = 500
+WRITE_BEHIND_FLUSH_INTERVAL = 0.05  # seconds
+
+# Attempts at a batch's group commit after an operational error, and the first
+# delay between them (doubled after each attempt)
+WRITE_BEHIND_RETRIES = 3
+WRITE_BEHIND_RETRY_DELAY = 0.05  # seconds
+
+_STOP = object()
+
+
+class WriteBehindQueue:
+    """Bounded queue of validated observation rows and the thread that commits them."""
+
+    def __init__(self, app, maxsize=WRITE_BEHIND_QUEUE_SIZE, batch_size=WRITE_BEHIND_BATCH_SIZE,
+                 flush_interval=WRITE_BEHIND_FLUSH_INTERVAL):
+        self.app = app
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._drain_at_exit = False
+        self._stats = {
+            "accepted": 0,
+            "rejected": 0,
+            "written": 0,
+            "failed": 0,
+            "batches": 0,
+            "lastFlushSeconds": None,
+            "maxFlushSeconds": 0.0,
+            "totalFlushSeconds": 0.0,
+        }
+
+    def submit(self, row):
+        """
+        Queue a validated row for writing.
+        Returns:
+            bool: False if the queue is full and the caller should back off.
+        """
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            with self._lock:
+                self._stats["rejected"] += 1
+            return False
+        with self._lock:
+            self._stats["accepted"] += 1
+        return True
+
+    def start(self):
+        """Start the writer thread in this process (again after a fork)."""
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+            self._thread.start()
+            if not self._drain_at_exit:
+                # Registered once; a forked worker inherits the registration
+                atexit.register(self.drain)
+                self._drain_at_exit = True
+
+    def drain(self, timeout=None):
+        """Write everything queued so far, then stop the writer thread."""
+        thread = self._thread
+        if thread is None or not thread.is_alive() or self._pid != os.getpid():
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+
+    def stats(self):
+        """Queue depth, throughput counters and flush latency."""
+        with self._lock:
+            stats = dict(self._stats)
+        total = stats.pop("totalFlushSeconds")
+        stats["depth"] = self._queue.qsize()
+        stats["capacity"] = self._queue.maxsize
+        stats["avgFlushSeconds"] = total / stats["batches"] if stats["batches"] else None
+        return stats
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._write(batch)
+
+        # Write whatever was queued behind the stop marker before exiting
+        remaining = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                remaining.append(item)
+        for start in range(0, len(remaining), self.batch_size):
+            self._write(remaining[start:start + self.batch_size])
+
+    def _write(self, batch):
+        """Store one batch in a single transaction, or one row at a time if that keeps failing."""
+        began = time.perf_counter()
+        with self.app.app_context():
+            try:
+                self._commit(batch, WRITE_BEHIND_RETRIES)
+            except Exception:
+                self.app.logger.exception(
+                    "Write-behind flush of %d observation(s) failed, writing them one at a time", len(batch)
+                )
+                self._write_rows(batch)
+                return
+        elapsed = time.perf_counter() - began
+        with self._lock:
+            self._stats["written"] += len(batch)
+            self._stats["batches"] += 1
+            self._stats["lastFlushSeconds"] = elapsed
+            self._stats["maxFlushSeconds"] = max(self._stats["maxFlushSeconds"], elapsed)
+            self._stats["totalFlushSeconds"] += elapsed
+
+    def _write_rows(self, rows):
+        """Store rows in a transaction each, so only the rows that fail are lost."""
+        written = 0
+        for row in rows:
+            try:
+                self._commit([row], 1)
+                written += 1
+            except Exception:
+                self.app.logger.exception("Write-behind write of observation %s failed", row["observationID"])
+        with self._lock:
+            self._stats["written"] += written
+            self._stats["failed"] += len(rows) - written
+
+    def _commit(self, rows, attempts):
+        """
+        Store and commit rows, retrying with backoff on operational errors such as a locked database.
+        Raises:
+            Exception: The last error once the attempts are used up, or any other error at once.
+        """
+        delay = WRITE_BEHIND_RETRY_DELAY
+        for attempt in range(1, attempts + 1):
+            try:
+                store_observations(rows)
+                commit_observations(rows)
+                return
+            except OperationalError as e:
+                db.session.rollback()
+                if attempt == attempts:
+                    raise
+                self.app.logger.warning("Write-behind commit failed (%s), retrying in %.2fs", e.orig, delay)
+                time.sleep(delay)
+                delay *= 2
+            except Exception:
+                db.session.rollback()
+                raise
+
+
+def get_write_behind_queue():
+    """Return the current app's write-behind queue, creating and starting it on first use."""
+    write_queue = current_app.extensions.get("write_behind_queue")
+    if write_queue is None:
+        write_queue = current_app.extensions["write_behind_queue"] = WriteBehindQueue(
+            current_app._get_current_object(),
+            maxsize=current_app.config.get("WRITE_BEHIND_QUEUE_SIZE", WRITE_BEHIND_QUEUE_SIZE),
+            batch_size=current_app.config.get("WRITE_BEHIND_BATCH_SIZE", WRITE_BEHIND_BATCH_SIZE),
+            flush_interval=current_app.config.get("WRITE_BEHIND_FLUSH_INTERVAL", WRITE_BEHIND_FLUSH_INTERVAL),
+        )
+    write_queue.start()
+    return write_queue
@@ -0,0 +1,91 @@
+"""
+Benchmark: checkout throughput against a local Stripe stand-in.
+
+Starts benchmarks.stripe_stub with a simulated upstream latency and
+measures:
+  * POST /payment/checkout through the Flask test client, sequentially;
+  * the payment client's sync calls, sequentially;
+  * the payment client's async calls, issued concurrently.
+
+Usage:
+    python -m benchmarks.bench_checkout --checkouts 200 --latency-ms 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+from benchmarks import stripe_stub
+
+
+def checkout_payload(i):
+    return {
+        "customer_id": f"bench-customer-{i % 20}",
+        "email": f"bench{i % 20}@example.com",
+        "name": "Bench Customer",
+        "order_id": f"order-{i}",
+        "amount": 12.5,
+        "success_url": "https://example.com/success",
+        "cancel_url": "https://example.com/cancel",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--checkouts", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+    args = parser.parse_args()
+
+    server, base_url = stripe_stub.start(latency_ms=args.latency_ms)
+    os.environ["STRIPE_API_BASE"] = base_url
+    os.environ["STRIPE_SECRET_KEY"] = "sk_test_stub"
+    os.environ["DATABASE_URI"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    from app import app
+    from application.payments import get_payment_client
+
+    results = []
+    client = app.test_client()
+    began = time.perf_counter()
+    for i in range(args.checkouts):
+        response = client.post("/payment/checkout", json=checkout_payload(i))
+        assert response.status_code == 200, response.get_json()
+    results.append(("endpoint, sequential", args.checkouts / (time.perf_counter() - began)))
+
+    with app.app_context():
+        payments = get_payment_client()
+
+    session_params = {
+        "customer": "cus_bench",
+        "payment_method_types": ["card"],
+        "line_items": [{"price_data": {"currency": "gbp", "product_data": {"name": "Order"}, "unit_amount": 1250}, "quantity": 1}],
+        "mode": "payment",
+        "success_url": "https://example.com/success",
+        "cancel_url": "https://example.com/cancel",
+    }
+
+    began = time.perf_counter()
+    for _ in range(args.checkouts):
+        payments.create_checkout_session(**session_params)
+    results.append(("client sync, sequential", args.checkouts / (time.perf_counter() - began)))
+
+    async def concurrent():
+        await asyncio.gather(*(payments.create_checkout_session_async(**session_params) for _ in range(args.checkouts)))
+
+    began = time.perf_counter()
+    asyncio.run(concurrent())
+    results.append((f"client async, {payments.pool_size} in flight", args.checkouts / (time.perf_counter() - began)))
+    server.shutdown()
+
+    if args.json:
+        print(json.dumps([{"mode": mode, "per_second": round(rate, 1)} for mode, rate in results], indent=2))
+        return
+    print(f"{'mode':<28} {'calls/s':>10}")
+    for mode, rate in results:
+        print(f"{mode:<28} {rate:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Benchmark: concurrent single-reading writers on one SQLite database file.
+
+Mimics several gunicorn workers each handling POST /observations/ (one
+insert and one commit per reading) while another process reads, first with
+pysqlite's defaults (rollback journal, synchronous=FULL) and then with the
+app's SQLITE_PRAGMAS (WAL, synchronous=NORMAL, busy timeout, mmap).
+Reports total commits per second, the p95 commit latency and how many
+writes failed with "database is locked".
+
+Usage:
+    python -m benchmarks.bench_concurrent_writers --writers 4 --rows 500
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.exc import OperationalError
+
+from application.engine import apply_sqlite_pragmas
+from application.models import IoTDevice, Observation
+from config import Config
+
+MODES = {
+    "default": {},
+    "tuned": Config.SQLITE_PRAGMAS,
+}
+
+
+def make_engine(path, pragmas):
+    engine = create_engine(f"sqlite:///{path}")
+    if pragmas:
+        apply_sqlite_pragmas(engine, pragmas)
+    return engine
+
+
+def writer(path, pragmas, worker, rows, start, results):
+    engine = make_engine(path, pragmas)
+    latencies, errors = [], 0
+    start.wait()
+    for i in range(rows):
+        began = time.perf_counter()
+        try:
+            with engine.begin() as conn:
+                conn.execute(insert(Observation.__table__), {
+                    "observationID": f"obs-{worker}-{i}",
+                    "timestamp": datetime.utcnow(),
+                    "temperature": random.uniform(-10, 40),
+                    "humidity": random.uniform(0, 100),
+                    "deviceID": "device-1",
+                })
+        except OperationalError:
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - began)
+    results.put((latencies, errors))
+
+
+def reader(path, pragmas, start, stop):
+    engine = make_engine(path, pragmas)
+    start.wait()
+    while not stop.is_set():
+        try:
+            with engine.connect() as conn:
+                conn.execute(select(Observation.observationID).order_by(Observation.timestamp.desc()).limit(100)).all()
+        except OperationalError:
+            pass
+
+
+def run(mode, writers, rows, workdir):
+    path = os.path.join(workdir, f"{mode}.db")
+    pragmas = MODES[mode]
+    engine = make_engine(path, pragmas)
+    IoTDevice.__table__.create(engine)
+    Observation.__table__.create(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(IoTDevice.__table__), {
+            "deviceID": "device-1", "location": "bench", "batteryStatus": "Full", "transmissionInterval": 60
+        })
+    engine.dispose()
+
+    context = multiprocessing.get_context("spawn")
+    start, stop, results = context.Event(), context.Event(), context.Queue()
+    processes = [context.Process(target=writer, args=(path, pragmas, w, rows, start, results)) for w in range(writers)]
+    read_process = context.Process(target=reader, args=(path, pragmas, start, stop))
+    for process in processes + [read_process]:
+        process.start()
+    time.sleep(1)  # let every process import and connect
+    began = time.perf_counter()
+    start.set()
+    collected = [results.get() for _ in processes]
+    elapsed = time.perf_counter() - began
+    stop.set()
+    for process in processes + [read_process]:
+        process.join()
+
+    latencies = sorted(latency for worker_latencies, _ in collected for latency in worker_latencies)
+    return {
+        "mode": mode,
+        "commits_per_s": int(len(latencies) / elapsed),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95)] * 1000, 2) if latencies else None,
+        "locked_errors": sum(errors for _, errors in collected),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--rows", type=int, default=500, help="Readings committed by each writer.")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        results = [run(mode, args.writers, args.rows, workdir) for mode in MODES]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'mode':<8} {'commits/s':>10} {'p95 ms':>8} {'locked':>7}")
+    for result in results:
+        print(f"{result['mode']:<8} {result['commits_per_s']:>10} {result['p95_ms']:>8} {result['locked_errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark: worker startup cost of create_app for each blueprint profile.
+
+Every gunicorn worker and every pytest session pays for importing and
+building the app. Each sample runs in a fresh interpreter and times
+`create_app(...)` including all imports, and records whether Stripe
+was imported. Use --json to keep results for comparison across commits.
+
+Usage:
+    python -m benchmarks.bench_import_time --repeat 10
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, sys, time
+began = time.perf_counter()
+from application import create_app
+from config import Config
+class BenchConfig(Config):
+    APP_PROFILE = {profile!r}
+    SQLALCHEMY_DATABASE_URI = "sqlite://"
+    AUTO_UPGRADE_SCHEMA = False
+create_app(BenchConfig)
+print(json.dumps({{"seconds": time.perf_counter() - began, "stripe": "stripe" in sys.modules}}))
+"""
+
+
+def sample(profile):
+    """Build the app once in a fresh interpreter and return its timing."""
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE.format(profile=profile)],
+        cwd=ROOT_PATH, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", nargs="+", default=["full", "ingest"])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+    args = parser.parse_args()
+
+    results = []
+    for profile in args.profiles:
+        samples = [sample(profile) for _ in range(args.repeat)]
+        timings = sorted(s["seconds"] * 1000 for s in samples)
+        results.append({
+            "profile": profile,
+            "median_ms": round(timings[len(timings) // 2], 2),
+            "min_ms": round(timings[0], 2),
+            "imports_stripe": samples[0]["stripe"],
+        })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'profile':<10} {'median ms':>10} {'min ms':>8} {'stripe':>7}")
+    for result in results:
+        print(f"{result['profile']:<10} {result['median_ms']:>10} {result['min_ms']:>8} {str(result['imports_stripe']):>7}")
+
+
+if __name__ == "__main__":
+    main()
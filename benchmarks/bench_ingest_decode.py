@@ -0,0 +1,99 @@
+"""
+Benchmark: decode throughput and payload size, JSON versus binary frames.
+
+Encodes the same readings as the JSON array accepted by
+POST /observations/batch and as binary observation frames, then times
+turning each body into insert-ready rows (json.loads + parse_observation
+versus decode_frames).
+
+Usage:
+    python -m benchmarks.bench_ingest_decode --readings 100000 --devices 100
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+from application.binary_ingest import decode_frames, encode_frame
+from application.ingest import parse_observation
+
+
+def make_readings(count, devices):
+    start = datetime(2024, 1, 1)
+    per_device = {f"device-{i}": [] for i in range(devices)}
+    for i in range(count):
+        per_device[f"device-{i % devices}"].append({
+            "timestamp": start + timedelta(seconds=i),
+            "temperature": round(random.uniform(-10, 40), 2),
+            "humidity": round(random.uniform(0, 100), 2),
+            "windSpeed": round(random.uniform(0, 20), 2),
+            "precipitation": round(random.uniform(0, 10), 2),
+            "latitude": round(random.uniform(-90, 90), 6),
+            "longitude": round(random.uniform(-180, 180), 6),
+        })
+    return per_device
+
+
+def json_body(per_device):
+    return json.dumps([
+        {
+            "deviceID": device_id,
+            "timestamp": reading["timestamp"].isoformat(),
+            "temperature": reading["temperature"],
+            "humidity": reading["humidity"],
+            "windSpeed": reading["windSpeed"],
+            "precipitation": reading["precipitation"],
+            "locationCoordinates": f"{reading['latitude']}, {reading['longitude']}",
+        }
+        for device_id, readings in per_device.items()
+        for reading in readings
+    ]).encode()
+
+
+def decode_json(body):
+    return [parse_observation(item)[0] for item in json.loads(body)]
+
+
+def best_of(function, body, repeat):
+    timings = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        function(body)
+        timings.append(time.perf_counter() - began)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--readings", type=int, default=100000)
+    parser.add_argument("--devices", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+    args = parser.parse_args()
+
+    per_device = make_readings(args.readings, args.devices)
+    bodies = {
+        "json": (json_body(per_device), decode_json),
+        "binary": (b"".join(encode_frame(device_id, readings) for device_id, readings in per_device.items()), decode_frames),
+    }
+
+    results = []
+    for name, (body, decode) in bodies.items():
+        seconds = best_of(decode, body, args.repeat)
+        results.append({
+            "format": name,
+            "bytes_per_reading": round(len(body) / args.readings, 1),
+            "readings_per_second": round(args.readings / seconds),
+        })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'format':<8} {'bytes/reading':>14} {'readings/s':>12}")
+    for result in results:
+        print(f"{result['format']:<8} {result['bytes_per_reading']:>14} {result['readings_per_second']:>12}")
+
+
+if __name__ == "__main__":
+    main()
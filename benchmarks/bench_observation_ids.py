@@ -0,0 +1,84 @@
+"""
+Benchmark: observation insert throughput by primary-key scheme on a large table.
+
+Random string keys (uuid4) land all over the primary-key B-tree, so each
+insert into a large table touches a cold page; time-ordered keys (ULID)
+append to the right-hand edge. For each scheme this prefills a throwaway
+SQLite table, then times further inserts in committed batches.
+
+Usage:
+    python -m benchmarks.bench_observation_ids --prefill 1000000 --rows 200000
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+from sqlalchemy import create_engine, insert
+
+from application.ids import new_id
+from application.models import Observation
+
+SCHEMES = {
+    "uuid4": lambda: f"obs-{uuid.uuid4()}",
+    "ulid": lambda: new_id("obs"),
+}
+
+BATCH_SIZE = 1000
+
+
+def rows(make_id, count):
+    now = datetime.utcnow()
+    for _ in range(count):
+        yield {
+            "observationID": make_id(),
+            "timestamp": now,
+            "temperature": random.uniform(-10, 40),
+            "humidity": random.uniform(0, 100),
+            "deviceID": "device-1",
+        }
+
+
+def insert_batches(engine, make_id, count):
+    """Insert count rows in committed batches and return rows per second."""
+    table = Observation.__table__
+    generator = rows(make_id, count)
+    began = time.perf_counter()
+    for offset in range(0, count, BATCH_SIZE):
+        batch = [next(generator) for _ in range(min(BATCH_SIZE, count - offset))]
+        with engine.begin() as conn:
+            conn.execute(insert(table), batch)
+    return count / (time.perf_counter() - began)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--prefill", type=int, default=500000)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for scheme, make_id in SCHEMES.items():
+            engine = create_engine(f"sqlite:///{os.path.join(workdir, f'{scheme}.db')}")
+            Observation.__table__.create(engine)
+            insert_batches(engine, make_id, args.prefill)
+            rate = insert_batches(engine, make_id, args.rows)
+            engine.dispose()
+            results.append({"scheme": scheme, "prefill": args.prefill, "rows": args.rows, "rows_per_second": round(rate)})
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'scheme':<8} {'prefill':>10} {'rows/s':>10}")
+    for result in results:
+        print(f"{result['scheme']:<8} {result['prefill']:>10} {result['rows_per_second']:>10}")
+
+
+if __name__ == "__main__":
+    main()
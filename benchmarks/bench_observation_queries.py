@@ -0,0 +1,109 @@
+"""
+Benchmark: device/date range queries on the observation table as it grows.
+
+Builds throwaway SQLite databases of increasing size, once with the
+observation indexes and once without, and times the query that
+GET /observations/?deviceID=...&startDate=...&endDate=... issues.
+With the (deviceID, timestamp) index the query time should stay roughly
+flat as the table grows; without it the time grows linearly.
+
+Usage:
+    python -m benchmarks.bench_observation_queries --sizes 10000 100000 1000000
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert, select
+
+from application.models import Observation, IoTDevice
+
+DEVICES = 100
+START = datetime(2024, 1, 1)
+
+
+def build_database(path, size, with_indexes):
+    """Create a database holding `size` observations spread over DEVICES devices."""
+    engine = create_engine(f"sqlite:///{path}")
+    IoTDevice.__table__.create(engine)
+    Observation.__table__.create(engine)
+    if not with_indexes:
+        with engine.begin() as conn:
+            for index in Observation.__table__.indexes:
+                index.drop(conn)
+
+    device_ids = [f"device-{i}" for i in range(DEVICES)]
+    with engine.begin() as conn:
+        conn.execute(insert(IoTDevice.__table__), [
+            {"deviceID": device_id, "location": "bench", "batteryStatus": "Full", "transmissionInterval": 60}
+            for device_id in device_ids
+        ])
+        chunk = []
+        for i in range(size):
+            chunk.append({
+                "observationID": f"obs-{i}",
+                # One reading per device per minute
+                "timestamp": START + timedelta(minutes=i // DEVICES),
+                "temperature": random.uniform(-10, 40),
+                "humidity": random.uniform(0, 100),
+                "deviceID": device_ids[i % DEVICES],
+            })
+            if len(chunk) == 50000:
+                conn.execute(insert(Observation.__table__), chunk)
+                chunk = []
+        if chunk:
+            conn.execute(insert(Observation.__table__), chunk)
+    return engine
+
+
+def time_range_query(engine, size, repeat):
+    """Time a one-hour window for one device, at a random offset in the table."""
+    table = Observation.__table__
+    span_minutes = max(size // DEVICES, 60)
+    timings = []
+    with engine.connect() as conn:
+        for _ in range(repeat):
+            start = START + timedelta(minutes=random.randint(0, span_minutes - 60))
+            query = select(table).where(
+                table.c.deviceID == f"device-{random.randrange(DEVICES)}",
+                table.c.timestamp >= start,
+                table.c.timestamp <= start + timedelta(hours=1),
+            )
+            began = time.perf_counter()
+            conn.execute(query).all()
+            timings.append(time.perf_counter() - began)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in args.sizes:
+            for with_indexes in (True, False):
+                path = os.path.join(workdir, f"obs-{size}-{int(with_indexes)}.db")
+                engine = build_database(path, size, with_indexes)
+                median = time_range_query(engine, size, args.repeat)
+                engine.dispose()
+                results.append({"rows": size, "indexed": with_indexes, "median_ms": round(median * 1000, 3)})
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'rows':>10} {'indexed':>8} {'median ms':>10}")
+    for result in results:
+        print(f"{result['rows']:>10} {str(result['indexed']):>8} {result['median_ms']:>10}")
+
+
+if __name__ == "__main__":
+    main()
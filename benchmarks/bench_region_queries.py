@@ -0,0 +1,108 @@
+"""
+Benchmark: radius queries on observation coordinates as the table grows.
+
+Builds throwaway SQLite databases of increasing size with readings spread
+over the globe and times a 50 km `near` query three ways: the bounding box
+on the (latitude, longitude) index followed by the exact distance check, as
+GET /observations/?near=...&radius=... issues it; the same query without the
+index; and the exact distance check alone, which evaluates every row.
+
+Usage:
+    python -m benchmarks.bench_region_queries --sizes 10000 100000 1000000
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine, insert, select
+
+from application.engine import register_sqlite_functions
+from application.geo import distance_km, near_clause
+from application.models import IoTDevice, Observation
+
+RADIUS_KM = 50
+MODES = ("indexed", "unindexed", "distance only")
+
+
+def build_database(path, size, with_index):
+    """Create a database holding `size` observations at random coordinates."""
+    engine = create_engine(f"sqlite:///{path}")
+    register_sqlite_functions(engine)
+    IoTDevice.__table__.create(engine)
+    Observation.__table__.create(engine)
+    if not with_index:
+        with engine.begin() as conn:
+            next(index for index in Observation.__table__.indexes if index.name == "ix_observation_lat_lon").drop(conn)
+
+    with engine.begin() as conn:
+        conn.execute(insert(IoTDevice.__table__), {
+            "deviceID": "device-1", "location": "bench", "batteryStatus": "Full", "transmissionInterval": 60
+        })
+        for offset in range(0, size, 50000):
+            conn.execute(insert(Observation.__table__), [
+                {
+                    "observationID": f"obs-{i}",
+                    "timestamp": datetime(2024, 1, 1),
+                    "temperature": 20.0,
+                    "humidity": 50.0,
+                    "latitude": random.uniform(-90, 90),
+                    "longitude": random.uniform(-180, 180),
+                    "deviceID": "device-1",
+                }
+                for i in range(offset, min(offset + 50000, size))
+            ])
+    return engine
+
+
+def time_near_query(engine, mode, repeat):
+    """Time the radius query around random centres away from the poles."""
+    table = Observation.__table__
+    timings = []
+    with engine.connect() as conn:
+        for _ in range(repeat):
+            latitude, longitude = random.uniform(-60, 60), random.uniform(-180, 180)
+            if mode == "distance only":
+                condition = distance_km(table.c.latitude, table.c.longitude, latitude, longitude) <= RADIUS_KM
+            else:
+                condition = near_clause(table.c.latitude, table.c.longitude, latitude, longitude, RADIUS_KM)
+            began = time.perf_counter()
+            conn.execute(select(table.c.observationID).where(condition)).all()
+            timings.append(time.perf_counter() - began)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in args.sizes:
+            engines = {
+                with_index: build_database(os.path.join(workdir, f"geo-{size}-{int(with_index)}.db"), size, with_index)
+                for with_index in (True, False)
+            }
+            for mode in MODES:
+                median = time_near_query(engines[mode == "indexed"], mode, args.repeat)
+                results.append({"rows": size, "mode": mode, "median_ms": round(median * 1000, 3)})
+            for engine in engines.values():
+                engine.dispose()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'rows':>10} {'mode':<14} {'median ms':>10}")
+    for result in results:
+        print(f"{result['rows']:>10} {result['mode']:<14} {result['median_ms']:>10}")
+
+
+if __name__ == "__main__":
+    main()
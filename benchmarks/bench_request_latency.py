@@ -0,0 +1,75 @@
+"""
+Benchmark: per-request latency with and without a per-request schema check.
+
+Until the schema bootstrap moved to startup, every request ran
+db.create_all() from a before_request hook. This benchmark times a few
+cheap endpoints through the Flask test client as the app is now, then
+again with that legacy hook re-attached, to show the overhead removed.
+
+Usage:
+    python -m benchmarks.bench_request_latency --requests 2000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+ENDPOINTS = ("/", "/iot-devices/", "/institutions/")
+
+
+def measure(client, path, requests):
+    """Return sorted per-request latencies in milliseconds."""
+    timings = []
+    for _ in range(requests):
+        began = time.perf_counter()
+        client.get(path)
+        timings.append((time.perf_counter() - began) * 1000)
+    timings.sort()
+    return timings
+
+
+def percentile(timings, fraction):
+    return round(timings[min(int(len(timings) * fraction), len(timings) - 1)], 4)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ["DATABASE_URI"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    from app import app, db
+
+    def legacy_create_tables():
+        db.create_all()
+
+    results = []
+    client = app.test_client()
+    for label in ("startup bootstrap", "create_all per request"):
+        if label == "create_all per request":
+            app.before_request_funcs.setdefault(None, []).append(legacy_create_tables)
+        for path in ENDPOINTS:
+            measure(client, path, 50)  # warm up
+            timings = measure(client, path, args.requests)
+            results.append({
+                "mode": label,
+                "path": path,
+                "p50_ms": percentile(timings, 0.50),
+                "p95_ms": percentile(timings, 0.95),
+                "p99_ms": percentile(timings, 0.99),
+            })
+    app.before_request_funcs[None].remove(legacy_create_tables)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'mode':<24} {'path':<16} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for result in results:
+        print(f"{result['mode']:<24} {result['path']:<16} {result['p50_ms']:>8} {result['p95_ms']:>8} {result['p99_ms']:>8}")
+
+
+if __name__ == "__main__":
+    main()
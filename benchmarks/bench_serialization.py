@@ -0,0 +1,116 @@
+"""
+Benchmark: building a large GET /observations/ response body.
+
+Compares the old path (load full ORM objects, build each dict field by
+field, encode with the standard json module) against the serializer
+layer (select only the serialized columns, encode rows with the
+Serializer, then orjson when it is installed). Both run against the same
+in-memory SQLite table and produce the same JSON document.
+
+Usage:
+    python -m benchmarks.bench_serialization --rows 100000
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+from flask import Flask
+from sqlalchemy import insert
+
+from application.extensions import db
+from application.models import IoTDevice, Observation
+from application.serializers import observation_serializer
+from application.utils import JSONHelper, orjson
+
+START = datetime(2024, 1, 1)
+
+
+def seed(size):
+    db.session.execute(insert(IoTDevice.__table__), [
+        {"deviceID": "device-1", "location": "bench", "batteryStatus": "Full", "transmissionInterval": 60}
+    ])
+    db.session.execute(insert(Observation.__table__), [
+        {
+            "observationID": f"obs-{i:08d}",
+            "timestamp": START + timedelta(seconds=i),
+            "temperature": random.uniform(-10, 40),
+            "humidity": random.uniform(0, 100),
+            "windSpeed": random.uniform(0, 20),
+            "locationCoordinates": "45.123456, -73.123456",
+            "latitude": 45.123456,
+            "longitude": -73.123456,
+            "deviceID": "device-1",
+        }
+        for i in range(size)
+    ])
+    db.session.commit()
+
+
+def hand_built():
+    """The per-route dict building this layer replaced."""
+    data = [
+        {
+            "observationID": obs.observationID,
+            "timestamp": obs.timestamp.isoformat(),
+            "temperature": obs.temperature,
+            "humidity": obs.humidity,
+            "windSpeed": obs.windSpeed,
+            "precipitation": obs.precipitation,
+            "locationCoordinates": obs.locationCoordinates,
+            "latitude": obs.latitude,
+            "longitude": obs.longitude,
+            "deviceID": obs.deviceID,
+        }
+        for obs in Observation.query.all()
+    ]
+    return json.dumps({"observations": data}, sort_keys=True).encode()
+
+
+def serialized():
+    data = observation_serializer.dump_many(db.session.execute(observation_serializer.select()))
+    return JSONHelper.dumps({"observations": data}) or json.dumps({"observations": data}, sort_keys=True).encode()
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        db.session.expunge_all()
+        began = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - began)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        seed(args.rows)
+        assert json.loads(hand_built()) == json.loads(serialized())
+        results = [
+            {"path": "hand-built + json", "seconds": round(best_of(hand_built, args.repeat), 4)},
+            {"path": f"serializer + {'orjson' if orjson else 'json'}", "seconds": round(best_of(serialized, args.repeat), 4)},
+        ]
+
+    for result in results:
+        result["rows_per_s"] = int(args.rows / result["seconds"])
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'path':<24} {'seconds':>8} {'rows/s':>10}")
+    for result in results:
+        print(f"{result['path']:<24} {result['seconds']:>8} {result['rows_per_s']:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark: single-reading POST /observations/ with and without write-behind.
+
+Posts readings one at a time through the Flask test client against a
+throwaway SQLite file, once committing in the request and once with
+WRITE_BEHIND_INGEST, where the request only queues the reading. Reports
+request latency percentiles and end-to-end throughput, which for
+write-behind includes draining the queue.
+
+Usage:
+    python -m benchmarks.bench_write_behind --requests 5000
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
+
+from application import create_app
+from application.extensions import db
+from application.write_behind import get_write_behind_queue
+from config import TestingConfig
+
+
+def percentile(timings, fraction):
+    return round(timings[min(int(len(timings) * fraction), len(timings) - 1)], 4)
+
+
+def run(write_behind, requests, workdir):
+    class BenchConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(workdir, f'bench-{int(write_behind)}.db')}"
+        SQLALCHEMY_ENGINE_OPTIONS = {}
+        WRITE_BEHIND_INGEST = write_behind
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+    client = app.test_client()
+    device = client.post("/iot-devices/", json={"location": "bench", "batteryStatus": "Full", "transmissionInterval": 60})
+    device_id = device.get_json()["data"]["deviceID"]
+
+    timings = []
+    began = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(requests):
+            request_began = time.perf_counter()
+            response = client.post("/observations/", json={
+                "deviceID": device_id,
+                "timestamp": f"2024-01-01T{i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}",
+                "temperature": 20.0,
+                "humidity": 50.0,
+            })
+            timings.append((time.perf_counter() - request_began) * 1000)
+            assert response.status_code in (201, 202), response.status_code
+    if write_behind:
+        with app.app_context():
+            get_write_behind_queue().drain()
+    elapsed = time.perf_counter() - began
+
+    timings.sort()
+    return {
+        "mode": "write-behind" if write_behind else "commit per request",
+        "p50_ms": percentile(timings, 0.50),
+        "p95_ms": percentile(timings, 0.95),
+        "p99_ms": percentile(timings, 0.99),
+        "readings_per_s": int(requests / elapsed),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        results = [run(write_behind, args.requests, workdir) for write_behind in (False, True)]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'mode':<20} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'readings/s':>11}")
+    for result in results:
+        print(f"{result['mode']:<20} {result['p50_ms']:>8} {result['p95_ms']:>8} {result['p99_ms']:>8} {result['readings_per_s']:>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Minimal local Stripe stand-in for offline benchmarks.
+
+Answers the three calls the checkout path makes (create customer,
+create checkout session, retrieve checkout session) with canned JSON
+after an optional delay that simulates upstream latency. Point the app
+at it with STRIPE_API_BASE=http://127.0.0.1:<port>.
+
+Usage:
+    python -m benchmarks.stripe_stub --port 12111 --latency-ms 150
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import argparse
+import itertools
+import json
+import threading
+import time
+
+_ids = itertools.count(1)
+
+
+def make_handler(latency):
+    class StripeStubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is measurable
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if self.path == "/v1/customers":
+                self._reply({"id": f"cus_stub{next(_ids)}", "object": "customer"})
+            elif self.path == "/v1/checkout/sessions":
+                session_id = f"cs_stub{next(_ids)}"
+                self._reply({
+                    "id": session_id,
+                    "object": "checkout.session",
+                    "url": f"https://checkout.stripe.test/{session_id}",
+                    "payment_intent": None,
+                })
+            else:
+                self._reply({"error": {"message": "Unknown path"}}, 404)
+
+        def do_GET(self):
+            if self.path.startswith("/v1/checkout/sessions/"):
+                session_id = self.path.rsplit("/", 1)[-1]
+                self._reply({"id": session_id, "object": "checkout.session", "payment_intent": f"pi_{session_id}"})
+            else:
+                self._reply({"error": {"message": "Unknown path"}}, 404)
+
+        def _reply(self, body, status=200):
+            time.sleep(latency)
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    return StripeStubHandler
+
+
+def start(port=0, latency_ms=0):
+    """Start the stub on a background thread. Returns (server, base_url)."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(latency_ms / 1000))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=12111)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    args = parser.parse_args()
+    server, base_url = start(args.port, args.latency_ms)
+    print(f"Stripe stub listening on {base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,397 @@
+"""
+Benchmark suite: every blueprint's hot endpoints, in-process and under gunicorn.
+
+Builds a throwaway SQLite database per table size (devices, institutions,
+an API token and `--rows` mock observations), starts the local Stripe stub
+and replays each scenario:
+
+  ingest_single      POST /observations/, one reading
+  ingest_batch       POST /observations/batch, --batch-size readings
+  read_filtered      GET /observations/ for one device and a one-hour window
+  poll_latest        GET /observations/latest for one device (token-validated polling)
+  list_devices       GET /iot-devices/
+  list_institutions  GET /institutions/
+  checkout           POST /payment/checkout against the Stripe stub
+
+The `inprocess` target drives the app through the Flask test client from
+one thread. The `gunicorn` target starts `gunicorn -w --workers app:app`
+and drives it over HTTP from `--concurrency` client threads. Both report
+throughput and p50/p95/p99 latency.
+
+Results are written as JSON to benchmarks/results/<commit>.json (or
+--output), tagged with the commit and environment, and `compare` diffs
+two result files, exiting non-zero on a regression past --threshold.
+
+Usage:
+    python -m benchmarks.suite run --rows 100000 --requests 1000
+    python -m benchmarks.suite run --targets inprocess gunicorn --workers 4 --concurrency 16
+    python -m benchmarks.suite run --rows 100000 1000000 10000000 --scenarios read_filtered poll_latest
+    python -m benchmarks.suite compare benchmarks/results/abc1234.json benchmarks/results/def5678.json
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from benchmarks import stripe_stub
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+DEVICES = 100
+INSTITUTIONS = 50
+API_TOKEN = "bench-token"
+SEED = 42
+
+SCENARIOS = ("ingest_single", "ingest_batch", "read_filtered", "poll_latest", "list_devices", "list_institutions", "checkout")
+TARGETS = ("inprocess", "gunicorn")
+
+# Compared between result files; higher is better only for throughput
+COMPARED_METRICS = ("requests_per_s", "p50_ms", "p95_ms", "p99_ms")
+
+
+def percentile(timings, fraction):
+    return round(timings[min(int(len(timings) * fraction), len(timings) - 1)], 3)
+
+
+class Workload:
+    """Request factories for the scenarios, over the devices seeded into one database."""
+
+    def __init__(self, device_ids, batch_size, now):
+        self.device_ids = device_ids
+        self.batch_size = batch_size
+        self.now = now
+        self._readings = 0
+        self._lock = threading.Lock()
+
+    def request(self, scenario, rng):
+        """Return (method, path, json body or None, headers) for one request."""
+        token = {"Authorization": API_TOKEN}
+        device_id = rng.choice(self.device_ids)
+        if scenario == "ingest_single":
+            return "POST", "/observations/", self._reading(device_id, rng), {}
+        if scenario == "ingest_batch":
+            return "POST", "/observations/batch", [self._reading(device_id, rng) for _ in range(self.batch_size)], {}
+        if scenario == "read_filtered":
+            start = self.now - timedelta(hours=rng.randint(2, 23))
+            query = f"deviceID={device_id}&startDate={start.isoformat()}&endDate={(start + timedelta(hours=1)).isoformat()}&limit=100"
+            return "GET", f"/observations/?{query}", None, token
+        if scenario == "poll_latest":
+            return "GET", f"/observations/latest?deviceID={device_id}", None, token
+        if scenario == "list_devices":
+            return "GET", "/iot-devices/", None, {}
+        if scenario == "list_institutions":
+            return "GET", "/institutions/", None, {}
+        if scenario == "checkout":
+            customer = rng.randrange(20)
+            return "POST", "/payment/checkout", {
+                "customer_id": f"bench-customer-{customer}",
+                "email": f"bench{customer}@example.com",
+                "name": "Bench Customer",
+                "order_id": f"order-{self._next()}",
+                "amount": 12.5,
+                "success_url": "https://example.com/success",
+                "cancel_url": "https://example.com/cancel",
+            }, {}
+        raise ValueError(scenario)
+
+    def _next(self):
+        with self._lock:
+            self._readings += 1
+            return self._readings
+
+    def _reading(self, device_id, rng):
+        return {
+            "deviceID": device_id,
+            "timestamp": (self.now + timedelta(milliseconds=self._next())).isoformat(),
+            "temperature": round(rng.uniform(-10, 40), 2),
+            "humidity": round(rng.uniform(0, 100), 2),
+            "windSpeed": round(rng.uniform(0, 20), 2),
+            "locationCoordinates": f"{rng.uniform(-90, 90):.6f}, {rng.uniform(-180, 180):.6f}",
+        }
+
+
+def bench_config(database_uri, stripe_base):
+    """Production settings against the benchmark database and the Stripe stub."""
+    from config import Config
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = database_uri
+        SQLALCHEMY_ENGINE_OPTIONS = {}
+        STRIPE_API_BASE = stripe_base
+        STRIPE_SECRET_KEY = "sk_test_stub"
+        AUTO_UPGRADE_SCHEMA = False
+
+    return BenchConfig
+
+
+def build_database(config, rows):
+    """Create the schema and seed devices, institutions, an API token and `rows` observations."""
+    from application import create_app
+    from application.extensions import db
+    from application.mock_data import seed_observations
+    from application.models import APIAccess, Institution, IoTDevice
+    from application.schema import upgrade_schema
+
+    class BuildConfig(config):
+        WARM_DEVICE_REGISTRY = False  # no tables yet
+
+    app = create_app(BuildConfig)
+    with app.app_context():
+        upgrade_schema()
+        device_ids = [f"bench-device-{i}" for i in range(DEVICES)]
+        db.session.add_all(
+            IoTDevice(deviceID=device_id, location="bench", batteryStatus="Full", transmissionInterval=60)
+            for device_id in device_ids
+        )
+        db.session.add_all(
+            Institution(institutionID=f"bench-institution-{i}", name=f"Institution {i}", email=f"institution{i}@example.com")
+            for i in range(INSTITUTIONS)
+        )
+        db.session.add(APIAccess(
+            accessID="bench-access", token=API_TOKEN, institutionID="bench-institution-0",
+            expirationDate=datetime.utcnow() + timedelta(days=365),
+        ))
+        db.session.commit()
+        if rows:
+            seed_observations(device_ids, max(rows // DEVICES, 1), seed=SEED)
+        db.engine.dispose()
+    return device_ids
+
+
+def summarize(target, scenario, rows, timings, errors, elapsed):
+    timings.sort()
+    return {
+        "target": target,
+        "scenario": scenario,
+        "rows": rows,
+        "requests": len(timings),
+        "errors": errors,
+        "requests_per_s": round(len(timings) / elapsed, 1),
+        "p50_ms": percentile(timings, 0.50),
+        "p95_ms": percentile(timings, 0.95),
+        "p99_ms": percentile(timings, 0.99),
+    }
+
+
+def run_inprocess(config, workload, scenarios, requests, rows):
+    from application import create_app
+
+    app = create_app(config)
+    client = app.test_client()
+    results = []
+    for scenario in scenarios:
+        rng = random.Random(SEED)
+        timings, errors = [], 0
+        began = time.perf_counter()
+        for _ in range(requests):
+            method, path, body, headers = workload.request(scenario, rng)
+            request_began = time.perf_counter()
+            response = client.open(path, method=method, json=body, headers=headers)
+            response.get_data()
+            timings.append((time.perf_counter() - request_began) * 1000)
+            errors += response.status_code >= 400
+        results.append(summarize("inprocess", scenario, rows, timings, errors, time.perf_counter() - began))
+    return results
+
+
+def start_gunicorn(database_uri, stripe_base, workers, workdir):
+    """Start gunicorn on a free port. Returns (process, port)."""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    env = dict(
+        os.environ,
+        DATABASE_URI=database_uri,
+        STRIPE_API_BASE=stripe_base,
+        STRIPE_SECRET_KEY="sk_test_stub",
+        AUTO_UPGRADE_SCHEMA="0",
+        CACHE_BACKEND="sqlite",
+        CACHE_PATH=os.path.join(workdir, "cache.db"),
+    )
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-w", str(workers), "-b", f"127.0.0.1:{port}", "--log-level", "warning", "app:app"],
+        cwd=ROOT, env=env,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            connection.request("GET", "/")
+            if connection.getresponse().status == 200:
+                return process, port
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("gunicorn did not start")
+
+
+def run_gunicorn(port, workload, scenarios, requests, concurrency, rows):
+    results = []
+    for scenario in scenarios:
+        timings, errors = [], [0]
+        lock = threading.Lock()
+
+        def client(worker):
+            rng = random.Random(SEED + worker)
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            local = []
+            for _ in range(requests // concurrency):
+                method, path, body, headers = workload.request(scenario, rng)
+                payload = json.dumps(body).encode() if body is not None else None
+                if payload is not None:
+                    headers = dict(headers, **{"Content-Type": "application/json"})
+                request_began = time.perf_counter()
+                connection.request(method, path, body=payload, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                local.append((time.perf_counter() - request_began) * 1000)
+                if response.status >= 400:
+                    with lock:
+                        errors[0] += 1
+            connection.close()
+            with lock:
+                timings.extend(local)
+
+        threads = [threading.Thread(target=client, args=(worker,)) for worker in range(concurrency)]
+        began = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        results.append(summarize("gunicorn", scenario, rows, timings, errors[0], time.perf_counter() - began))
+    return results
+
+
+def git_commit():
+    """Short commit hash and whether the tree has uncommitted changes."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT, capture_output=True, text=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+    return commit, dirty
+
+
+def run(args):
+    commit, dirty = git_commit()
+    server, stripe_base = stripe_stub.start(latency_ms=args.stripe_latency_ms)
+    results = []
+    try:
+        for rows in args.rows:
+            with tempfile.TemporaryDirectory() as workdir:
+                database_uri = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+                config = bench_config(database_uri, stripe_base)
+                build_began = time.perf_counter()
+                device_ids = build_database(config, rows)
+                print(f"Seeded {rows} observations in {time.perf_counter() - build_began:.1f}s", file=sys.stderr)
+                workload = Workload(device_ids, args.batch_size, datetime.utcnow())
+
+                if "inprocess" in args.targets:
+                    results += run_inprocess(config, workload, args.scenarios, args.requests, rows)
+                if "gunicorn" in args.targets:
+                    process, port = start_gunicorn(database_uri, stripe_base, args.workers, workdir)
+                    try:
+                        results += run_gunicorn(port, workload, args.scenarios, args.requests, args.concurrency, rows)
+                    finally:
+                        process.terminate()
+                        process.wait()
+    finally:
+        server.shutdown()
+
+    report = {
+        "commit": commit,
+        "dirty": dirty,
+        "date": datetime.utcnow().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "settings": {
+            "requests": args.requests, "batch_size": args.batch_size, "workers": args.workers,
+            "concurrency": args.concurrency, "stripe_latency_ms": args.stripe_latency_ms,
+        },
+        "results": results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit}{'-dirty' if dirty else ''}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as results_file:
+        json.dump(report, results_file, indent=2)
+        results_file.write("\n")
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+    print(f"{'target':<10} {'scenario':<18} {'rows':>9} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for result in results:
+        print(f"{result['target']:<10} {result['scenario']:<18} {result['rows']:>9} {result['requests_per_s']:>9} "
+              f"{result['p50_ms']:>8} {result['p95_ms']:>8} {result['p99_ms']:>8} {result['errors']:>7}")
+    print(f"Results written to {output}")
+    return 0
+
+
+def compare(args):
+    """Diff two result files; returns 1 if any metric regressed by more than the threshold."""
+    with open(args.baseline) as baseline_file, open(args.candidate) as candidate_file:
+        baseline, candidate = json.load(baseline_file), json.load(candidate_file)
+    key = lambda result: (result["target"], result["scenario"], result["rows"])
+    before = {key(result): result for result in baseline["results"]}
+
+    regressions = 0
+    print(f"{baseline['commit']} -> {candidate['commit']}")
+    print(f"{'target':<10} {'scenario':<18} {'rows':>9} {'metric':<15} {'before':>9} {'after':>9} {'change':>8}")
+    for result in candidate["results"]:
+        previous = before.get(key(result))
+        if previous is None:
+            continue
+        for metric in COMPARED_METRICS:
+            old, new = previous[metric], result[metric]
+            change = (new - old) / old * 100 if old else 0.0
+            # Lower throughput or higher latency is worse
+            worse = -change if metric == "requests_per_s" else change
+            flag = " !" if worse > args.threshold else ""
+            regressions += bool(flag)
+            print(f"{result['target']:<10} {result['scenario']:<18} {result['rows']:>9} {metric:<15} "
+                  f"{old:>9} {new:>9} {change:>+7.1f}%{flag}")
+    if regressions:
+        print(f"{regressions} metric(s) regressed by more than {args.threshold}%")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run the suite and write a results file.")
+    run_parser.add_argument("--targets", nargs="+", choices=TARGETS, default=["inprocess"])
+    run_parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    run_parser.add_argument("--rows", type=int, nargs="+", default=[100000], help="Observation table sizes.")
+    run_parser.add_argument("--requests", type=int, default=1000, help="Requests per scenario.")
+    run_parser.add_argument("--batch-size", type=int, default=100, help="Readings per ingest_batch request.")
+    run_parser.add_argument("--workers", type=int, default=4, help="gunicorn workers.")
+    run_parser.add_argument("--concurrency", type=int, default=16, help="Client threads against gunicorn.")
+    run_parser.add_argument("--stripe-latency-ms", type=float, default=0)
+    run_parser.add_argument("--output", help="Results file; defaults to benchmarks/results/<commit>.json.")
+    run_parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+
+    compare_parser = commands.add_parser("compare", help="Diff two results files.")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+    compare_parser.add_argument("--threshold", type=float, default=10, help="Percent change counted as a regression.")
+
+    args = parser.parse_args()
+    sys.exit(run(args) if args.command == "run" else compare(args))
+
+
+if __name__ == "__main__":
+    main()
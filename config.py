@@ -1,7 +1,88 @@
 import os
 
+
+def engine_options(uri):
+    """Pool settings for server databases; SQLite is tuned with pragmas instead (see SQLITE_PRAGMAS)."""
+    if uri.startswith('sqlite'):
+        return {}
+    return {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', '10')),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', '20')),
+        'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', '30')),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', '1800')),  # seconds; below typical server idle timeouts
+        'pool_pre_ping': os.getenv('DB_POOL_PRE_PING', '1') == '1',
+    }
+
+
 class Config:
-    SECRET_KEY = os.getenv('SECRET_KEY')
-    SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URI')
+    SECRET_KEY = os.getenv('SECRET_KEY', 'default_secret_key')
+    SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URI', 'sqlite:///data.db')
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY')
+
+    # Applied to every SQLite connection: WAL lets readers run alongside the single writer,
+    # and the busy timeout makes concurrent writers wait instead of failing with "database is locked"
+    SQLITE_PRAGMAS = {
+        'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'WAL'),
+        'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', '5000')),  # milliseconds
+        'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))),  # bytes
+    }
+
+    JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'default_jwt_secret_key')
+    STRIPE_SECRET_KEY = os.getenv('STRIPE_SECRET_KEY')
+    # Point at a local Stripe stand-in (e.g. stripe-mock) for offline runs
+    STRIPE_API_BASE = os.getenv('STRIPE_API_BASE')
+    STRIPE_HTTP_POOL_SIZE = int(os.getenv('STRIPE_HTTP_POOL_SIZE', '16'))
+    STRIPE_TIMEOUT = int(os.getenv('STRIPE_TIMEOUT', '30'))
+
+    # Upgrade the schema once at startup; set to 0 when `flask db upgrade` runs at deploy
+    AUTO_UPGRADE_SCHEMA = os.getenv('AUTO_UPGRADE_SCHEMA', '1') == '1'
+
+    # Cache backend: "memory" (per worker) or "sqlite" (shared by all workers on a host via CACHE_PATH)
+    CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'memory')
+    CACHE_PATH = os.getenv('CACHE_PATH')  # defaults to instance/cache.db
+
+    # Validated API tokens are cached for this many seconds. With CACHE_BACKEND=memory a
+    # revoked token keeps working in the other workers until their entry expires
+    API_TOKEN_CACHE_TTL = int(os.getenv('API_TOKEN_CACHE_TTL', '30'))
+
+    # Cached GET responses for devices, institutions and API tokens
+    RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', '1024'))
+    RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', '60'))
+
+    # Device registry: load devices at startup; flush activity to iot_device every N seconds
+    WARM_DEVICE_REGISTRY = os.getenv('WARM_DEVICE_REGISTRY', '1') == '1'
+    DEVICE_STATE_FLUSH_INTERVAL = int(os.getenv('DEVICE_STATE_FLUSH_INTERVAL', '5'))
+
+    # Write-behind ingestion: POST /observations/ queues readings and answers 202; a background
+    # thread group-commits up to WRITE_BEHIND_BATCH_SIZE rows or every WRITE_BEHIND_FLUSH_INTERVAL seconds
+    WRITE_BEHIND_INGEST = os.getenv('WRITE_BEHIND_INGEST', '0') == '1'
+    WRITE_BEHIND_QUEUE_SIZE = int(os.getenv('WRITE_BEHIND_QUEUE_SIZE', '10000'))
+    WRITE_BEHIND_BATCH_SIZE = int(os.getenv('WRITE_BEHIND_BATCH_SIZE', '500'))
+    WRITE_BEHIND_FLUSH_INTERVAL = float(os.getenv('WRITE_BEHIND_FLUSH_INTERVAL', '0.05'))
+
+    # Which blueprints to serve: a profile name from application.BLUEPRINT_PROFILES
+    APP_PROFILE = os.getenv('APP_PROFILE', 'full')
+
+    # Per-request latency, SQL and serialization metrics on GET /metrics
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', '1') == '1'
+    # Sample request stacks and write collapsed stacks of requests slower than this many seconds
+    PROFILE_SLOW_REQUESTS = float(os.getenv('PROFILE_SLOW_REQUESTS', '0')) or None
+    PROFILE_SAMPLE_INTERVAL = float(os.getenv('PROFILE_SAMPLE_INTERVAL', '0.005'))
+    PROFILE_DIR = os.getenv('PROFILE_DIR')  # defaults to instance/profiles
+    # Development: log the query report of requests that run more than this many SQL statements
+    QUERY_BUDGET_WARN = int(os.getenv('QUERY_BUDGET_WARN', '0'))
+
+class IngestConfig(Config):
+    # Device-facing workers: observations and device registry only, no payments or Swagger UI
+    APP_PROFILE = 'ingest'
+
+class TestingConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    AUTO_UPGRADE_SCHEMA = False
+    WARM_DEVICE_REGISTRY = False
+    DEVICE_STATE_FLUSH_INTERVAL = 0
+    WRITE_BEHIND_INGEST = False
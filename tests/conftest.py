@@ -1,14 +1,56 @@
+import json
 import pytest
-from app import app, db
+from datetime import datetime, timedelta
+from application import create_app
+from application.extensions import db
+from application.models import APIAccess, Institution
+from config import TestingConfig
+
+# Mock Authorization Token
+AUTH_TOKEN = "dc2496c9-1ad3-47cb-a067-55695aa1772d"
 
 @pytest.fixture(scope='module')
 def test_client():
-    app.config["TESTING"] = True
-    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"  # In-memory database
-    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app = create_app(TestingConfig)  # In-memory database
 
     with app.test_client() as testing_client:
         with app.app_context():
             db.create_all()  # Create tables
             yield testing_client
             db.drop_all()  # Clean up after tests
+
+# Fail a block that runs more SQL than declared: `with query_budget(3): test_client.post(...)`
+@pytest.fixture
+def query_budget(test_client):
+    from application.query_budget import query_budget
+    return query_budget
+
+# Register the mock token so endpoints behind an API token accept it.
+# Modules that need it opt in with `pytestmark = pytest.mark.usefixtures("api_token")`.
+@pytest.fixture(scope='module')
+def api_token(test_client):
+    if not APIAccess.query.filter_by(token=AUTH_TOKEN).first():
+        institution = Institution(institutionID="inst-test", name="Test Institution", email="test@example.com")
+        db.session.add(institution)
+        db.session.add(APIAccess(
+            accessID="access-test",
+            token=AUTH_TOKEN,
+            expirationDate=datetime.utcnow() + timedelta(days=1),
+            institutionID=institution.institutionID
+        ))
+        db.session.commit()
+    return AUTH_TOKEN
+
+# Mock IoT Device Registration
+def register_device(test_client):
+    device_data = {
+        "location": "Test Location",
+        "batteryStatus": "Full",
+        "transmissionInterval": 30
+    }
+    response = test_client.post("/iot-devices/", json=device_data, headers={"Authorization": AUTH_TOKEN})
+    assert response.status_code == 201
+
+    response_data = json.loads(response.data)
+    device_id = response_data["data"]["deviceID"]
+    return device_id, response
@@ -0,0 +1,50 @@
+import json
+from application import create_app
+from application.cache import get_api_token_cache
+from config import TestingConfig
+
+def create_institution(test_client, email):
+    response = test_client.post("/institutions/", json={"name": "Token Institute", "email": email})
+    assert response.status_code == 201
+    return json.loads(response.data)["data"]["id"]
+
+# Test Revoking a Token Takes Effect Immediately Despite the Cache
+def test_revoke_api_token_invalidates_cache(test_client):
+    institution_id = create_institution(test_client, "tokens@example.com")
+
+    response = test_client.post("/api-access/", json={"institutionID": institution_id})
+    assert response.status_code == 201
+    token_data = json.loads(response.data)["data"]
+
+    response = test_client.get("/observations/", headers={"Authorization": token_data["token"]})
+    assert response.status_code == 200
+    assert get_api_token_cache().get(token_data["token"]) is not None
+
+    response = test_client.delete(f"/api-access/{token_data['accessID']}")
+    assert response.status_code == 200
+    assert get_api_token_cache().get(token_data["token"]) is None
+
+    response = test_client.get("/observations/", headers={"Authorization": token_data["token"]})
+    assert response.status_code == 403
+
+# Test Expired Tokens Are Rejected
+def test_expired_api_token_rejected(test_client):
+    institution_id = create_institution(test_client, "expired@example.com")
+
+    response = test_client.post("/api-access/", json={"institutionID": institution_id, "expirationDays": -1})
+    token = json.loads(response.data)["data"]["token"]
+
+    response = test_client.get("/observations/", headers={"Authorization": token})
+    assert response.status_code == 403
+    assert json.loads(response.data)["message"] == "API token has expired."
+
+# Test the Token Cache Lifetime, Which Bounds Revocation Lag Between Workers, Is Configurable
+def test_api_token_cache_ttl():
+    assert TestingConfig.API_TOKEN_CACHE_TTL <= 30
+
+    class ShortTTLConfig(TestingConfig):
+        API_TOKEN_CACHE_TTL = 5
+
+    app = create_app(ShortTTLConfig, blueprints=["api_access"])
+    with app.app_context():
+        assert get_api_token_cache().ttl == 5
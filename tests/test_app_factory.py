@@ -0,0 +1,80 @@
+import os
+import subprocess
+import sys
+from application import create_app
+from application.extensions import db
+from config import TestingConfig
+
+class IngestTestingConfig(TestingConfig):
+    APP_PROFILE = 'ingest'
+
+def route_prefixes(app):
+    return {rule.rule.split('/')[1] for rule in app.url_map.iter_rules()}
+
+# Test the Ingest Profile Only Serves Device-Facing Blueprints
+def test_ingest_profile_blueprints():
+    app = create_app(IngestTestingConfig)
+    prefixes = route_prefixes(app)
+    assert {"observations", "iot-devices"} <= prefixes
+    assert not prefixes & {"payment", "institutions", "api-access", "swagger"}
+
+# Test Explicit Blueprint Selection Overrides the Profile
+def test_explicit_blueprints():
+    app = create_app(TestingConfig, blueprints=["institution"])
+    assert "institutions" in route_prefixes(app)
+    assert "observations" not in route_prefixes(app)
+
+# Test Building the App Does Not Import Stripe
+def test_create_app_defers_stripe_import():
+    probe = (
+        "import sys\n"
+        "from application import create_app\n"
+        "from config import TestingConfig\n"
+        "create_app(TestingConfig)\n"
+        "assert 'stripe' not in sys.modules\n"
+    )
+    subprocess.run([sys.executable, "-c", probe], check=True, cwd=os.path.dirname(os.path.dirname(__file__)))
+
+# Test SQLite Connections Get the Configured Pragmas
+def test_sqlite_pragmas_applied(tmp_path):
+    class FileTestingConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'pragmas.db'}"
+
+    app = create_app(FileTestingConfig)
+    with app.app_context():
+        with db.engine.connect() as conn:
+            assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+            assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1  # NORMAL
+            assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() == 5000
+
+# Test the App Starts on a Database Without the Schema Yet
+def test_create_app_before_schema(tmp_path):
+    class FreshTestingConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'fresh.db'}"
+        WARM_DEVICE_REGISTRY = True
+
+    app = create_app(FreshTestingConfig)
+    with app.app_context():
+        db.create_all()
+        from application.device_registry import get_device_registry
+        assert get_device_registry().known(["unknown-device"]) == set()
+
+# Test Two Apps in One Process Keep Separate Caches
+def test_apps_do_not_share_caches(tmp_path):
+    apps = []
+    for name in ("a", "b"):
+        class AppConfig(TestingConfig):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / f'{name}.db'}"
+
+        app = create_app(AppConfig)
+        with app.app_context():
+            db.create_all()
+        apps.append(app)
+    app_a, app_b = apps
+
+    device = app_a.test_client().post("/iot-devices/", json={"location": "Roof", "batteryStatus": "Full", "transmissionInterval": 30})
+    device_id = device.get_json()["data"]["deviceID"]
+    reading = {"deviceID": device_id, "timestamp": "2024-05-01T00:00:00", "temperature": 20.0, "humidity": 50.0}
+    assert app_a.test_client().post("/observations/", json=reading).status_code == 201
+    assert app_b.test_client().post("/observations/", json=reading).status_code == 404
+    assert app_a.extensions["caches"]["devices"] is not app_b.extensions["caches"]["devices"]
@@ -0,0 +1,84 @@
+import json
+from datetime import datetime
+import struct
+import pytest
+from application.binary_ingest import CONTENT_TYPE, FLOAT_COLUMNS, FRAME_HEADER, BatchTooLarge, decode_frames, encode_frame
+from application.models import Observation
+from tests.conftest import register_device
+
+READINGS = [
+    {"timestamp": datetime(2024, 5, 1, 12, 0, 0), "temperature": 21.5, "humidity": 40.25,
+     "windSpeed": 3.5, "precipitation": None, "latitude": 45.123456, "longitude": -73.123456},
+    {"timestamp": datetime(2024, 5, 1, 12, 1, 0, 500000), "temperature": -4.0, "humidity": 99.0},
+]
+
+# Test Frames Round-Trip into Observation Rows
+def test_decode_frames_round_trip():
+    body = encode_frame("device-a", READINGS) + encode_frame("device-b", READINGS[:1])
+    rows = decode_frames(body)
+    assert [row["deviceID"] for row in rows] == ["device-a", "device-a", "device-b"]
+    assert rows[0]["timestamp"] == datetime(2024, 5, 1, 12, 0, 0)
+    assert rows[0]["locationCoordinates"] == "45.123456, -73.123456"
+    assert rows[0]["precipitation"] is None
+    assert rows[1]["timestamp"] == datetime(2024, 5, 1, 12, 1, 0, 500000)
+    assert rows[1]["windSpeed"] is None and rows[1]["locationCoordinates"] is None
+
+# Test Malformed Bodies Are Rejected
+def test_decode_frames_rejects_malformed():
+    frame = encode_frame("device-a", READINGS)
+    for body in (frame[:-1], b"XX" + frame[2:], encode_frame("device-a", [{"timestamp": datetime(2024, 1, 1), "temperature": 1.0}])):
+        try:
+            decode_frames(body)
+        except ValueError:
+            continue
+        raise AssertionError("expected ValueError")
+
+# Test Out-of-Range Timestamps and Locations Are Rejected
+def test_decode_frames_rejects_out_of_range():
+    header = FRAME_HEADER.pack(b"OB", 1, 8, 1) + b"device-a"
+    floats = struct.pack(f"<{len(FLOAT_COLUMNS)}d", 20.0, 50.0, 0.0, 0.0, 45.0, -73.0)
+    for timestamp in (2 ** 63 - 1, -(2 ** 63)):
+        with pytest.raises(ValueError, match="Timestamp out of range"):
+            decode_frames(header + struct.pack("<q", timestamp) + floats)
+    for latitude, longitude in ((91.0, 0.0), (0.0, -181.0)):
+        reading = dict(READINGS[0], latitude=latitude, longitude=longitude)
+        with pytest.raises(ValueError, match="Location out of range"):
+            decode_frames(encode_frame("device-a", [reading]))
+    for field in ("temperature", "windSpeed", "latitude"):
+        reading = dict(READINGS[0], **{field: float("-inf")})
+        with pytest.raises(ValueError, match=f"{field} must be finite"):
+            decode_frames(encode_frame("device-a", [reading]))
+
+# Test Oversized Bodies Are Refused From the Frame Headers
+def test_decode_frames_max_records():
+    body = encode_frame("device-a", READINGS) + encode_frame("device-b", READINGS)
+    assert len(decode_frames(body, max_records=4)) == 4
+    with pytest.raises(BatchTooLarge):
+        decode_frames(body, max_records=3)
+    # The count in the header is enough; the columns are never read
+    with pytest.raises(BatchTooLarge):
+        decode_frames(FRAME_HEADER.pack(b"OB", 1, 1, 10 ** 6) + b"x", max_records=3)
+
+# Test Posting Binary Frames to the Batch Endpoint
+def test_add_observations_binary(test_client):
+    device_id, _ = register_device(test_client)
+    body = encode_frame(device_id, READINGS) + encode_frame("invalid-device-id", READINGS[:1])
+
+    response = test_client.post("/observations/batch", data=body, content_type=CONTENT_TYPE)
+    assert response.status_code == 207
+    response_data = json.loads(response.data)["data"]
+    assert response_data["inserted"] == 2
+    assert [result["status"] for result in response_data["results"]] == [201, 201, 404]
+    assert Observation.query.filter_by(deviceID=device_id).count() == 2
+
+    response = test_client.post("/observations/batch", data=b"garbage", content_type=CONTENT_TYPE)
+    assert response.status_code == 400
+
+    timestamp = struct.pack("<q", 2 ** 63 - 1)
+    body = FRAME_HEADER.pack(b"OB", 1, len(device_id), 1) + device_id.encode() + timestamp + struct.pack("<6d", 20.0, 50.0, 0, 0, 0, 0)
+    response = test_client.post("/observations/batch", data=body, content_type=CONTENT_TYPE)
+    assert response.status_code == 400
+
+    body = FRAME_HEADER.pack(b"OB", 1, len(device_id), 10 ** 6) + device_id.encode()
+    response = test_client.post("/observations/batch", data=body, content_type=CONTENT_TYPE)
+    assert response.status_code == 413
@@ -0,0 +1,88 @@
+import os
+import time
+from application.cache import Cache, SQLiteCacheStore, TTLCache
+
+# Test Least Recently Used Entries Are Evicted First
+def test_ttl_cache_lru_eviction():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+# Test Entries Expire and TTLs Are Capped
+def test_ttl_cache_expiry():
+    cache = TTLCache(maxsize=10, ttl=0.05)
+    cache.set("short", 1)
+    cache.set("capped", 2, ttl=3600)
+    cache.set("expired", 3, ttl=-1)
+    assert cache.get("expired") is None
+    time.sleep(0.06)
+    assert cache.get("short") is None
+    assert cache.get("capped") is None
+
+# Test Two Workers Share Entries and Invalidations Through the SQLite Store
+def test_shared_cache_across_workers(tmp_path):
+    path = str(tmp_path / "cache.db")
+    worker_a = Cache("tokens", ttl=60, store=SQLiteCacheStore(path))
+    worker_b = Cache("tokens", ttl=60, store=SQLiteCacheStore(path))
+    other = Cache("customers", ttl=60, store=SQLiteCacheStore(path))
+
+    worker_a.set("token-1", ("access-1", "inst-1"))
+    other.set("token-1", "unrelated")
+    assert worker_b.get("token-1") == ("access-1", "inst-1")  # filled from the shared store
+
+    worker_b.pop("token-1")
+    assert worker_a.get("token-1") is None  # local copy dropped by the broadcast
+    assert other.get("token-1") == "unrelated"
+
+    worker_a.set("token-2", 2)
+    assert worker_b.get("token-2") == 2
+    worker_a.clear()
+    assert worker_b.get("token-2") is None
+
+# Test a Fill Racing With an Invalidation Does Not Cache the Stale Value
+def test_fill_after_invalidation_not_cached(tmp_path):
+    local = Cache("tokens", ttl=60)
+    generation = local.generation()
+    local.pop("token-1")  # revoked while the fill was reading the database
+    local.set("token-1", "stale", generation=generation)
+    assert local.get("token-1") is None
+    local.set("token-1", "fresh", generation=local.generation())
+    assert local.get("token-1") == "fresh"
+
+    path = str(tmp_path / "cache.db")
+    worker_a = Cache("tokens", ttl=60, store=SQLiteCacheStore(path))
+    worker_b = Cache("tokens", ttl=60, store=SQLiteCacheStore(path))
+    generation = worker_a.generation()
+    worker_b.pop("token-1")  # revoked by another worker
+    worker_a.set("token-1", "stale", generation=generation)
+    assert worker_a.get("token-1") is None
+    assert worker_b.get("token-1") is None
+
+    # Invalidations of other keys do not undo a fill
+    generation = worker_a.generation()
+    worker_b.pop("token-2")
+    worker_a.set("token-1", "fresh", generation=generation)
+    assert worker_b.get("token-1") == "fresh"
+
+# Test Private Caches Share Invalidations but Never Write Values to the Store
+def test_private_cache_values_stay_local(tmp_path):
+    path = str(tmp_path / "cache.db")
+    worker_a = Cache("tokens", ttl=60, store=SQLiteCacheStore(path), share_values=False)
+    worker_b = Cache("tokens", ttl=60, store=SQLiteCacheStore(path), share_values=False)
+
+    worker_a.set("token-1", "secret")
+    worker_b.set("token-1", "secret")
+    assert worker_a.store.get("tokens", "token-1") is None
+    assert worker_b.get("token-1") == "secret"
+
+    worker_a.pop("token-1")  # revoked in one worker
+    assert worker_b.get("token-1") is None
+    for name in (path, f"{path}-wal"):
+        if os.path.exists(name):
+            with open(name, "rb") as db_file:
+                assert b"secret" not in db_file.read()
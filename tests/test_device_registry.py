@@ -0,0 +1,37 @@
+import json
+from datetime import datetime, timedelta
+from application.device_registry import get_device_registry
+from tests.conftest import register_device
+
+# Test Activity Is Tracked Without Scanning Observations
+def test_device_status_tracks_last_seen(test_client):
+    device_id, _ = register_device(test_client)
+    silent_id, _ = register_device(test_client)
+
+    now = datetime.utcnow().replace(microsecond=0)
+    batch = [
+        {"deviceID": device_id, "timestamp": (now - timedelta(seconds=offset)).isoformat(), "temperature": 20.0, "humidity": 50.0}
+        for offset in (10, 0, 20)
+    ]
+    test_client.post("/observations/batch", json=batch)
+
+    response = test_client.get("/iot-devices/status")
+    assert response.status_code == 200
+    devices = {device["deviceID"]: device for device in json.loads(response.data)["data"]["devices"]}
+    assert devices[device_id]["lastSeen"] == now.isoformat()
+    assert devices[device_id]["observationCount"] == 3
+    assert devices[device_id]["silent"] is False
+    assert devices[silent_id] == {
+        "deviceID": silent_id, "transmissionInterval": 30, "lastSeen": None, "observationCount": 0, "silent": True
+    }
+
+    response = test_client.get("/iot-devices/status?silent=true")
+    silent = [device["deviceID"] for device in json.loads(response.data)["data"]["devices"]]
+    assert silent_id in silent and device_id not in silent
+
+# Test New Devices Are Known Without a Query
+def test_registry_knows_created_devices(test_client):
+    device_id, _ = register_device(test_client)
+    registry = get_device_registry()
+    assert device_id in registry._devices
+    assert registry.known([device_id, "invalid-device-id"]) == {device_id}
@@ -0,0 +1,83 @@
+import csv
+import io
+import pytest
+from application.export import format_available
+from tests.conftest import AUTH_TOKEN, register_device
+
+pytestmark = pytest.mark.usefixtures("api_token")
+
+# Store a few readings for a fresh device
+def seed_device(test_client):
+    device_id, _ = register_device(test_client)
+    batch = [
+        {"deviceID": device_id, "timestamp": f"2024-03-01T00:0{i}:00", "temperature": 10.0 + i, "humidity": 50.0}
+        for i in range(3)
+    ]
+    test_client.post("/observations/batch", json=batch)
+    return device_id
+
+# Test Streaming a CSV Export with a Projection
+def test_export_observations_csv(test_client):
+    device_id = seed_device(test_client)
+
+    response = test_client.get(
+        f"/observations/export?deviceID={device_id}&fields=timestamp,temperature,windSpeed",
+        headers={"Authorization": AUTH_TOKEN}
+    )
+    assert response.status_code == 200
+    assert response.mimetype == "text/csv"
+    rows = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+    assert rows == [
+        ["timestamp", "temperature", "windSpeed"],
+        ["2024-03-01T00:00:00", "10.0", ""],
+        ["2024-03-01T00:01:00", "11.0", ""],
+        ["2024-03-01T00:02:00", "12.0", ""],
+    ]
+
+    response = test_client.get(
+        f"/observations/export?deviceID={device_id}&endDate=2024-03-01T00:01:00&fields=temperature",
+        headers={"Authorization": AUTH_TOKEN}
+    )
+    assert response.get_data(as_text=True) == "temperature\n10.0\n11.0\n"
+
+# Test Invalid Export Requests
+def test_export_observations_invalid(test_client):
+    response = test_client.get("/observations/export?fields=secret", headers={"Authorization": AUTH_TOKEN})
+    assert response.status_code == 400
+    response = test_client.get("/observations/export?format=xlsx", headers={"Authorization": AUTH_TOKEN})
+    assert response.status_code == 400
+    response = test_client.get("/observations/export")
+    assert response.status_code == 403
+    if not format_available("parquet"):
+        response = test_client.get("/observations/export?format=parquet", headers={"Authorization": AUTH_TOKEN})
+        assert response.status_code == 501
+
+# Test Arrow and Parquet Exports
+@pytest.mark.parametrize("export_format", ["arrow", "parquet"])
+def test_export_observations_columnar(test_client, export_format):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+    device_id = seed_device(test_client)
+
+    response = test_client.get(
+        f"/observations/export?format={export_format}&deviceID={device_id}&fields=timestamp,deviceID,temperature",
+        headers={"Authorization": AUTH_TOKEN}
+    )
+    assert response.status_code == 200
+    body = pa.BufferReader(response.get_data())
+    table = pa.ipc.open_stream(body).read_all() if export_format == "arrow" else pq.read_table(body)
+    assert table.column_names == ["timestamp", "deviceID", "temperature"]
+    assert table.column("temperature").to_pylist() == [10.0, 11.0, 12.0]
+    assert str(table.schema.field("timestamp").type) == "timestamp[us]"
+
+# Test the Export CLI Command
+def test_export_observations_cli(test_client, tmp_path):
+    device_id = seed_device(test_client)
+    output = tmp_path / "observations.csv"
+
+    runner = test_client.application.test_cli_runner()
+    result = runner.invoke(args=[
+        "db", "export-observations", "--device-id", device_id, "--fields", "temperature", "-o", str(output)
+    ])
+    assert result.exit_code == 0, result.output
+    assert output.read_text() == "temperature\n10.0\n11.0\n12.0\n"
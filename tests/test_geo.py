@@ -0,0 +1,106 @@
+import json
+import pytest
+from sqlalchemy import inspect, text
+from application.export import observation_query
+from application.geo import haversine_km, parse_bbox, parse_coordinates, parse_near
+from application.models import Observation, db
+from application.schema import upgrade_schema
+from tests.conftest import AUTH_TOKEN, register_device
+
+pytestmark = pytest.mark.usefixtures("api_token")
+
+# Readings posted by the region tests: name -> coordinates
+PLACES = {
+    "paris": "48.8566, 2.3522",
+    "versailles": "48.8049, 2.1204",
+    "london": "51.5074, -0.1278",
+    "fiji": "-17.7134, 178.0650",
+    "samoa": "-13.7590, -172.1046",
+}
+
+def post_places(test_client):
+    device_id, _ = register_device(test_client)
+    response = test_client.post("/observations/batch", json=[
+        {"deviceID": device_id, "timestamp": f"2024-05-01T00:0{i}:00", "temperature": float(i), "humidity": 50.0,
+         "locationCoordinates": coordinates}
+        for i, coordinates in enumerate(PLACES.values())
+    ] + [
+        {"deviceID": device_id, "timestamp": "2024-05-01T00:09:00", "temperature": 9.0, "humidity": 50.0,
+         "locationCoordinates": "somewhere"},
+    ])
+    assert response.status_code == 201
+    return device_id
+
+def places_for(test_client, device_id, query):
+    response = test_client.get(f"/observations/?deviceID={device_id}&{query}", headers={"Authorization": AUTH_TOKEN})
+    assert response.status_code == 200
+    names = {coordinates: name for name, coordinates in PLACES.items()}
+    return {names[row["locationCoordinates"]] for row in json.loads(response.data)["data"]["observations"]}
+
+# Test Parsing Coordinates, Boxes and Circles
+def test_parse_region_parameters():
+    assert parse_coordinates("45.123456, -73.123456") == (45.123456, -73.123456)
+    assert parse_coordinates("91, 0") is None
+    assert parse_coordinates("somewhere") is None
+    assert parse_coordinates(None) is None
+    assert parse_bbox("48,2,49,3") == (48.0, 2.0, 49.0, 3.0)
+    assert parse_near("48.8566,2.3522", "25") == (48.8566, 2.3522, 25.0)
+    for value in ("48,2,49", "49,2,48,3", "48,2,49,x"):
+        with pytest.raises(ValueError):
+            parse_bbox(value)
+    with pytest.raises(ValueError):
+        parse_near("48.8566,2.3522", "-1")
+    assert haversine_km(48.8566, 2.3522, 51.5074, -0.1278) == pytest.approx(343.5, abs=1)
+
+# Test Ingested Readings Get Numeric Coordinates
+def test_ingest_parses_coordinates(test_client):
+    device_id = post_places(test_client)
+    rows = {row.locationCoordinates: (row.latitude, row.longitude)
+            for row in Observation.query.filter_by(deviceID=device_id)}
+    assert rows["48.8566, 2.3522"] == (48.8566, 2.3522)
+    assert rows["somewhere"] == (None, None)
+
+# Test Bounding-Box Filters, Including Boxes Across the Antimeridian
+def test_bbox_filter(test_client):
+    device_id = post_places(test_client)
+    assert places_for(test_client, device_id, "bbox=48,2,49,3") == {"paris", "versailles"}
+    assert places_for(test_client, device_id, "bbox=-20,170,-10,-170") == {"fiji", "samoa"}
+
+    response = test_client.get("/observations/?bbox=1,2,3", headers={"Authorization": AUTH_TOKEN})
+    assert response.status_code == 400
+
+# Test Radius Filters Use the Exact Distance
+def test_near_filter(test_client):
+    device_id = post_places(test_client)
+    # Versailles is about 18 km from central Paris
+    assert places_for(test_client, device_id, "near=48.8566,2.3522&radius=10") == {"paris"}
+    assert places_for(test_client, device_id, "near=48.8566,2.3522&radius=25") == {"paris", "versailles"}
+    assert places_for(test_client, device_id, "near=48.8566,2.3522&radius=400") == {"paris", "versailles", "london"}
+    # Fiji to Samoa is about 1150 km across the antimeridian
+    assert places_for(test_client, device_id, "near=-17.7134,178.0650&radius=1200") == {"fiji", "samoa"}
+
+    response = test_client.get("/observations/?near=48.8566,2.3522", headers={"Authorization": AUTH_TOKEN})
+    assert response.status_code == 400
+
+# Test Region Queries Use the Coordinate Index
+def test_near_query_uses_index(test_client):
+    query = observation_query(near=(48.8566, 2.3522, 25.0))
+    compiled = query.compile(db.engine, compile_kwargs={"literal_binds": True})
+    plan = db.session.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+    assert any("ix_observation_lat_lon" in row[-1] for row in plan)
+
+# Test Upgrading Backfills Coordinates of Existing Readings
+def test_upgrade_schema_backfills_coordinates(test_client):
+    device_id = post_places(test_client)
+    db.session.execute(text("DROP INDEX ix_observation_lat_lon"))
+    for table in ("observation", "latest_observation"):
+        db.session.execute(text(f"ALTER TABLE {table} DROP COLUMN latitude"))
+        db.session.execute(text(f"ALTER TABLE {table} DROP COLUMN longitude"))
+    db.session.commit()
+
+    assert set(upgrade_schema()) == {
+        "observation.latitude", "observation.longitude", "ix_observation_lat_lon",
+        "latest_observation.latitude", "latest_observation.longitude",
+    }
+    assert {"latitude", "longitude"} <= {column["name"] for column in inspect(db.engine).get_columns("observation")}
+    assert places_for(test_client, device_id, "bbox=48,2,49,3") == {"paris", "versailles"}
@@ -0,0 +1,34 @@
+import threading
+from application.ids import ULIDGenerator, new_id
+
+CROCKFORD = set("0123456789ABCDEFGHJKMNPQRSTVWXYZ")
+
+# Test IDs Are Well-Formed and Strictly Increasing Within a Process
+def test_ulids_are_ordered():
+    generator = ULIDGenerator()
+    ids = [generator.new() for _ in range(10000)]
+    assert all(len(ulid) == 26 and set(ulid) <= CROCKFORD for ulid in ids)
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
+
+# Test Concurrent Generation Never Collides
+def test_ulids_unique_across_threads():
+    generated = []
+
+    def worker():
+        generated.extend(new_id("obs") for _ in range(2000))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(generated)) == 16000
+    assert all(observation_id.startswith("obs-") for observation_id in generated)
+
+# Test Batches Continue the Same Ordered Sequence
+def test_ulid_batches_are_ordered():
+    generator = ULIDGenerator()
+    ids = generator.new_batch(500) + [generator.new()] + generator.new_batch(500)
+    assert ids == sorted(ids)
+    assert len(set(ids)) == 1001
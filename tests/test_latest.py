@@ -0,0 +1,71 @@
+import json
+import pytest
+from sqlalchemy import text
+from application.latest import rebuild_latest
+from application.models import LatestObservation, db
+from application.schema import upgrade_schema
+from tests.conftest import AUTH_TOKEN, register_device
+
+pytestmark = pytest.mark.usefixtures("api_token")
+
+# Test the Snapshot Keeps Only the Newest Reading per Device
+def test_get_latest_observations(test_client):
+    first, _ = register_device(test_client)
+    second, _ = register_device(test_client)
+
+    test_client.post("/observations/batch", json=[
+        {"deviceID": first, "timestamp": "2024-04-01T10:00:00", "temperature": 10.0, "humidity": 40.0},
+        {"deviceID": first, "timestamp": "2024-04-01T12:00:00", "temperature": 12.0, "humidity": 40.0},
+        {"deviceID": second, "timestamp": "2024-04-01T09:00:00", "temperature": 9.0, "humidity": 40.0},
+    ])
+    # A late reading does not replace a newer one
+    test_client.post("/observations/", json={
+        "deviceID": first, "timestamp": "2024-04-01T11:00:00", "temperature": 11.0, "humidity": 40.0
+    })
+
+    response = test_client.get(f"/observations/latest?deviceID={first},{second}", headers={"Authorization": AUTH_TOKEN})
+    assert response.status_code == 200
+    latest = {row["deviceID"]: row for row in json.loads(response.data)["data"]["observations"]}
+    assert set(latest) == {first, second}
+    assert latest[first]["temperature"] == 12.0
+    assert latest[first]["timestamp"] == "2024-04-01T12:00:00"
+    assert latest[second]["temperature"] == 9.0
+
+    response = test_client.get(f"/observations/latest?deviceID={second}", headers={"Authorization": AUTH_TOKEN})
+    assert [row["deviceID"] for row in json.loads(response.data)["data"]["observations"]] == [second]
+
+    response = test_client.get("/observations/latest")
+    assert response.status_code == 403
+
+# Test Rebuilding the Snapshot From Observations
+def test_rebuild_latest(test_client):
+    device_id, _ = register_device(test_client)
+    test_client.post("/observations/batch", json=[
+        {"deviceID": device_id, "timestamp": "2024-04-02T08:00:00", "temperature": 8.0, "humidity": 40.0},
+        {"deviceID": device_id, "timestamp": "2024-04-02T07:00:00", "temperature": 7.0, "humidity": 40.0},
+    ])
+    before = {row.deviceID: row.observationID for row in LatestObservation.query.all()}
+
+    db.session.query(LatestObservation).delete()
+    db.session.commit()
+    assert rebuild_latest() == len(before)
+    assert {row.deviceID: row.observationID for row in LatestObservation.query.all()} == before
+
+# Test Upgrading a Database That Predates the Snapshot Fills It
+def test_upgrade_schema_builds_latest(test_client):
+    device_id, _ = register_device(test_client)
+    test_client.post("/observations/batch", json=[
+        {"deviceID": device_id, "timestamp": "2024-04-03T08:00:00", "temperature": 8.0, "humidity": 40.0,
+         "locationCoordinates": "48.8566, 2.3522"},
+    ])
+    before = {row.deviceID: (row.observationID, row.latitude) for row in LatestObservation.query.all()}
+
+    # An older database: no snapshot and no coordinate columns, which the snapshot copies
+    db.session.execute(text("DROP TABLE latest_observation"))
+    db.session.execute(text("DROP INDEX ix_observation_lat_lon"))
+    db.session.execute(text("ALTER TABLE observation DROP COLUMN latitude"))
+    db.session.execute(text("ALTER TABLE observation DROP COLUMN longitude"))
+    db.session.commit()
+    upgrade_schema()
+    assert {row.deviceID: (row.observationID, row.latitude) for row in LatestObservation.query.all()} == before
+    assert before[device_id][1] == 48.8566
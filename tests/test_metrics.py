@@ -0,0 +1,103 @@
+import json
+import re
+import time
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from application import create_app
+from application.extensions import db
+from application.metrics import Histogram, get_metrics
+from config import TestingConfig
+
+def sample(metrics, line_prefix):
+    match = re.search(rf"^{re.escape(line_prefix)} (\S+)$", metrics, re.MULTILINE)
+    return float(match.group(1)) if match else None
+
+# Test Histograms Render Cumulative Buckets
+def test_histogram_lines():
+    histogram = Histogram((0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value)
+    lines = list(histogram.lines("latency", (("endpoint", "/"),)))
+    assert lines == [
+        'latency_bucket{endpoint="/",le="0.1"} 1',
+        'latency_bucket{endpoint="/",le="1.0"} 2',
+        'latency_bucket{endpoint="/",le="+Inf"} 3',
+        'latency_sum{endpoint="/"} 5.55',
+        'latency_count{endpoint="/"} 3',
+    ]
+
+# Test Requests Record Latency, Status, SQL and Serialization Metrics
+def test_metrics_endpoint():
+    app = create_app(TestingConfig)
+    with app.app_context():
+        db.create_all()
+    client = app.test_client()
+    for _ in range(3):
+        client.get("/iot-devices/")
+    client.get("/iot-devices/missing")
+    client.get("/no-such-page")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    metrics = response.get_data(as_text=True)
+
+    labels = 'endpoint="/iot-devices/",method="GET"'
+    assert sample(metrics, f"http_request_duration_seconds_count{{{labels}}}") == 3
+    assert sample(metrics, f'http_requests_total{{{labels},status="200"}}') == 3
+    # Only the first list request reaches the database; the others hit the response cache
+    assert sample(metrics, f"db_queries_per_request_sum{{{labels}}}") == 1
+    assert sample(metrics, f'db_queries_per_request_bucket{{{labels},le="0"}}') == 2
+    assert sample(metrics, f"db_query_seconds_per_request_sum{{{labels}}}") > 0
+    assert sample(metrics, f"serialization_seconds_per_request_sum{{{labels}}}") > 0
+    assert sample(metrics, 'http_requests_total{endpoint="/iot-devices/<string:device_id>",method="GET",status="404"}') == 1
+    assert sample(metrics, 'http_requests_total{endpoint="unmatched",method="GET",status="404"}') == 1
+    # Schema creation ran outside any request
+    assert sample(metrics, "db_background_queries_total") > 0
+
+# Test Metrics Can Be Turned Off
+def test_metrics_disabled():
+    class NoMetricsConfig(TestingConfig):
+        METRICS_ENABLED = False
+
+    app = create_app(NoMetricsConfig)
+    assert app.test_client().get("/metrics").status_code == 404
+
+# Test a Failed Statement Does Not Skew the Next One's Timing
+def test_failed_query_timing_discarded():
+    app = create_app(TestingConfig)
+    with app.app_context():
+        with db.engine.connect() as conn:
+            with pytest.raises(OperationalError):
+                conn.execute(text("SELECT * FROM missing_table"))
+            conn.execute(text("SELECT 1"))
+            assert not [started for key, started in conn.info.items() if "query_started" in str(key) and started]
+        assert "db_background_queries_total 1" in get_metrics().render()
+
+# Test Slow Requests Write Collapsed-Stack Profiles
+def test_slow_request_profile(tmp_path):
+    class ProfilingConfig(TestingConfig):
+        PROFILE_SLOW_REQUESTS = 0.02
+        PROFILE_SAMPLE_INTERVAL = 0.001
+        PROFILE_DIR = str(tmp_path)
+
+    app = create_app(ProfilingConfig)
+
+    @app.route("/slow")
+    def slow_endpoint():
+        deadline = time.perf_counter() + 0.1
+        while time.perf_counter() < deadline:
+            pass
+        return {"message": "done"}
+
+    client = app.test_client()
+    client.get("/")  # fast, not written
+    assert json.loads(client.get("/slow").data) == {"message": "done"}
+
+    profiles = list(tmp_path.iterdir())
+    assert len(profiles) == 1 and profiles[0].name.endswith("-GET-slow.folded")
+    lines = profiles[0].read_text().splitlines()
+    assert any("slow_endpoint (test_metrics.py:" in line for line in lines)
+    assert all(re.match(r"^\S.* \d+$", line) for line in lines)
+    assert sample(client.get("/metrics").get_data(as_text=True), "profiles_written_total") == 1
@@ -0,0 +1,24 @@
+import json
+from application.mock_data import generate_observation_batches
+from application.models import Observation
+
+# Test the Generator Yields Fixed-Size Batches Covering Every Device
+def test_generate_observation_batches():
+    batches = list(generate_observation_batches(["device-a", "device-b"], count=5, batch_size=4, seed=1))
+    assert [len(batch) for batch in batches] == [4, 4, 2]
+
+    rows = [row for batch in batches for row in batch]
+    assert [row["deviceID"] for row in rows] == ["device-a"] * 5 + ["device-b"] * 5
+    assert len({row["observationID"] for row in rows}) == 10
+    assert all(-10 <= row["temperature"] <= 40 and 0 <= row["humidity"] <= 100 for row in rows)
+
+# Test the Mock Endpoint Inserts count Readings per Device
+def test_mock_observations(test_client):
+    for _ in range(2):
+        response = test_client.post("/iot-devices/", json={"location": "Mock", "batteryStatus": "Full", "transmissionInterval": 30})
+        assert response.status_code == 201
+
+    response = test_client.get("/observations/mock?count=3")
+    assert response.status_code == 201
+    assert json.loads(response.data)["data"]["generatedObservations"] == 6
+    assert Observation.query.count() == 6
@@ -1,22 +1,10 @@
 import json
+import pytest
 from datetime import datetime
+from application.utils import CursorHelper
+from tests.conftest import AUTH_TOKEN, register_device
 
-# Mock Authorization Token
-AUTH_TOKEN = "dc2496c9-1ad3-47cb-a067-55695aa1772d"
-
-# Mock IoT Device Registration
-def register_device(test_client):
-    device_data = {
-        "location": "Test Location",
-        "batteryStatus": "Full",
-        "transmissionInterval": 30
-    }
-    response = test_client.post("/iot-devices/", json=device_data, headers={"Authorization": AUTH_TOKEN})
-    assert response.status_code == 201
-
-    response_data = json.loads(response.data)
-    device_id = response_data["data"]["deviceID"]
-    return device_id, response
+pytestmark = pytest.mark.usefixtures("api_token")
 
 # Test Adding an Observation
 def test_add_observation_success(test_client):
@@ -73,6 +61,35 @@ def test_add_observation_missing_fields(test_client):
     response_data = json.loads(response.data)
     assert response_data["message"] == "Validation error: Missing required fields"
 
+# Test Malformed Device IDs and Non-Finite Numbers Are Rejected, Not 500s
+def test_add_observation_invalid_values(test_client):
+    device_id, _ = register_device(test_client)
+    timestamp = datetime.utcnow().isoformat()
+    bodies = [
+        json.dumps({"deviceID": [device_id], "timestamp": timestamp, "temperature": 21.0, "humidity": 40.0}),
+        json.dumps({"deviceID": {"id": device_id}, "timestamp": timestamp, "temperature": 21.0, "humidity": 40.0}),
+        f'{{"deviceID": "{device_id}", "timestamp": "{timestamp}", "temperature": NaN, "humidity": 40.0}}',
+        f'{{"deviceID": "{device_id}", "timestamp": "{timestamp}", "temperature": 21.0, "humidity": Infinity}}',
+        f'{{"deviceID": "{device_id}", "timestamp": "{timestamp}", "temperature": 1e400, "humidity": 40.0}}',
+        f'{{"deviceID": "{device_id}", "timestamp": "{timestamp}", "temperature": 21.0, "humidity": 40.0, "windSpeed": {10 ** 400}}}',
+    ]
+    for body in bodies:
+        response = test_client.post("/observations/", data=body, content_type="application/json")
+        assert response.status_code == 400
+        assert json.loads(response.data)["message"].startswith("Validation error: ")
+
+    # In a batch only the bad items are rejected
+    valid = json.dumps({"deviceID": device_id, "timestamp": timestamp, "temperature": 21.0, "humidity": 40.0})
+    response = test_client.post(
+        "/observations/batch",
+        data="\n".join([valid] + bodies),
+        content_type="application/x-ndjson"
+    )
+    assert response.status_code == 207
+    response_data = json.loads(response.data)["data"]
+    assert response_data["inserted"] == 1
+    assert [result["status"] for result in response_data["results"]] == [201] + [400] * len(bodies)
+
 # Test Retrieving Observations
 def test_get_observations_success(test_client):
     device_id, _ = register_device(test_client)
@@ -117,3 +134,151 @@ def test_get_observations_with_filters(test_client):
     assert response.status_code == 200
     response_data = json.loads(response.data)
     assert len(response_data["data"]["observations"]) == 2
+
+# Test Adding Observations in Batch
+def test_add_observations_batch(test_client):
+    device_id, _ = register_device(test_client)
+
+    batch = [
+        {
+            "deviceID": device_id,
+            "timestamp": datetime.utcnow().isoformat(),
+            "temperature": 20.0 + i,
+            "humidity": 50.0
+        }
+        for i in range(3)
+    ]
+    response = test_client.post("/observations/batch", json=batch)
+    assert response.status_code == 201
+    response_data = json.loads(response.data)
+    assert response_data["data"]["inserted"] == 3
+    assert all(result["status"] == 201 for result in response_data["data"]["results"])
+
+    response = test_client.get(f"/observations/?deviceID={device_id}", headers={"Authorization": AUTH_TOKEN})
+    assert len(json.loads(response.data)["data"]["observations"]) == 3
+
+# Test Batch with Invalid Items
+def test_add_observations_batch_partial(test_client):
+    device_id, _ = register_device(test_client)
+
+    lines = [
+        json.dumps({"deviceID": device_id, "timestamp": datetime.utcnow().isoformat(), "temperature": 21.0, "humidity": 40.0}),
+        json.dumps({"deviceID": "invalid-device-id", "timestamp": datetime.utcnow().isoformat(), "temperature": 21.0, "humidity": 40.0}),
+        json.dumps({"deviceID": device_id, "timestamp": datetime.utcnow().isoformat()}),
+        "not json",
+    ]
+    response = test_client.post(
+        "/observations/batch",
+        data="\n".join(lines),
+        content_type="application/x-ndjson"
+    )
+    assert response.status_code == 207
+    response_data = json.loads(response.data)
+    assert response_data["data"]["inserted"] == 1
+    assert [result["status"] for result in response_data["data"]["results"]] == [201, 404, 400, 400]
+
+# Test Paging Through Observations with a Cursor
+def test_get_observations_paginated(test_client):
+    device_id, _ = register_device(test_client)
+
+    batch = [
+        {
+            "deviceID": device_id,
+            "timestamp": f"2024-01-01T00:0{i}:00",
+            "temperature": 20.0 + i,
+            "humidity": 50.0
+        }
+        for i in range(5)
+    ]
+    test_client.post("/observations/batch", json=batch)
+
+    seen = []
+    cursor = None
+    while True:
+        url = f"/observations/?deviceID={device_id}&limit=2"
+        if cursor:
+            url += f"&cursor={cursor}"
+        response = test_client.get(url, headers={"Authorization": AUTH_TOKEN})
+        assert response.status_code == 200
+        page = json.loads(response.data)["data"]
+        assert len(page["observations"]) <= 2
+        seen.extend(obs["temperature"] for obs in page["observations"])
+        cursor = page["next"]
+        if not cursor:
+            break
+    assert seen == [20.0, 21.0, 22.0, 23.0, 24.0]
+
+    # Malformed cursors, including well-formed JSON with the wrong element types, are rejected
+    for values in ("garbage", ["2024-01-01T00:00:00", {"id": 1}], ["2024-01-01T00:00:00", ["x"]], [1, "obs"], ["x"], {}):
+        bad = values if isinstance(values, str) else CursorHelper.encode(values)
+        response = test_client.get(f"/observations/?limit=2&cursor={bad}", headers={"Authorization": AUTH_TOKEN})
+        assert response.status_code == 400
+
+# Test Streaming Observations as NDJSON
+def test_get_observations_ndjson_stream(test_client):
+    device_id, _ = register_device(test_client)
+
+    batch = [
+        {"deviceID": device_id, "timestamp": datetime.utcnow().isoformat(), "temperature": 20.0, "humidity": 50.0}
+        for _ in range(3)
+    ]
+    test_client.post("/observations/batch", json=batch)
+
+    response = test_client.get(f"/observations/?deviceID={device_id}&format=ndjson", headers={"Authorization": AUTH_TOKEN})
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert len(lines) == 3
+    assert all(line["deviceID"] == device_id for line in lines)
+
+# Test Hourly Aggregates per Device
+def test_get_observation_aggregates(test_client):
+    device_id, _ = register_device(test_client)
+
+    batch = [
+        {"deviceID": device_id, "timestamp": "2024-02-01T10:05:00", "temperature": 10.0, "humidity": 40.0},
+        {"deviceID": device_id, "timestamp": "2024-02-01T10:55:00", "temperature": 20.0, "humidity": 60.0},
+        {"deviceID": device_id, "timestamp": "2024-02-01T11:10:00", "temperature": 30.0, "humidity": 80.0},
+    ]
+    test_client.post("/observations/batch", json=batch)
+
+    response = test_client.get(
+        f"/observations/aggregate?deviceID={device_id}&bucket=1h&fields=temperature,humidity&agg=avg,min,max",
+        headers={"Authorization": AUTH_TOKEN}
+    )
+    assert response.status_code == 200
+    buckets = json.loads(response.data)["data"]["buckets"]
+    assert [bucket["bucketStart"] for bucket in buckets] == ["2024-02-01T10:00:00", "2024-02-01T11:00:00"]
+    assert buckets[0]["count"] == 2
+    assert buckets[0]["temperature"] == {"avg": 15.0, "min": 10.0, "max": 20.0}
+    assert buckets[1]["humidity"] == {"avg": 80.0, "min": 80.0, "max": 80.0}
+
+    response = test_client.get("/observations/aggregate?bucket=1w", headers={"Authorization": AUTH_TOKEN})
+    assert response.status_code == 400
+
+# Test Ingest and Read Endpoints Stay Within Their Query Budgets
+def test_observation_query_budgets(test_client, query_budget):
+    device_id, _ = register_device(test_client)
+    reading = {"deviceID": device_id, "temperature": 21.0, "humidity": 40.0}
+    test_client.post("/observations/", json={**reading, "timestamp": "2024-06-01T00:00:00"})  # loads the device registry
+    test_client.get("/observations/?limit=1", headers={"Authorization": AUTH_TOKEN})  # caches the API token
+
+    # Observation, rollups, latest snapshot and device activity: one statement each
+    with query_budget(4):
+        response = test_client.post("/observations/", json={**reading, "timestamp": "2024-06-01T00:01:00"})
+    assert response.status_code == 201
+
+    # The same four however many readings a batch carries
+    with query_budget(4):
+        response = test_client.post("/observations/batch", json=[
+            {**reading, "timestamp": f"2024-06-01T01:{i:02d}:00"} for i in range(50)
+        ])
+    assert response.status_code == 201
+
+    with query_budget(1):
+        response = test_client.get(f"/observations/?deviceID={device_id}&limit=10", headers={"Authorization": AUTH_TOKEN})
+    assert response.status_code == 200
+
+    with query_budget(1):
+        response = test_client.get(f"/observations/latest?deviceID={device_id}", headers={"Authorization": AUTH_TOKEN})
+    assert response.status_code == 200
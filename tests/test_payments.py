@@ -0,0 +1,105 @@
+import itertools
+import json
+from types import SimpleNamespace
+from sqlalchemy import event
+from application.cache import get_customer_cache
+from application.models import Customer, Payment, db
+
+# Stripe IDs are unique across the whole test module
+STRIPE_IDS = itertools.count(1)
+
+class FakePaymentClient:
+    """Records calls instead of talking to Stripe."""
+
+    def __init__(self):
+        self.calls = []
+
+    def create_customer(self, email, name):
+        self.calls.append("create_customer")
+        return SimpleNamespace(id=f"cus_{next(STRIPE_IDS)}")
+
+    def create_checkout_session(self, **params):
+        self.calls.append("create_checkout_session")
+        return SimpleNamespace(id=f"cs_{next(STRIPE_IDS)}", url="https://checkout.stripe.test/session")
+
+    def retrieve_checkout_session(self, session_id):
+        self.calls.append("retrieve_checkout_session")
+        return SimpleNamespace(id=session_id, payment_intent=f"pi_{session_id}")
+
+def checkout_payload(customer_id, order_id):
+    return {
+        "customer_id": customer_id,
+        "email": f"{customer_id}@example.com",
+        "name": "Test Customer",
+        "order_id": order_id,
+        "amount": 19.99,
+        "success_url": "https://example.com/success",
+        "cancel_url": "https://example.com/cancel"
+    }
+
+# Test Checkout Goes Through the Payment Client
+def test_create_checkout_session(test_client):
+    fake = FakePaymentClient()
+    test_client.application.extensions["payment_client"] = fake
+
+    response = test_client.post("/payment/checkout", json=checkout_payload("cust-1", "order-1"))
+    assert response.status_code == 200
+    assert json.loads(response.data)["data"]["checkout_url"] == "https://checkout.stripe.test/session"
+    assert fake.calls == ["create_customer", "create_checkout_session"]
+
+    # Repeat buyers reuse their Stripe customer
+    response = test_client.post("/payment/checkout", json=checkout_payload("cust-1", "order-2"))
+    assert response.status_code == 200
+    assert fake.calls[2:] == ["create_checkout_session"]
+
+    assert Customer.query.filter_by(customer_id="cust-1").count() == 1
+    assert Payment.query.filter_by(customer_id="cust-1").count() == 2
+
+# Test Checkout Rejects Incomplete Requests
+def test_create_checkout_session_missing_fields(test_client):
+    response = test_client.post("/payment/checkout", json={"customer_id": "cust-2"})
+    assert response.status_code == 400
+
+# Test Repeat Buyers Skip the Customer Lookup and Each Checkout Commits Once
+def test_checkout_customer_cache_and_single_commit(test_client):
+    test_client.application.extensions["payment_client"] = FakePaymentClient()
+    statements = []
+    commits = []
+
+    def record_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    def record_commit(conn):
+        commits.append(conn)
+
+    event.listen(db.engine, "before_cursor_execute", record_statement)
+    event.listen(db.engine, "commit", record_commit)
+    try:
+        response = test_client.post("/payment/checkout", json=checkout_payload("cust-3", "order-3"))
+        assert response.status_code == 200
+        assert len(commits) == 1
+        assert get_customer_cache().get("cust-3") is not None
+
+        statements.clear()
+        commits.clear()
+        response = test_client.post("/payment/checkout", json=checkout_payload("cust-3", "order-4"))
+        assert response.status_code == 200
+        assert len(commits) == 1
+        assert not any(statement.startswith("SELECT") and "customers" in statement for statement in statements)
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record_statement)
+        event.remove(db.engine, "commit", record_commit)
+
+# Test Checkout Stays Within Its Query Budget
+def test_checkout_query_budget(test_client, query_budget):
+    test_client.application.extensions["payment_client"] = FakePaymentClient()
+
+    # Customer lookup, new customer, payment
+    with query_budget(3):
+        response = test_client.post("/payment/checkout", json=checkout_payload("cust-4", "order-5"))
+    assert response.status_code == 200
+
+    # Repeat buyers come from the customer cache: only the payment is written
+    with query_budget(1):
+        response = test_client.post("/payment/checkout", json=checkout_payload("cust-4", "order-6"))
+    assert response.status_code == 200
@@ -0,0 +1,67 @@
+import logging
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.exc import OperationalError
+from application import create_app
+from application.models import Observation, db
+from application.query_budget import QueryBudgetExceeded, record_queries
+from config import TestingConfig
+
+# Test Going Over Budget Fails With a Report of Repeated Statements
+def test_query_budget_exceeded(test_client, query_budget):
+    with pytest.raises(QueryBudgetExceeded) as excinfo:
+        with query_budget(2):
+            for device_id in ("device-1", "device-2", "device-1"):
+                db.session.execute(select(Observation.observationID).where(Observation.deviceID == device_id)).all()
+
+    report = str(excinfo.value)
+    assert report.startswith("Query budget of 2 exceeded\n3 statement(s)")
+    assert "Repeated statements:\n  3x (2 with identical parameters) SELECT observation." in report
+
+# Test Staying Within Budget Passes
+def test_query_budget_within(test_client, query_budget):
+    with query_budget(1) as recorder:
+        db.session.execute(select(Observation.observationID).limit(1)).all()
+    assert recorder.count == 1
+    assert recorder.duplicates() == []
+
+# Test Failed Statements and Nested Recorders Leave No Timings Behind
+def test_recorder_timings_cleaned_up(test_client):
+    with db.engine.connect() as conn:
+        with record_queries() as outer:
+            with record_queries() as inner:
+                with pytest.raises(OperationalError):
+                    conn.execute(text("SELECT * FROM missing_table"))
+                conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+        assert [statement for statement, _, _, _ in inner.queries] == ["SELECT 1"]
+        assert [statement for statement, _, _, _ in outer.queries] == ["SELECT 1", "SELECT 2"]
+        assert not [key for key in conn.info if "budget_started" in str(key)]
+
+# Test Full Table Scans Are Reported and Indexed Lookups Are Not
+def test_unindexed_queries(test_client):
+    with record_queries() as recorder:
+        db.session.execute(select(Observation.observationID).where(Observation.humidity > 50)).all()
+        db.session.execute(select(Observation.observationID).where(Observation.deviceID == "device-1")).all()
+
+    unindexed = recorder.unindexed()
+    assert len(unindexed) == 1
+    assert "humidity" in unindexed[0][0] and unindexed[0][1].startswith("SCAN observation")
+    assert "Full table scans:\n  SCAN observation" in recorder.report()
+
+# Test Development Mode Logs Requests Over QUERY_BUDGET_WARN
+def test_query_budget_warning(caplog):
+    class BudgetConfig(TestingConfig):
+        QUERY_BUDGET_WARN = 1
+
+    app = create_app(BudgetConfig)
+    with app.app_context():
+        db.create_all()
+    client = app.test_client()
+    client.get("/iot-devices/")
+    assert not [record for record in caplog.records if "statements (budget 1)" in record.getMessage()]
+
+    with caplog.at_level(logging.WARNING):
+        client.post("/institutions/", json={"name": "Budget", "email": "budget@example.com"})
+    warnings = [record.getMessage() for record in caplog.records if "statements (budget 1)" in record.getMessage()]
+    assert len(warnings) == 1 and warnings[0].startswith("POST /institutions/ ran ")
@@ -0,0 +1,61 @@
+import json
+from werkzeug.datastructures import MultiDict
+from application.cache import SQLiteCacheStore
+from application.response_cache import ResponseCache
+from tests.conftest import register_device
+
+# Test Conditional GET Returns 304 Until a Device Is Added
+def test_device_list_etag(test_client):
+    register_device(test_client)
+
+    response = test_client.get("/iot-devices/")
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert response.headers["Cache-Control"] == "no-cache"
+
+    response = test_client.get("/iot-devices/", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.data == b""
+
+    device_id, _ = register_device(test_client)
+    response = test_client.get("/iot-devices/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    devices = json.loads(response.data)["data"]["devices"]
+    assert device_id in [device["deviceID"] for device in devices]
+
+# Test Cache Keys Include Query Arguments and Misses Are Not Cached
+def test_api_tokens_cache_per_institution(test_client):
+    response = test_client.get("/api-access/?institutionID=missing")
+    assert response.status_code == 404
+    assert "ETag" not in response.headers
+
+    institution = test_client.post("/institutions/", json={"name": "Cache Inst", "email": "cache@example.com"})
+    institution_id = json.loads(institution.data)["data"]["id"]
+    response = test_client.get(f"/api-access/?institutionID={institution_id}")
+    assert json.loads(response.data)["data"]["tokens"] == []
+
+    test_client.post("/api-access/", json={"institutionID": institution_id})
+    response = test_client.get(f"/api-access/?institutionID={institution_id}")
+    tokens = json.loads(response.data)["data"]["tokens"]
+    assert len(tokens) == 1
+
+    test_client.delete(f"/api-access/{tokens[0]['accessID']}")
+    response = test_client.get(f"/api-access/?institutionID={institution_id}")
+    assert json.loads(response.data)["data"]["tokens"] == []
+
+# Test Responses Holding Tokens Stay Out of the Shared Store
+def test_private_responses_not_shared(tmp_path):
+    store = SQLiteCacheStore(str(tmp_path / "cache.db"))
+    worker_a, worker_b = ResponseCache(store=store), ResponseCache(store=store)
+
+    devices = worker_a.key("iot_device", "/iot-devices/", MultiDict())
+    tokens = worker_a.key("api_access", "/api-access/", MultiDict())
+    worker_a.set(devices, b"devices", "application/json")
+    worker_a.set(tokens, b"tokens", "application/json")
+    assert worker_b.get(devices)[0] == b"devices"
+    assert worker_b.get(tokens) is None
+    assert worker_a.get(tokens)[0] == b"tokens"
+
+    worker_b.invalidate("api_access")
+    assert worker_a.key("api_access", "/api-access/", MultiDict()) != tokens
@@ -0,0 +1,71 @@
+import json
+from datetime import datetime
+from sqlalchemy import text
+from application.models import ObservationRollup, db
+from application.rollups import rebuild_rollups
+from application.schema import upgrade_schema
+from tests.conftest import AUTH_TOKEN, register_device
+
+def aggregate(test_client, device_id, query):
+    response = test_client.get(
+        f"/observations/aggregate?deviceID={device_id}&{query}",
+        headers={"Authorization": AUTH_TOKEN}
+    )
+    assert response.status_code == 200
+    return json.loads(response.data)["data"]
+
+# Test Ingestion Keeps the Rollups in Step with Raw Aggregation
+def test_rollups_match_raw_aggregates(test_client, api_token):
+    device_id, _ = register_device(test_client)
+
+    batch = [
+        {"deviceID": device_id, "timestamp": "2024-03-01T10:05:00", "temperature": 10.0, "humidity": 40.0, "windSpeed": 3.0},
+        {"deviceID": device_id, "timestamp": "2024-03-01T10:55:00", "temperature": 20.0, "humidity": 60.0},
+        {"deviceID": device_id, "timestamp": "2024-03-01T23:10:00", "temperature": 30.0, "humidity": 80.0, "windSpeed": 1.0},
+    ]
+    test_client.post("/observations/batch", json=batch)
+    test_client.post("/observations/", json={
+        "deviceID": device_id, "timestamp": "2024-03-02T01:00:00", "temperature": -5.0, "humidity": 90.0
+    })
+
+    query = "bucket=1d&fields=temperature,windSpeed&agg=avg,min,max,count&startDate=2024-03-01T00:00:00"
+    rollup = aggregate(test_client, device_id, query)
+    raw = aggregate(test_client, device_id, query + "&source=raw")
+    assert rollup["source"] == "rollup:day"
+    assert raw["source"] == "raw"
+    assert rollup["buckets"] == raw["buckets"]
+    assert rollup["buckets"][0]["windSpeed"] == {"avg": 2.0, "min": 1.0, "max": 3.0, "count": 2}
+
+    # Ranges fall back to finer rollups, then to the raw table
+    assert aggregate(test_client, device_id, "bucket=1h&startDate=2024-03-01T10:30:00")["source"] == "rollup:minute"
+    assert aggregate(test_client, device_id, "bucket=1h&startDate=2024-03-01T10:30:30")["source"] == "raw"
+
+# Test Rebuilding the Rollups from Raw Observations
+def test_rebuild_rollups(test_client, api_token):
+    device_id, _ = register_device(test_client)
+    test_client.post("/observations/batch", json=[
+        {"deviceID": device_id, "timestamp": "2024-04-01T08:00:00", "temperature": 12.0, "humidity": 50.0},
+        {"deviceID": device_id, "timestamp": "2024-04-01T08:30:00", "temperature": 14.0, "humidity": 52.0},
+    ])
+    before = aggregate(test_client, device_id, "bucket=1h")
+
+    ObservationRollup.query.filter_by(deviceID=device_id).delete()
+    db.session.commit()
+    assert aggregate(test_client, device_id, "bucket=1h")["buckets"] == []
+
+    assert rebuild_rollups(datetime(2024, 4, 1)) >= 2
+    assert aggregate(test_client, device_id, "bucket=1h") == before
+
+# Test Upgrading a Database That Predates the Rollups Fills Them
+def test_upgrade_schema_builds_rollups(test_client, api_token):
+    device_id, _ = register_device(test_client)
+    test_client.post("/observations/batch", json=[
+        {"deviceID": device_id, "timestamp": "2024-05-01T08:00:00", "temperature": 12.0, "humidity": 50.0},
+        {"deviceID": device_id, "timestamp": "2024-05-01T09:30:00", "temperature": 16.0, "humidity": 52.0},
+    ])
+    before = aggregate(test_client, device_id, "bucket=1h")
+
+    db.session.execute(text("DROP TABLE observation_rollup"))
+    db.session.commit()
+    upgrade_schema()
+    assert aggregate(test_client, device_id, "bucket=1h") == before
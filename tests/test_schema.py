@@ -0,0 +1,37 @@
+from sqlalchemy import inspect, text
+from application.models import db
+from application.schema import upgrade_schema
+
+# Test Upgrading a Database Created Before the Observation Indexes
+def test_upgrade_schema_creates_missing_indexes(test_client):
+    db.session.execute(text("DROP INDEX IF EXISTS ix_observation_device_timestamp"))
+    db.session.execute(text("DROP INDEX IF EXISTS ix_observation_timestamp"))
+    db.session.commit()
+
+    created = upgrade_schema()
+    assert set(created) == {"ix_observation_device_timestamp", "ix_observation_timestamp"}
+
+    indexes = {index["name"] for index in inspect(db.engine).get_indexes("observation")}
+    assert {"ix_observation_device_timestamp", "ix_observation_timestamp"} <= indexes
+
+    # Running it again is a no-op
+    assert upgrade_schema() == []
+
+# Test Device/Date Range Filters Use the Composite Index
+def test_observation_range_query_uses_index(test_client):
+    plan = db.session.execute(text(
+        "EXPLAIN QUERY PLAN SELECT * FROM observation "
+        "WHERE \"deviceID\" = :device_id AND timestamp >= :start AND timestamp <= :end"
+    ), {"device_id": "device-1", "start": "2024-01-01", "end": "2024-01-02"}).all()
+    assert any("ix_observation_device_timestamp" in row[-1] for row in plan)
+
+# Test Upgrading a Database Created Before the Device Activity Columns
+def test_upgrade_schema_adds_missing_columns(test_client):
+    db.session.execute(text('ALTER TABLE iot_device DROP COLUMN "observationCount"'))
+    db.session.execute(text('ALTER TABLE iot_device DROP COLUMN "lastSeen"'))
+    db.session.commit()
+
+    assert set(upgrade_schema()) == {"iot_device.lastSeen", "iot_device.observationCount"}
+    columns = {column["name"] for column in inspect(db.engine).get_columns("iot_device")}
+    assert {"lastSeen", "observationCount"} <= columns
+    assert upgrade_schema() == []
@@ -0,0 +1,35 @@
+import json
+from datetime import datetime
+from application.serializers import Serializer, institution_serializer, latest_observation_serializer, observation_serializer
+from application.models import Institution
+from application.utils import ResponseHelper
+
+# Test Encoders Rename Keys and Format Dates
+def test_serializer_dump_many():
+    serializer = Serializer(Institution, (("id", "institutionID"), "name", "dateCreated"))
+    assert serializer.keys == ("id", "name", "dateCreated")
+    rows = [("inst-1", "One", datetime(2024, 1, 1, 12)), ("inst-2", "Two", None)]
+    assert serializer.dump_many(rows) == [
+        {"id": "inst-1", "name": "One", "dateCreated": "2024-01-01T12:00:00"},
+        {"id": "inst-2", "name": "Two", "dateCreated": None},
+    ]
+
+# Test Serializers Select Only Their Columns
+def test_serializer_select_projects_columns():
+    columns = [column.name for column in institution_serializer.select().selected_columns]
+    assert columns == ["institutionID", "name", "email", "subscriptionStatus"]
+
+# Test Observation Responses Keep Their Documented Fields
+def test_observation_serializer_fields():
+    fields = ("observationID", "timestamp", "temperature", "humidity", "windSpeed", "precipitation",
+              "locationCoordinates", "latitude", "longitude", "deviceID")
+    assert observation_serializer.keys == fields
+    assert latest_observation_serializer.keys == fields
+
+# Test Responses Encode the Same With Either JSON Backend
+def test_default_response_body(test_client):
+    with test_client.application.test_request_context():
+        response, status_code = ResponseHelper.default_response("OK", 200, {"b": 1, "a": [1.5, None]})
+    assert status_code == 200
+    assert response.mimetype == "application/json"
+    assert json.loads(response.get_data()) == {"message": "OK", "status_code": 200, "data": {"b": 1, "a": [1.5, None]}}
@@ -0,0 +1,145 @@
+import json
+import pytest
+from sqlalchemy.exc import OperationalError
+from application import create_app
+from application.extensions import db
+from application.ingest import parse_observation
+from application.models import IoTDevice, Observation
+from application import write_behind
+from application.write_behind import WriteBehindQueue, get_write_behind_queue, _STOP
+from config import TestingConfig
+
+@pytest.fixture
+def writer_app(tmp_path):
+    class WriterConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'writer.db'}"
+
+    app = create_app(WriterConfig)
+    with app.app_context():
+        db.create_all()
+        db.session.add(IoTDevice(deviceID="device-1", location="Roof", batteryStatus="Full", transmissionInterval=30))
+        db.session.commit()
+    return app
+
+def readings(count):
+    rows = []
+    for i in range(count):
+        row, _ = parse_observation({"deviceID": "device-1", "timestamp": f"2024-05-01T00:00:{i:02d}",
+                                    "temperature": 20.0, "humidity": 50.0})
+        rows.append(row)
+    return rows
+
+def stored(app):
+    with app.app_context():
+        return db.session.query(Observation).count()
+
+# Test Readings Are Accepted Immediately and Group-Committed
+def test_write_behind_ingest(tmp_path):
+    class WriteBehindConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'write_behind.db'}"
+        WRITE_BEHIND_INGEST = True
+        WRITE_BEHIND_FLUSH_INTERVAL = 0.01
+
+    app = create_app(WriteBehindConfig)
+    with app.app_context():
+        db.create_all()
+    client = app.test_client()
+    device = client.post("/iot-devices/", json={"location": "Roof", "batteryStatus": "Full", "transmissionInterval": 30})
+    device_id = json.loads(device.data)["data"]["deviceID"]
+
+    for i in range(20):
+        response = client.post("/observations/", json={
+            "deviceID": device_id, "timestamp": f"2024-05-01T00:00:{i:02d}", "temperature": 20.0, "humidity": 50.0
+        })
+        assert response.status_code == 202
+
+    with app.app_context():
+        get_write_behind_queue().drain(timeout=5)
+        assert db.session.query(Observation).filter_by(deviceID=device_id).count() == 20
+
+    stats = json.loads(client.get("/observations/queue").data)["data"]
+    assert stats["accepted"] == stats["written"] == 20
+    assert stats["depth"] == 0
+    assert stats["batches"] >= 1
+
+    metrics = client.get("/metrics").get_data(as_text=True)
+    assert "# TYPE write_behind_written_total counter" in metrics
+    assert "write_behind_written_total 20" in metrics
+    assert "write_behind_queue_depth 0" in metrics
+
+# Test a Full Queue Pushes Back
+def test_write_behind_backpressure():
+    write_queue = WriteBehindQueue(app=None, maxsize=1)
+    assert write_queue.submit({"observationID": "obs-1"})
+    assert not write_queue.submit({"observationID": "obs-2"})
+    assert write_queue.stats()["rejected"] == 1
+
+# Test a Locked Database Is Retried Before the Batch Is Given Up
+def test_write_behind_retries(writer_app, monkeypatch):
+    monkeypatch.setattr(write_behind, "WRITE_BEHIND_RETRY_DELAY", 0)
+    store = write_behind.store_observations
+    calls = []
+
+    def locked_once(rows):
+        calls.append(len(rows))
+        if len(calls) == 1:
+            raise OperationalError("INSERT", {}, Exception("database is locked"))
+        store(rows)
+
+    monkeypatch.setattr(write_behind, "store_observations", locked_once)
+    write_queue = WriteBehindQueue(writer_app)
+    write_queue._write(readings(5))
+    assert calls == [5, 5]
+    assert stored(writer_app) == 5
+    assert write_queue.stats()["written"] == 5 and write_queue.stats()["failed"] == 0
+
+# Test One Bad Row Does Not Sink the Rest of Its Batch
+def test_write_behind_row_fallback(writer_app):
+    rows = readings(4)
+    rows[2]["observationID"] = rows[1]["observationID"]
+    write_queue = WriteBehindQueue(writer_app)
+    write_queue._write(rows)
+    assert stored(writer_app) == 3
+    stats = write_queue.stats()
+    assert stats["written"] == 3 and stats["failed"] == 1
+
+# Test Readings Queued Behind the Stop Marker Are Still Written
+def test_write_behind_drains_everything(writer_app, monkeypatch):
+    registered = []
+    monkeypatch.setattr(write_behind.atexit, "register", registered.append)
+    write_queue = WriteBehindQueue(writer_app, batch_size=2)
+    rows = readings(5)
+    write_queue.submit(rows[0])
+    write_queue._queue.put(_STOP)
+    for row in rows[1:]:
+        write_queue.submit(row)
+
+    write_queue.start()
+    write_queue._thread.join(5)
+    assert stored(writer_app) == 5
+    assert write_queue.stats()["depth"] == 0
+
+    # Restarting does not register another drain at exit
+    write_queue.start()
+    write_queue.drain(timeout=5)
+    assert registered == [write_queue.drain]
+
+# Test Non-Finite Readings Are Refused Before They Are Queued
+def test_write_behind_rejects_non_finite(tmp_path):
+    class WriteBehindConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'write_behind.db'}"
+        WRITE_BEHIND_INGEST = True
+
+    app = create_app(WriteBehindConfig)
+    with app.app_context():
+        db.create_all()
+    client = app.test_client()
+    device = client.post("/iot-devices/", json={"location": "Roof", "batteryStatus": "Full", "transmissionInterval": 30})
+    device_id = json.loads(device.data)["data"]["deviceID"]
+
+    for value in ("NaN", "Infinity", "1e400"):
+        response = client.post("/observations/", content_type="application/json", data=(
+            f'{{"deviceID": "{device_id}", "timestamp": "2024-05-01T00:00:00", "temperature": {value}, "humidity": 50.0}}'
+        ))
+        assert response.status_code == 400
+    assert json.loads(client.get("/observations/queue").data)["data"]["accepted"] == 0